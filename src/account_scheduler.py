@@ -0,0 +1,142 @@
+import time
+import logging
+import threading
+from collections import deque
+from typing import Callable, Dict, Iterable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class AccountHealth:
+    """Rolling health statistics for one account."""
+    __slots__ = ("in_flight", "latency", "outcomes", "cooldown_until", "throttle_streak", "last_dispatch")
+
+    def __init__(self, window: int):
+        self.in_flight = 0
+        self.latency: Optional[float] = None # Exponentially weighted, seconds
+        self.outcomes = deque(maxlen=window) # True for a failed request (429/5xx/network)
+        self.cooldown_until = 0.0
+        self.throttle_streak = 0
+        self.last_dispatch = 0
+
+    @property
+    def error_rate(self) -> float:
+        if not self.outcomes:
+            return 0.0
+        return sum(self.outcomes) / len(self.outcomes)
+
+class AccountScheduler:
+    """
+    Picks the healthiest available Gemini account for each request.
+
+    Accounts are ranked by in-flight requests, recent error rate and latency. A throttled
+    account is put into an escalating cooldown and skipped until it ends, so the other
+    accounts keep serving requests instead of the whole process waiting.
+    """
+
+    LATENCY_ALPHA = 0.3
+
+    def __init__(self, accounts: Callable[[], List[dict]], cooldown: float = 30.0,
+                 max_cooldown: float = 300.0, window: int = 20):
+        self._accounts = accounts
+        self.cooldown = float(cooldown)
+        self.max_cooldown = float(max_cooldown)
+        self.window = window
+        self._health: Dict[str, AccountHealth] = {}
+        self._dispatches = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(record: dict) -> str:
+        return record.get("email") or record.get("refresh") or "unknown"
+
+    def health(self, record: dict) -> AccountHealth:
+        with self._lock:
+            return self._health_for(self._key(record))
+
+    def _health_for(self, key: str) -> AccountHealth:
+        health = self._health.get(key)
+        if health is None:
+            health = self._health[key] = AccountHealth(self.window)
+        return health
+
+    def _score(self, health: AccountHealth) -> float:
+        latency = health.latency or 0.0
+        return health.in_flight + 2.0 * health.error_rate + latency / 60.0
+
+    def pick(self, exclude: Iterable[str] = ()) -> Optional[dict]:
+        """
+        Returns the best valid account that is not cooling down and marks it in flight,
+        or None when no account is available right now.
+        """
+        excluded = set(exclude)
+        now = time.monotonic()
+        with self._lock:
+            best, best_rank = None, None
+            for record in self._accounts():
+                if record.get("status") != "valid":
+                    continue
+                key = self._key(record)
+                if key in excluded:
+                    continue
+                health = self._health_for(key)
+                if health.cooldown_until > now:
+                    continue
+                # Ties go to the account that has waited longest since its last dispatch
+                rank = (self._score(health), health.last_dispatch)
+                if best_rank is None or rank < best_rank:
+                    best, best_rank = record, rank
+            if best is not None:
+                health = self._health_for(self._key(best))
+                health.in_flight += 1
+                self._dispatches += 1
+                health.last_dispatch = self._dispatches
+            return best
+
+    def seconds_until_available(self) -> Optional[float]:
+        """Time until the first valid account leaves cooldown; None if there are no valid accounts."""
+        now = time.monotonic()
+        with self._lock:
+            waits = [
+                max(0.0, self._health_for(self._key(record)).cooldown_until - now)
+                for record in self._accounts() if record.get("status") == "valid"
+            ]
+        return min(waits) if waits else None
+
+    def release(self, record: dict):
+        """Marks a picked account as no longer in flight."""
+        with self._lock:
+            health = self._health_for(self._key(record))
+            health.in_flight = max(0, health.in_flight - 1)
+
+    def record_success(self, record: dict, latency: float):
+        with self._lock:
+            health = self._health_for(self._key(record))
+            health.outcomes.append(False)
+            health.throttle_streak = 0
+            if health.latency is None:
+                health.latency = latency
+            else:
+                health.latency += self.LATENCY_ALPHA * (latency - health.latency)
+
+    def record_error(self, record: dict):
+        """Records a 5xx, timeout or network failure."""
+        with self._lock:
+            self._health_for(self._key(record)).outcomes.append(True)
+
+    def record_throttle(self, record: dict, retry_after: Optional[float] = None) -> float:
+        """Puts the account into cooldown after a 429 and returns the cooldown length."""
+        with self._lock:
+            health = self._health_for(self._key(record))
+            health.outcomes.append(True)
+            health.throttle_streak += 1
+            if retry_after is None:
+                retry_after = min(self.cooldown * (2 ** (health.throttle_streak - 1)), self.max_cooldown)
+            health.cooldown_until = max(health.cooldown_until, time.monotonic() + retry_after)
+        logger.warning(f"Account {self._key(record)} cooling down for {retry_after:.0f}s")
+        return retry_after
+
+    def suspend(self, record: dict, seconds: Optional[float] = None):
+        """Keeps an account out of rotation for a while (e.g. after an auth failure)."""
+        with self._lock:
+            health = self._health_for(self._key(record))
+            health.cooldown_until = max(health.cooldown_until, time.monotonic() + (self.cooldown if seconds is None else seconds))
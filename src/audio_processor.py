@@ -1,10 +1,87 @@
 import os
+import re
+import json
+import time
 import shutil
+import asyncio
+import threading
 import subprocess
 import base64
-from typing import List
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+try:
+    import mutagen
+except ImportError: # Optional: header-only probing for MP3/M4A
+    mutagen = None
+
+@dataclass(frozen=True)
+class MediaInfo:
+    """What one probe of a media file reports. Zero/empty values mean unknown."""
+    duration: float = 0.0 # seconds
+    bitrate: int = 0 # bits per second (audio stream, else container)
+    codec: str = ""
+    channels: int = 0
+    sample_rate: int = 0
+    format_name: str = ""
+
+@dataclass(frozen=True)
+class EncodingProfile:
+    """
+    How prepared audio is encoded. The container (extension) decides the MIME type sent with
+    each chunk. For a lossless profile, bitrate is only a generous estimate used to size chunks.
+    """
+    name: str
+    codec: str
+    bitrate: str
+    extension: str
+    mime_type: str
+    lossless: bool = False
+
+    def encoder_args(self, bitrate: Optional[str] = None) -> List[str]:
+        args = ["-c:a", self.codec]
+        if not self.lossless:
+            args += ["-b:a", bitrate or self.bitrate]
+        if self.codec == "libopus":
+            args += ["-application", "voip"] # Tuned for speech
+        return args
+
+    @property
+    def codec_name(self) -> str:
+        """The codec name ffprobe reports for audio encoded with this profile."""
+        return {"libmp3lame": "mp3", "libopus": "opus"}.get(self.codec, self.codec)
+
+ENCODING_PROFILES = {profile.name: profile for profile in [
+    EncodingProfile("mp3-48k", "libmp3lame", "48k", ".mp3", "audio/mp3"),
+    EncodingProfile("opus-24k", "libopus", "24k", ".ogg", "audio/ogg"),
+    EncodingProfile("opus-16k", "libopus", "16k", ".ogg", "audio/ogg"),
+    # Archival quality; 16 kHz mono 16-bit PCM is 256 kbit/s before compression
+    EncodingProfile("flac", "flac", "256k", ".flac", "audio/flac", lossless=True),
+]}
+DEFAULT_ENCODING_PROFILE = "mp3-48k"
+
+# Range accepted for the atempo speed-up (pitch is kept; past 2x lecture speech stops being reliably intelligible)
+MIN_TEMPO, MAX_TEMPO = 0.5, 2.0
 
 class AudioProcessor:
+    # Probe results by (path, size, mtime), so repeated lookups on an unchanged file are free
+    _probe_cache = OrderedDict()
+    _probe_cache_lock = threading.Lock()
+    PROBE_CACHE_SIZE = 256
+    # Extensions whose headers mutagen reads without scanning the file
+    MUTAGEN_EXTENSIONS = {".mp3": "mp3", ".m4a": "aac"}
+    # Container for a stream-copied audio track, by codec (anything else goes in Matroska audio)
+    COPY_CONTAINERS = {"aac": ".m4a", "alac": ".m4a", "mp3": ".mp3", "opus": ".ogg", "vorbis": ".ogg", "flac": ".flac"}
+    # Reserve per chunk for what packet sizes do not include: headers (FLAC's are ~8 KB) plus
+    # framing, which Ogg pages make ~5% of low-bitrate Opus and is negligible elsewhere
+    CHUNK_OVERHEAD_BYTES = 16 * 1024
+    CHUNK_OVERHEAD_RATIOS = {".ogg": 0.06}
+    # Words in a track's title or handler that mark it as the speech, or as something else
+    SPEECH_TRACK_WORDS = ("voice", "speech", "mic", "narrat", "comment", "dialog", "lecture")
+    OTHER_TRACK_WORDS = ("music", "desktop", "system", "game", "background", "effects")
+
     @staticmethod
     def get_file_size(file_path: str) -> int:
         """Returns the file size in bytes."""
@@ -27,50 +104,149 @@ class AudioProcessor:
         with open(file_path, "rb") as f:
             return base64.b64encode(f.read()).decode("utf-8")
 
+    @staticmethod
+    async def run_command_async(command: List[str]) -> str:
+        """
+        Runs an ffmpeg/ffprobe command as an asyncio subprocess.
+        Raises subprocess.CalledProcessError on a non-zero exit, like subprocess.run(check=True).
+        """
+        process = await asyncio.create_subprocess_exec(
+            *command, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+        )
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            raise subprocess.CalledProcessError(process.returncode, command, output=stdout, stderr=stderr)
+        return stdout.decode("utf-8", errors="replace")
+
+    @staticmethod
+    def _probe_command(file_path: str) -> List[str]:
+        # Added analyzeduration and probesize for better HLS/Vimeo duration detection
+        return [
+            "ffprobe", "-v", "error",
+            "-analyzeduration", "100M", "-probesize", "100M",
+            "-print_format", "json", "-show_format", "-show_streams", file_path
+        ]
+
+    @staticmethod
+    def _parse_probe(output: str) -> MediaInfo:
+        """Builds a MediaInfo from ffprobe's JSON (format + first audio stream)."""
+        data = json.loads(output or "{}")
+        fmt = data.get("format", {})
+        stream = next((s for s in data.get("streams", []) if s.get("codec_type") == "audio"), {})
+
+        def number(value, cast):
+            try:
+                return cast(float(value))
+            except (TypeError, ValueError):
+                return cast(0)
+
+        return MediaInfo(
+            duration=number(fmt.get("duration"), float) or number(stream.get("duration"), float),
+            bitrate=number(stream.get("bit_rate"), int) or number(fmt.get("bit_rate"), int),
+            codec=stream.get("codec_name", ""),
+            channels=number(stream.get("channels"), int),
+            sample_rate=number(stream.get("sample_rate"), int),
+            format_name=fmt.get("format_name", ""),
+        )
+
+    @staticmethod
+    def _probe_with_mutagen(file_path: str) -> Optional[MediaInfo]:
+        """Header-only probe for MP3/M4A; None if mutagen is missing or cannot read the file."""
+        codec = AudioProcessor.MUTAGEN_EXTENSIONS.get(os.path.splitext(file_path)[1].lower())
+        if mutagen is None or codec is None:
+            return None
+        try:
+            media = mutagen.File(file_path)
+        except Exception:
+            return None
+        info = getattr(media, "info", None)
+        if info is None or not getattr(info, "length", 0):
+            return None
+        return MediaInfo(
+            duration=float(info.length),
+            bitrate=int(getattr(info, "bitrate", 0) or 0),
+            codec=codec,
+            channels=int(getattr(info, "channels", 0) or 0),
+            sample_rate=int(getattr(info, "sample_rate", 0) or 0),
+            format_name="mp3" if codec == "mp3" else "mov,mp4,m4a,3gp,3g2,mj2",
+        )
+
+    @staticmethod
+    def _probe_key(file_path: str):
+        try:
+            st = os.stat(file_path)
+        except OSError:
+            return None
+        return (os.path.abspath(file_path), st.st_size, st.st_mtime_ns)
+
+    @staticmethod
+    def _cached_probe(key) -> Optional[MediaInfo]:
+        if key is None:
+            return None
+        with AudioProcessor._probe_cache_lock:
+            info = AudioProcessor._probe_cache.get(key)
+            if info is not None:
+                AudioProcessor._probe_cache.move_to_end(key)
+            return info
+
+    @staticmethod
+    def _remember_probe(key, info: MediaInfo) -> MediaInfo:
+        if key is not None:
+            with AudioProcessor._probe_cache_lock:
+                AudioProcessor._probe_cache[key] = info
+                while len(AudioProcessor._probe_cache) > AudioProcessor.PROBE_CACHE_SIZE:
+                    AudioProcessor._probe_cache.popitem(last=False)
+        return info
+
+    @staticmethod
+    def probe(file_path: str) -> MediaInfo:
+        """
+        Returns duration, bitrate, codec, channels and sample rate from a single probe.
+        MP3/M4A headers are read with mutagen; anything else (or anything mutagen cannot read)
+        takes one ffprobe call. Results are memoized while the file's size and mtime are unchanged.
+        """
+        key = AudioProcessor._probe_key(file_path)
+        cached = AudioProcessor._cached_probe(key)
+        if cached is not None:
+            return cached
+        info = AudioProcessor._probe_with_mutagen(file_path)
+        if info is None:
+            try:
+                result = subprocess.run(AudioProcessor._probe_command(file_path), check=True, capture_output=True, text=True)
+                info = AudioProcessor._parse_probe(result.stdout)
+            except (subprocess.CalledProcessError, ValueError):
+                return MediaInfo()
+        return AudioProcessor._remember_probe(key, info)
+
+    @staticmethod
+    async def probe_async(file_path: str) -> MediaInfo:
+        """Async counterpart of probe."""
+        key = AudioProcessor._probe_key(file_path)
+        cached = AudioProcessor._cached_probe(key)
+        if cached is not None:
+            return cached
+        info = await asyncio.to_thread(AudioProcessor._probe_with_mutagen, file_path)
+        if info is None:
+            try:
+                info = AudioProcessor._parse_probe(await AudioProcessor.run_command_async(AudioProcessor._probe_command(file_path)))
+            except (subprocess.CalledProcessError, ValueError):
+                return MediaInfo()
+        return AudioProcessor._remember_probe(key, info)
+
     @staticmethod
     def get_duration(file_path: str) -> float:
         """Returns the duration of the audio file in seconds."""
-        try:
-            # Added analyzeduration and probesize for better HLS/Vimeo duration detection
-            command = [
-                "ffprobe", "-v", "error", 
-                "-analyzeduration", "100M", "-probesize", "100M",
-                "-show_entries", "format=duration",
-                "-of", "default=noprint_wrappers=1:nokey=1", file_path
-            ]
-            result = subprocess.run(command, check=True, capture_output=True, text=True)
-            val = result.stdout.strip()
-            return float(val) if val and val != "N/A" else 0.0
-        except (subprocess.CalledProcessError, ValueError):
-            return 0.0
+        return AudioProcessor.probe(file_path).duration
+
+    @staticmethod
+    async def get_duration_async(file_path: str) -> float:
+        """Async counterpart of get_duration."""
+        return (await AudioProcessor.probe_async(file_path)).duration
 
     @staticmethod
     def get_bitrate(file_path: str) -> int:
         """Returns the bitrate in bits per second."""
-        try:
-            command = [
-                "ffprobe", "-v", "error", 
-                "-analyzeduration", "100M", "-probesize", "100M",
-                "-select_streams", "a:0",
-                "-show_entries", "stream=bit_rate", "-of", "default=noprint_wrappers=1:nokey=1",
-                file_path
-            ]
-            result = subprocess.run(command, check=True, capture_output=True, text=True)
-            val = result.stdout.strip()
-            if val == "N/A" or not val:
-                command = [
-                    "ffprobe", "-v", "error", 
-                    "-analyzeduration", "100M", "-probesize", "100M",
-                    "-show_entries", "format=bit_rate", 
-                    "-of", "default=noprint_wrappers=1:nokey=1",
-                    file_path
-                ]
-                result = subprocess.run(command, check=True, capture_output=True, text=True)
-                val = result.stdout.strip()
-            
-            return int(val) if val and val != "N/A" else 0
-        except (subprocess.CalledProcessError, ValueError):
-            return 0
+        return AudioProcessor.probe(file_path).bitrate
 
     @staticmethod
     def reencode_to_optimal(input_path: str, output_path: str, bitrate: str = "48k", threads: int = 0) -> bool:
@@ -106,6 +282,30 @@ class AudioProcessor:
             print(f"      ❌ Error during silence removal: {e.stderr.decode('utf-8', errors='replace')}")
             return False
 
+    @staticmethod
+    def _split_command(input_path: str, output_pattern: str, segment_time: int, threads: int) -> List[str]:
+        return [
+            "ffmpeg", "-y", "-threads", str(threads), "-i", input_path,
+            "-f", "segment",
+            "-segment_time", str(segment_time),
+            "-reset_timestamps", "1", # Each chunk starts at 0, or Ogg chunks report their end time as duration
+            "-c", "copy",
+            output_pattern
+        ]
+
+    @staticmethod
+    def _collect_chunks(input_path: str, output_pattern: str) -> List[str]:
+        """Lists the chunk files written for output_pattern, in order."""
+        directory = os.path.dirname(output_pattern) or "."
+        base_parts = os.path.basename(output_pattern).split("%")
+        prefix = base_parts[0]
+        
+        chunks = []
+        for f in sorted(os.listdir(directory)):
+            if f.startswith(prefix) and f != os.path.basename(input_path):
+                 chunks.append(os.path.join(directory, f))
+        return chunks
+
     @staticmethod
     def split_into_chunks(input_path: str, output_pattern: str, segment_time: int = 1800, threads: int = 0) -> List[str]:
         """
@@ -114,48 +314,223 @@ class AudioProcessor:
         """
         try:
             print(f"      - Splitting into chunks of {segment_time}s (threads={threads})...")
-            command = [
-                "ffmpeg", "-y", "-threads", str(threads), "-i", input_path,
-                "-f", "segment",
-                "-segment_time", str(segment_time),
-                "-c", "copy",
-                output_pattern
-            ]
+            command = AudioProcessor._split_command(input_path, output_pattern, segment_time, threads)
             subprocess.run(command, check=True, capture_output=True)
+            return AudioProcessor._collect_chunks(input_path, output_pattern)
             
-            directory = os.path.dirname(output_pattern) or "."
-            base_parts = os.path.basename(output_pattern).split("%")
-            prefix = base_parts[0]
-            
-            chunks = []
-            for f in sorted(os.listdir(directory)):
-                if f.startswith(prefix) and f != os.path.basename(input_path):
-                     chunks.append(os.path.join(directory, f))
-            return chunks
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error during splitting: {e.stderr.decode('utf-8', errors='replace')}")
+            return []
+
+    @staticmethod
+    async def split_into_chunks_async(input_path: str, output_pattern: str, segment_time: int = 1800, threads: int = 0) -> List[str]:
+        """Async counterpart of split_into_chunks."""
+        try:
+            print(f"      - Splitting into chunks of {segment_time}s (threads={threads})...")
+            command = AudioProcessor._split_command(input_path, output_pattern, segment_time, threads)
+            await AudioProcessor.run_command_async(command)
+            return AudioProcessor._collect_chunks(input_path, output_pattern)
             
         except subprocess.CalledProcessError as e:
             print(f"      ❌ Error during splitting: {e.stderr.decode('utf-8', errors='replace')}")
             return []
 
     @staticmethod
-    def optimize_audio(input_path: str, output_path: str, bitrate: str = "48k", threshold_db: int = -50, threads: int = 0) -> bool:
+    def _packets_command(input_path: str) -> List[str]:
+        return [
+            "ffprobe", "-v", "error", "-select_streams", "a:0",
+            "-show_entries", "packet=pts_time,size", "-of", "csv=p=0", input_path
+        ]
+
+    @staticmethod
+    def _parse_packets(output: str) -> List[tuple]:
+        """(pts seconds, size bytes) of each packet in ffprobe's CSV listing; empty if any packet lacks a timestamp."""
+        packets = []
+        for line in output.splitlines():
+            fields = line.strip().split(",")
+            if len(fields) < 2:
+                continue
+            try:
+                packets.append((float(fields[0]), int(fields[1])))
+            except ValueError:
+                return []
+        return packets
+
+    @staticmethod
+    def _packet_budget(input_path: str, max_size_mb: float) -> float:
+        """Bytes of packets a chunk of input_path's container may hold and still stay under max_size_mb."""
+        max_bytes = max_size_mb * 1024 * 1024
+        ratio = AudioProcessor.CHUNK_OVERHEAD_RATIOS.get(os.path.splitext(input_path)[1].lower(), 0.01)
+        return max_bytes * (1 - ratio) - min(AudioProcessor.CHUNK_OVERHEAD_BYTES, max_bytes / 4)
+
+    @staticmethod
+    def _packet_end(packets: List[tuple], index: int) -> float:
+        """When packet index ends: at the next packet, or one packet length after the last one starts."""
+        if index + 1 < len(packets):
+            return packets[index + 1][0]
+        pts = packets[index][0]
+        return pts + (pts - packets[index - 1][0] if index else 0.0)
+
+    @staticmethod
+    def _chunk_durations(packets: List[tuple], cuts: List[int]) -> List[float]:
+        """Length in seconds of each chunk the cuts make."""
+        starts = [0] + list(cuts)
+        ends = list(cuts) + [len(packets)]
+        return [AudioProcessor._packet_end(packets, end - 1) - packets[start][0] for start, end in zip(starts, ends)]
+
+    @staticmethod
+    def _set_flac_length(file_path: str, seconds: float):
+        """
+        Rewrites the total sample count in a FLAC file's STREAMINFO. Stream-copied segments keep the
+        source's, so each would otherwise report the whole recording's duration. The MD5 of the
+        audio no longer matches either, so it is zeroed (meaning unknown).
+        """
+        with open(file_path, "r+b") as f:
+            header = bytearray(f.read(42))
+            # "fLaC", then the STREAMINFO block header (type 0) and its 34 bytes
+            if len(header) < 42 or header[:4] != b"fLaC" or header[4] & 0x7F != 0:
+                return
+            info = int.from_bytes(header[18:26], "big")
+            sample_rate = info >> 44
+            samples = max(0, min(round(seconds * sample_rate), (1 << 36) - 1))
+            info = (info & ~((1 << 36) - 1)) | samples
+            header[18:26] = info.to_bytes(8, "big")
+            header[26:42] = bytes(16)
+            f.seek(0)
+            f.write(header)
+
+    @staticmethod
+    def _finish_packet_split(input_path: str, output_pattern: str, packets: List[tuple], cuts: List[int]) -> List[str]:
+        chunks = AudioProcessor._collect_chunks(input_path, output_pattern)
+        if os.path.splitext(output_pattern)[1].lower() == ".flac" and len(chunks) == len(cuts) + 1:
+            for chunk, seconds in zip(chunks, AudioProcessor._chunk_durations(packets, cuts)):
+                AudioProcessor._set_flac_length(chunk, seconds)
+        return chunks
+
+    @staticmethod
+    def plan_packet_cuts(packets: List[tuple], segment_time: int, budget: float) -> List[int]:
+        """
+        Indices of the packets that start each chunk after the first, so that every chunk lasts at
+        most segment_time (when set) and its packets add up to at most budget bytes. Cuts fall on
+        packet boundaries, where a stream copy splits exactly.
+        """
+        cuts = []
+        start, used = (packets[0][0] if packets else 0.0), 0
+        for index, (pts, size) in enumerate(packets):
+            end = AudioProcessor._packet_end(packets, index)
+            if used and ((segment_time > 0 and end - start > segment_time) or used + size > budget):
+                cuts.append(index)
+                start, used = pts, 0
+            used += size
+        return cuts
+
+    @staticmethod
+    def _packet_split_command(input_path: str, output_pattern: str, cuts: List[int], threads: int) -> List[str]:
+        return [
+            "ffmpeg", "-y", "-threads", str(threads), "-i", input_path,
+            "-f", "segment",
+            "-segment_frames", ",".join(str(cut) for cut in cuts),
+            "-reset_timestamps", "1",
+            "-c", "copy",
+            output_pattern
+        ]
+
+    @staticmethod
+    def split_at_packets(input_path: str, output_pattern: str, segment_time: int, max_size_mb: float, threads: int = 0) -> Optional[List[str]]:
+        """
+        Splits the audio at packet boundaries planned from the actual packet sizes, so every chunk is
+        within both segment_time and max_size_mb in one pass, VBR or not. Returns None when the
+        packets cannot be listed (the caller falls back to a fixed segment time).
+        """
+        try:
+            result = subprocess.run(AudioProcessor._packets_command(input_path), check=True, capture_output=True, text=True)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return None
+        packets = AudioProcessor._parse_packets(result.stdout)
+        cuts = AudioProcessor.plan_packet_cuts(packets, segment_time, AudioProcessor._packet_budget(input_path, max_size_mb))
+        if not cuts:
+            return None
+        try:
+            print(f"      - Splitting into {len(cuts) + 1} chunks at planned packet boundaries (threads={threads})...")
+            subprocess.run(AudioProcessor._packet_split_command(input_path, output_pattern, cuts, threads), check=True, capture_output=True)
+            return AudioProcessor._finish_packet_split(input_path, output_pattern, packets, cuts)
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error during splitting: {e.stderr.decode('utf-8', errors='replace')}")
+            return []
+
+    @staticmethod
+    async def split_at_packets_async(input_path: str, output_pattern: str, segment_time: int, max_size_mb: float, threads: int = 0) -> Optional[List[str]]:
+        """Async counterpart of split_at_packets."""
+        try:
+            output = await AudioProcessor.run_command_async(AudioProcessor._packets_command(input_path))
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return None
+        # Planning walks every packet of a long recording
+        packets = AudioProcessor._parse_packets(output)
+        budget = AudioProcessor._packet_budget(input_path, max_size_mb)
+        cuts = await asyncio.to_thread(AudioProcessor.plan_packet_cuts, packets, segment_time, budget)
+        if not cuts:
+            return None
+        try:
+            print(f"      - Splitting into {len(cuts) + 1} chunks at planned packet boundaries (threads={threads})...")
+            await AudioProcessor.run_command_async(AudioProcessor._packet_split_command(input_path, output_pattern, cuts, threads))
+            return await asyncio.to_thread(AudioProcessor._finish_packet_split, input_path, output_pattern, packets, cuts)
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error during splitting: {e.stderr.decode('utf-8', errors='replace')}")
+            return []
+
+    @staticmethod
+    def encoding_profile(name: str) -> EncodingProfile:
+        """Looks up an encoding profile by name (e.g. "opus-24k"). Raises ValueError for unknown names."""
+        try:
+            return ENCODING_PROFILES[name]
+        except KeyError:
+            raise ValueError(f"Unknown encoding profile '{name}' (choose from {', '.join(ENCODING_PROFILES)})") from None
+
+    @staticmethod
+    def _profile_bitrate(profile: Optional[str], bitrate: str) -> str:
+        """The bitrate to encode and plan chunks with: the profile's when one is given."""
+        return AudioProcessor.encoding_profile(profile).bitrate if profile else bitrate
+
+    @staticmethod
+    def _tempo_filter(tempo: float) -> Optional[str]:
+        """The atempo filter for a speed-up factor, or None at normal speed. Raises ValueError out of range."""
+        tempo = float(tempo)
+        if not MIN_TEMPO <= tempo <= MAX_TEMPO:
+            raise ValueError(f"Tempo {tempo:g} is outside {MIN_TEMPO:g}-{MAX_TEMPO:g}")
+        return None if tempo == 1.0 else f"atempo={tempo:g}"
+
+    @staticmethod
+    def _optimize_command(input_path: str, output_path: str, bitrate: str, threshold_db: int, threads: int,
+                          profile: Optional[str] = None, tempo: float = 1.0) -> List[str]:
+        # Filter for silence removal
+        af_filter = f"silenceremove=stop_periods=-1:stop_duration=1:stop_threshold={threshold_db}dB"
+        tempo_filter = AudioProcessor._tempo_filter(tempo)
+        if tempo_filter:
+            af_filter += f",{tempo_filter}"
+        encoder = AudioProcessor.encoding_profile(profile).encoder_args(bitrate) if profile else ["-b:a", bitrate]
+        
+        return [
+            "ffmpeg", "-y", "-threads", str(threads), "-i", input_path,
+            "-af", af_filter,
+            *encoder,
+            "-ac", "1",      # Mono
+            "-ar", "16000",  # 16kHz
+            output_path
+        ]
+
+    @staticmethod
+    def optimize_audio(input_path: str, output_path: str, bitrate: str = "48k", threshold_db: int = -50, threads: int = 0,
+                       profile: Optional[str] = None, tempo: float = 1.0) -> bool:
         """
         Performs silence removal, bitrate optimization, mono conversion, and sample rate adjustment
-        in a SINGLE ffmpeg pass.
+        in a SINGLE ffmpeg pass. A named encoding profile overrides bitrate and picks the codec;
+        a tempo above 1 speeds the audio up (pitch preserved) so fewer seconds are transcribed.
         """
         try:
-            print(f"      - Optimizing audio (silence removal, mono, {bitrate}, 16kHz, threads={threads})...")
-            # Filter for silence removal
-            af_filter = f"silenceremove=stop_periods=-1:stop_duration=1:stop_threshold={threshold_db}dB"
-            
-            command = [
-                "ffmpeg", "-y", "-threads", str(threads), "-i", input_path,
-                "-af", af_filter,
-                "-b:a", bitrate,
-                "-ac", "1",      # Mono
-                "-ar", "16000",  # 16kHz
-                output_path
-            ]
+            bitrate = AudioProcessor._profile_bitrate(profile, bitrate)
+            print(f"      - Optimizing audio (silence removal, mono, {profile or bitrate}, 16kHz, {float(tempo):g}x, threads={threads})...")
+            command = AudioProcessor._optimize_command(input_path, output_path, bitrate, threshold_db, threads, profile, tempo)
             subprocess.run(command, check=True, capture_output=True)
             return True
         except subprocess.CalledProcessError as e:
@@ -163,44 +538,430 @@ class AudioProcessor:
             return False
 
     @staticmethod
-    def process_for_transcription(input_path: str, segment_time: int = 1800, max_size_mb: int = 15, output_dir: str = "temp", threads: int = 0, output_pattern: str = None) -> List[str]:
+    async def optimize_audio_async(input_path: str, output_path: str, bitrate: str = "48k", threshold_db: int = -50, threads: int = 0,
+                                   profile: Optional[str] = None, tempo: float = 1.0) -> bool:
+        """Async counterpart of optimize_audio."""
+        try:
+            bitrate = AudioProcessor._profile_bitrate(profile, bitrate)
+            print(f"      - Optimizing audio (silence removal, mono, {profile or bitrate}, 16kHz, {float(tempo):g}x, threads={threads})...")
+            command = AudioProcessor._optimize_command(input_path, output_path, bitrate, threshold_db, threads, profile, tempo)
+            await AudioProcessor.run_command_async(command)
+            return True
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error during audio optimization: {e.stderr.decode('utf-8', errors='replace')}")
+            return False
+
+    @staticmethod
+    def _bitrate_bps(bitrate: str) -> int:
+        """Parses an ffmpeg bitrate such as "48k" into bits per second."""
+        value = str(bitrate).strip().lower()
+        scale = {"k": 1000, "m": 1000000}.get(value[-1:], 1)
+        return int(float(value.rstrip("km")) * scale)
+
+    @staticmethod
+    def plan_segments(segment_time: int, max_size_mb: float, bitrate: str = "48k") -> int:
         """
-        Orchestrates the audio processing: splits if needed.
-        Assumes the input is already optimized.
-        Prioritizes duration-based splitting (segment_time) as requested.
+        Segment length (seconds) for chunks encoded at bitrate: at most segment_time, and short
+        enough that a chunk stays under max_size_mb.
+        """
+        by_size = int(max_size_mb * 1024 * 1024 * 8 / AudioProcessor._bitrate_bps(bitrate) * 0.95) # 5% container overhead
+        return max(1, min(segment_time, by_size) if segment_time > 0 else by_size)
+
+    @staticmethod
+    def _fused_bitrate(info: MediaInfo, bitrate: str, profile: Optional[str] = None) -> str:
+        """The target bitrate, lowered to the source's when the source is already leaner (lossy encodes only)."""
+        bitrate = AudioProcessor._profile_bitrate(profile, bitrate)
+        if profile and AudioProcessor.encoding_profile(profile).lossless:
+            return bitrate
+        source_k = info.bitrate // 1000
+        if 16 <= source_k < AudioProcessor._bitrate_bps(bitrate) // 1000:
+            return f"{source_k}k"
+        return bitrate
+
+    @staticmethod
+    def _fused_command(input_path: str, output_pattern: str, segment_time: int, bitrate: str, threshold_db: int, threads: int,
+                       profile: Optional[str] = None, tempo: float = 1.0) -> List[str]:
+        command = AudioProcessor._optimize_command(input_path, output_pattern, bitrate, threshold_db, threads, profile, tempo)
+        return command[:-1] + [
+            "-f", "segment",
+            "-segment_time", str(segment_time),
+            "-reset_timestamps", "1",
+            output_pattern
+        ]
+
+    @staticmethod
+    def _remove_stale_chunks(output_pattern: str):
+        """Deletes chunk files left by an interrupted run, which the new pass might not overwrite."""
+        if os.path.isdir(os.path.dirname(output_pattern) or "."):
+            for chunk in AudioProcessor._collect_chunks("", output_pattern):
+                os.remove(chunk)
+
+    @staticmethod
+    def _fused_plan(info: MediaInfo, segment_time: int, max_size_mb: float, bitrate: str, profile: Optional[str] = None,
+                    tempo: float = 1.0):
+        """Returns (segment_time, bitrate) for a fused pass over a probed input."""
+        bitrate = AudioProcessor._fused_bitrate(info, bitrate, profile)
+        # Segments are cut on the output timeline, which a tempo change shortens
+        split_time = AudioProcessor.plan_segments(segment_time, max_size_mb, bitrate)
+        expected = max(1, int(-(-info.duration / float(tempo) // split_time))) if info.duration else 1
+        print(f"      - Optimizing and chunking in one pass ({bitrate}, {split_time}s segments, up to {expected} chunk(s))...")
+        return split_time, bitrate
+
+    @staticmethod
+    def optimize_and_segment(input_path: str, output_pattern: str, segment_time: int = 1800, max_size_mb: float = 15,
+                             bitrate: str = "48k", threshold_db: int = -50, threads: int = 0, profile: Optional[str] = None,
+                             tempo: float = 1.0) -> List[str]:
+        """
+        Silence removal, downmix, resample, encode and segmentation in ONE ffmpeg pass, written
+        straight to the chunk files (no intermediate prepared file, no copy for short inputs).
+        The segment length and bitrate are planned from a probe of the input.
+        """
+        split_time, bitrate = AudioProcessor._fused_plan(AudioProcessor.probe(input_path), segment_time, max_size_mb, bitrate, profile, tempo)
+        AudioProcessor._remove_stale_chunks(output_pattern)
+        try:
+            command = AudioProcessor._fused_command(input_path, output_pattern, split_time, bitrate, threshold_db, threads, profile, tempo)
+            subprocess.run(command, check=True, capture_output=True)
+            return AudioProcessor._collect_chunks(input_path, output_pattern)
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error during fused optimization: {e.stderr.decode('utf-8', errors='replace')}")
+            return []
+
+    @staticmethod
+    async def optimize_and_segment_async(input_path: str, output_pattern: str, segment_time: int = 1800, max_size_mb: float = 15,
+                                         bitrate: str = "48k", threshold_db: int = -50, threads: int = 0, profile: Optional[str] = None,
+                                         tempo: float = 1.0) -> List[str]:
+        """Async counterpart of optimize_and_segment."""
+        info = await AudioProcessor.probe_async(input_path)
+        split_time, bitrate = AudioProcessor._fused_plan(info, segment_time, max_size_mb, bitrate, profile, tempo)
+        AudioProcessor._remove_stale_chunks(output_pattern)
+        try:
+            command = AudioProcessor._fused_command(input_path, output_pattern, split_time, bitrate, threshold_db, threads, profile, tempo)
+            await AudioProcessor.run_command_async(command)
+            return AudioProcessor._collect_chunks(input_path, output_pattern)
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error during fused optimization: {e.stderr.decode('utf-8', errors='replace')}")
+            return []
+
+    @staticmethod
+    def find_silences(input_path: str, start: float, length: float, threshold_db: int = -50, min_silence: float = 0.5) -> List[tuple]:
+        """Returns (start, end) times of the silences in [start, start + length] of the input, in seconds."""
+        command = [
+            "ffmpeg", "-hide_banner", "-nostats", "-threads", "1",
+            "-ss", f"{start:.3f}", "-t", f"{length:.3f}", "-i", input_path,
+            "-af", f"silencedetect=noise={threshold_db}dB:duration={min_silence}",
+            "-f", "null", "-"
+        ]
+        result = subprocess.run(command, capture_output=True, text=True, errors="replace")
+        starts = [float(v) for v in re.findall(r"silence_start: (-?[\d.]+)", result.stderr)]
+        ends = [float(v) for v in re.findall(r"silence_end: (-?[\d.]+)", result.stderr)]
+        # Timestamps are relative to the seek point; a silence running to the end has no end line
+        ends += [length] * (len(starts) - len(ends))
+        return [(start + max(0.0, s), start + e) for s, e in zip(starts, ends)]
+
+    @staticmethod
+    def _cut_point(input_path: str, target: float, window: float, threshold_db: int) -> float:
+        """The middle of the last silence in the window before target, or target itself if there is none."""
+        silences = AudioProcessor.find_silences(input_path, max(0.0, target - window), min(target, window), threshold_db)
+        if not silences:
+            return target
+        silence_start, silence_end = silences[-1]
+        return round((silence_start + min(silence_end, target)) / 2, 3)
+
+    @staticmethod
+    def plan_ranges(input_path: str, duration: float, split_time: int, threshold_db: int = -50,
+                    window: float = 30.0, workers: int = 1) -> List[tuple]:
+        """
+        Splits [0, duration] into contiguous (start, length) ranges of at most split_time seconds,
+        cutting in silences near each boundary so no word is cut in half.
+        """
+        # Each cut lands at most window before its target, so targets one (split_time - window)
+        # apart keep every range within split_time and the cuts can be searched independently
+        window = min(window, split_time / 4)
+        step = split_time - window
+        targets, position = [], float(split_time)
+        while position < duration:
+            targets.append(position)
+            position += step
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            cuts = list(pool.map(lambda t: AudioProcessor._cut_point(input_path, t, window, threshold_db), targets))
+        bounds = [0.0]
+        for cut in cuts:
+            if cut > bounds[-1]:
+                bounds.append(cut)
+        bounds.append(duration)
+        return [(start, end - start) for start, end in zip(bounds, bounds[1:])]
+
+    @staticmethod
+    def _range_command(input_path: str, output_path: str, start: float, length: float, bitrate: str, threshold_db: int,
+                       profile: Optional[str] = None, tempo: float = 1.0) -> List[str]:
+        command = AudioProcessor._optimize_command(input_path, output_path, bitrate, threshold_db, 1, profile, tempo)
+        at = command.index("-i")
+        return command[:at] + ["-ss", f"{start:.3f}", "-t", f"{length:.3f}"] + command[at:]
+
+    @staticmethod
+    def optimize_parallel(input_path: str, output_pattern: str, segment_time: int = 1800, max_size_mb: float = 15,
+                          bitrate: str = "48k", threshold_db: int = -50, workers: int = 2, profile: Optional[str] = None,
+                          tempo: float = 1.0) -> List[str]:
+        """
+        Like optimize_and_segment, but the input is sharded into time ranges (cut at silences)
+        and each range is optimized into its own chunk by a separate ffmpeg process, up to
+        workers at a time. The encode and silence removal are single-threaded in ffmpeg, so
+        this is what puts more than one core to work on a long recording.
+        """
+        info = AudioProcessor.probe(input_path)
+        if not info.duration:
+            print(f"      ❌ Error during parallel optimization: could not probe the duration of {input_path}")
+            return []
+        bitrate = AudioProcessor._fused_bitrate(info, bitrate, profile)
+        split_time = AudioProcessor.plan_segments(segment_time, max_size_mb, bitrate)
+        # Ranges are measured on the input; sped up, each one yields a chunk of split_time at most
+        ranges = AudioProcessor.plan_ranges(input_path, info.duration, int(split_time * float(tempo)), threshold_db, workers=workers)
+        print(f"      - Optimizing {len(ranges)} range(s) in parallel ({bitrate}, {workers} worker(s))...")
+        AudioProcessor._remove_stale_chunks(output_pattern)
+
+        def encode(item):
+            index, (start, length) = item
+            output_path = output_pattern % index
+            command = AudioProcessor._range_command(input_path, output_path, start, length, bitrate, threshold_db, profile, tempo)
+            subprocess.run(command, check=True, capture_output=True)
+            return output_path
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                chunks = list(pool.map(encode, enumerate(ranges)))
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error during parallel optimization: {e.stderr.decode('utf-8', errors='replace')}")
+            return []
+        # A range that was nothing but silence comes out empty; there is nothing to transcribe in it
+        return [chunk for chunk in chunks if AudioProcessor.probe(chunk).duration > 0]
+
+    @staticmethod
+    async def optimize_parallel_async(input_path: str, output_pattern: str, segment_time: int = 1800, max_size_mb: float = 15,
+                                      bitrate: str = "48k", threshold_db: int = -50, workers: int = 2, profile: Optional[str] = None,
+                                      tempo: float = 1.0) -> List[str]:
+        """Async counterpart of optimize_parallel (the workers run in a thread pool)."""
+        return await asyncio.to_thread(
+            AudioProcessor.optimize_parallel, input_path, output_pattern, segment_time, max_size_mb, bitrate, threshold_db, workers, profile, tempo
+        )
+
+    @staticmethod
+    def _concat_list(input_path: str, segments: List[tuple]) -> str:
+        """An ffconcat script that plays only the given (start, end) ranges of input_path."""
+        quoted = os.path.abspath(input_path).replace("'", "'\\''")
+        lines = ["ffconcat version 1.0"]
+        for start, end in segments:
+            lines += [f"file '{quoted}'", f"inpoint {start:.3f}", f"outpoint {end:.3f}"]
+        return "\n".join(lines) + "\n"
+
+    @staticmethod
+    def _speech_command(list_path: str, output_path: str, bitrate: str, profile: Optional[str] = None, tempo: float = 1.0) -> List[str]:
+        encoder = AudioProcessor.encoding_profile(profile).encoder_args(bitrate) if profile else ["-b:a", bitrate]
+        tempo_filter = AudioProcessor._tempo_filter(tempo)
+        return [
+            "ffmpeg", "-y", "-threads", "1", "-f", "concat", "-safe", "0", "-i", list_path,
+            *(["-af", tempo_filter] if tempo_filter else []),
+            *encoder,
+            "-ac", "1",      # Mono
+            "-ar", "16000",  # 16kHz
+            output_path
+        ]
+
+    @staticmethod
+    def _encode_ranges(input_path: str, output_path: str, segments: List[tuple], bitrate: str, profile: Optional[str] = None,
+                       tempo: float = 1.0) -> str:
+        """Encodes just the given (start, end) ranges of input_path, back to back, into output_path."""
+        list_path = f"{output_path}.ffconcat"
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write(AudioProcessor._concat_list(input_path, segments))
+        try:
+            subprocess.run(AudioProcessor._speech_command(list_path, output_path, bitrate, profile, tempo), check=True, capture_output=True)
+        finally:
+            os.remove(list_path)
+        return output_path
+
+    @staticmethod
+    def excise(input_path: str, output_path: str, keep: List[tuple]) -> bool:
+        """
+        Writes output_path with only the keep ranges of input_path (e.g. everything but the music).
+        The ranges are stream-copied, so already encoded audio is not encoded a second time;
+        output_path must use input_path's container.
+        """
+        list_path = f"{output_path}.ffconcat"
+        with open(list_path, "w", encoding="utf-8") as f:
+            f.write(AudioProcessor._concat_list(input_path, keep))
+        try:
+            subprocess.run([
+                "ffmpeg", "-y", "-f", "concat", "-safe", "0", "-i", list_path,
+                "-map", "0:a", "-c", "copy",
+                output_path
+            ], check=True, capture_output=True)
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error while excising audio: {e.stderr.decode('utf-8', errors='replace')}")
+            return False
+        finally:
+            os.remove(list_path)
+        if os.path.splitext(output_path)[1].lower() == ".flac":
+            AudioProcessor._set_flac_length(output_path, sum(end - start for start, end in keep))
+        return True
+
+    @staticmethod
+    def optimize_speech(input_path: str, output_pattern: str, speech_map, segment_time: int = 1800, max_size_mb: float = 15,
+                        bitrate: str = "48k", workers: int = 2, profile: Optional[str] = None, tempo: float = 1.0) -> List[str]:
+        """
+        Encodes only the speech in a SpeechMap, as chunks holding at most one segment length
+        of speech each and cut in the pauses between segments. Chunks are encoded by separate
+        ffmpeg processes, up to workers at a time.
+        """
+        bitrate = AudioProcessor._profile_bitrate(profile, bitrate)
+        split_time = AudioProcessor.plan_segments(segment_time, max_size_mb, bitrate)
+        # The map is in input seconds; sped up, a chunk holds tempo times as much speech
+        planned = speech_map.plan_chunks(split_time * float(tempo))
+        print(f"      - Encoding {speech_map.speech_seconds:.0f}s of speech from {speech_map.duration:.0f}s of audio "
+              f"as {len(planned)} chunk(s) ({profile or bitrate}, {workers} worker(s))...")
+        AudioProcessor._remove_stale_chunks(output_pattern)
+
+        def encode(item):
+            index, segments = item
+            return AudioProcessor._encode_ranges(input_path, output_pattern % index, segments, bitrate, profile, tempo)
+
+        try:
+            with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+                return list(pool.map(encode, enumerate(planned)))
+        except subprocess.CalledProcessError as e:
+            print(f"      ❌ Error during speech encoding: {e.stderr.decode('utf-8', errors='replace')}")
+            return []
+
+    @staticmethod
+    async def optimize_speech_async(input_path: str, output_pattern: str, speech_map, segment_time: int = 1800, max_size_mb: float = 15,
+                                    bitrate: str = "48k", workers: int = 2, profile: Optional[str] = None, tempo: float = 1.0) -> List[str]:
+        """Async counterpart of optimize_speech (the workers run in a thread pool)."""
+        return await asyncio.to_thread(
+            AudioProcessor.optimize_speech, input_path, output_pattern, speech_map, segment_time, max_size_mb, bitrate, workers, profile, tempo
+        )
+
+    @staticmethod
+    def should_reencode(input_path: str, profile: Optional[str] = None, bitrate: str = "48k", threshold_db: int = -50,
+                        tempo: float = 1.0, min_saving: float = 0.1) -> bool:
         """
+        Whether the optimization pass pays for itself on input_path. It does not when the source
+        already is what the pass would produce (the profile's codec and container, mono, at most
+        16 kHz and no more than the target bitrate) and the silence the pass would remove is under
+        min_saving of the duration. Only the silence check decodes the file; nothing is encoded.
+        """
+        if float(tempo) != 1.0:
+            return True
+        spec = AudioProcessor.encoding_profile(profile or DEFAULT_ENCODING_PROFILE)
+        if os.path.splitext(input_path)[1].lower() != spec.extension:
+            return True
+        info = AudioProcessor.probe(input_path)
+        if info.codec != spec.codec_name or info.channels != 1 or not info.duration:
+            return True
+        # Ogg Opus always reports its 48 kHz decode rate, whatever it was encoded from
+        if spec.codec_name != "opus" and info.sample_rate > 16000:
+            return True
+        target_bps = AudioProcessor._bitrate_bps(AudioProcessor._profile_bitrate(profile, bitrate))
+        if not spec.lossless and not 0 < info.bitrate <= target_bps * 1.1:
+            return True
+        # silenceremove (stop_duration=1) drops what a silence lasts beyond its first second
+        silences = AudioProcessor.find_silences(input_path, 0.0, info.duration, threshold_db, min_silence=1.0)
+        removable = sum(max(0.0, end - start - 1.0) for start, end in silences)
+        if removable >= info.duration * min_saving:
+            return True
+        print(f"   - Source is already {spec.codec_name} mono {info.bitrate // 1000}k with {removable:.0f}s of removable silence; skipping re-encode.")
+        return False
+
+    @staticmethod
+    def benchmark_profiles(input_path: str, output_dir: str, profiles: Optional[List[str]] = None, threads: int = 0) -> List[dict]:
+        """
+        Encodes input_path once per profile (full optimization pass) and reports, per profile:
+        the output path, its size in bytes, the encode time and the encoded duration.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        results = []
+        for name in profiles or list(ENCODING_PROFILES):
+            profile = AudioProcessor.encoding_profile(name)
+            output_path = os.path.join(output_dir, f"{base_name}_{name}{profile.extension}")
+            started = time.perf_counter()
+            ok = AudioProcessor.optimize_audio(input_path, output_path, threads=threads, profile=name)
+            results.append({
+                "profile": name,
+                "path": output_path if ok else None,
+                "bytes": AudioProcessor.get_file_size(output_path) if ok else 0,
+                "encode_seconds": time.perf_counter() - started,
+                "duration": AudioProcessor.get_duration(output_path) if ok else 0.0,
+            })
+        return results
+
+    @staticmethod
+    def benchmark_tempos(input_path: str, output_dir: str, tempos: List[float], profile: Optional[str] = None,
+                         transcribe: Optional[Callable[[str], str]] = None, threads: int = 0) -> List[dict]:
+        """
+        Prepares input_path once per tempo and reports, per tempo: the output path, its duration and
+        the seconds saved against normal speed, its size in bytes, the base64 payload size it would be
+        sent as, and the encode time. With a transcribe callable (path -> text) each output is also
+        transcribed, adding the transcription time and the transcript.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        extension = AudioProcessor.encoding_profile(profile or DEFAULT_ENCODING_PROFILE).extension
+        results = []
+        for tempo in tempos:
+            output_path = os.path.join(output_dir, f"{base_name}_{float(tempo):g}x{extension}")
+            started = time.perf_counter()
+            ok = AudioProcessor.optimize_audio(input_path, output_path, threads=threads, profile=profile, tempo=tempo)
+            size = AudioProcessor.get_file_size(output_path) if ok else 0
+            result = {
+                "tempo": float(tempo),
+                "path": output_path if ok else None,
+                "duration": AudioProcessor.get_duration(output_path) if ok else 0.0,
+                "bytes": size,
+                "payload_bytes": 4 * -(-size // 3),
+                "encode_seconds": time.perf_counter() - started,
+            }
+            if ok and transcribe:
+                started = time.perf_counter()
+                result["transcript"] = transcribe(output_path)
+                result["transcribe_seconds"] = time.perf_counter() - started
+            results.append(result)
+        baseline = next((r["duration"] for r in results if r["tempo"] == 1.0 and r["path"]), None)
+        for result in results:
+            result["seconds_saved"] = baseline - result["duration"] if baseline is not None and result["path"] else None
+        return results
+
+    @staticmethod
+    def _resolve_output_pattern(input_path: str, output_dir: str, output_pattern: Optional[str]) -> str:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir, exist_ok=True)
 
         base_name = os.path.splitext(os.path.basename(input_path))[0]
         extension = os.path.splitext(input_path)[1] or ".mp3"
         
-        # 1. Splitting Logic
         if not output_pattern:
             output_pattern = os.path.join(output_dir, f"{base_name}_chunk_%03d{extension}")
+        return output_pattern
 
+    @staticmethod
+    def plan_chunking(input_path: str, duration: float, segment_time: int, max_size_mb: int) -> int:
+        """
+        Decides how to split an optimized file.
+        Returns the segment time (seconds) to split with, or 0 if the file can be used as a single chunk.
+        Prioritizes duration-based splitting (segment_time) as requested.
+        """
         # If duration-based splitting is requested (segment_time > 0)
         if segment_time > 0:
-            duration = AudioProcessor.get_duration(input_path)
             if duration > segment_time:
                 print(f"   - Input file duration ({duration:.1f}s) exceeds limit ({segment_time}s). Splitting...")
-                chunks = AudioProcessor.split_into_chunks(input_path, output_pattern, segment_time, threads=threads)
-                print(f"   - Split into {len(chunks)} chunks.")
-                return chunks
+                return segment_time
             else:
                 print(f"   - Input file duration is within limit ({segment_time}s).")
 
         # Fallback to size-based check if duration check passed or wasn't requested
         if AudioProcessor.is_under_limit(input_path, max_size_mb):
-            directory = os.path.dirname(output_pattern) or "."
-            # Determine the single output path
-            final_path = os.path.join(directory, os.path.basename(output_pattern).replace("%03d", "001"))
-            shutil.copy2(input_path, final_path)
-            return [final_path]
+            return 0
 
         print(f"   - Input file size exceeds limit ({max_size_mb} MB). Splitting (duration-based fallback)...")
         # Estimate segment time to fit in max_size_mb as a fallback
-        duration = AudioProcessor.get_duration(input_path)
         current_size_bytes = AudioProcessor.get_file_size(input_path)
         target_size_bytes = max_size_mb * 1024 * 1024
         
@@ -209,7 +970,144 @@ class AudioProcessor:
         if est_segment_time >= duration:
             est_segment_time = int(duration / 2)
         if est_segment_time < 1: est_segment_time = 1
-        
-        chunks = AudioProcessor.split_into_chunks(input_path, output_pattern, est_segment_time, threads=threads)
+        return est_segment_time
+
+    @staticmethod
+    def media_streams(file_path: str) -> List[dict]:
+        """Every stream ffprobe reports for the file (empty if it cannot be probed)."""
+        command = ["ffprobe", "-v", "error", "-print_format", "json", "-show_streams", file_path]
+        try:
+            result = subprocess.run(command, check=True, capture_output=True, text=True)
+        except (subprocess.CalledProcessError, FileNotFoundError):
+            return []
+        return json.loads(result.stdout or "{}").get("streams", [])
+
+    @staticmethod
+    def pick_speech_track(streams: List[dict]) -> int:
+        """
+        Position (among the audio streams) of the track most likely to hold the speech: one whose
+        title or handler names it as voice, else one not named as music or desktop audio, preferring
+        fewer channels (a mono microphone over stereo program audio), then the default track.
+        """
+        audio = [stream for stream in streams if stream.get("codec_type") == "audio"]
+
+        def score(item):
+            position, stream = item
+            tags = {key.lower(): str(value).lower() for key, value in stream.get("tags", {}).items()}
+            label = f"{tags.get('title', '')} {tags.get('handler_name', '')}"
+            return (
+                any(word in label for word in AudioProcessor.SPEECH_TRACK_WORDS),
+                not any(word in label for word in AudioProcessor.OTHER_TRACK_WORDS),
+                -int(stream.get("channels") or 2),
+                bool(stream.get("disposition", {}).get("default")),
+                -position,
+            )
+        return max(enumerate(audio), key=score)[0] if audio else 0
+
+    @staticmethod
+    def extract_audio(input_path: str, output_dir: str) -> Optional[str]:
+        """
+        Demuxes the speech track of a video into output_dir without decoding it (-vn -c:a copy),
+        so later passes read only the audio instead of the whole container. Returns the audio file,
+        or None if input_path has no video or audio stream, or the track could not be copied.
+        """
+        streams = AudioProcessor.media_streams(input_path)
+        audio = [stream for stream in streams if stream.get("codec_type") == "audio"]
+        has_video = any(
+            stream.get("codec_type") == "video" and not stream.get("disposition", {}).get("attached_pic")
+            for stream in streams
+        )
+        if not audio or not has_video:
+            return None
+        track = AudioProcessor.pick_speech_track(streams)
+        codec = audio[track].get("codec_name", "")
+        base_name = os.path.splitext(os.path.basename(input_path))[0]
+        # Matroska audio takes any codec, so it is the fallback when the natural container refuses the copy
+        for extension in dict.fromkeys([AudioProcessor.COPY_CONTAINERS.get(codec, ".mka"), ".mka"]):
+            output_path = os.path.join(output_dir, f"{base_name}{extension}")
+            if os.path.exists(output_path):
+                print(f"⏩ Extracted audio already exists: {output_path}")
+                return output_path
+            part_path = os.path.join(output_dir, f"{base_name}.part{extension}")
+            print(f"🎞️ Extracting audio track {track + 1} of {len(audio)} ({codec}) from video: {input_path}")
+            command = [
+                "ffmpeg", "-y", "-i", input_path,
+                "-map", f"0:a:{track}", "-vn", "-sn", "-dn", "-c:a", "copy",
+                part_path
+            ]
+            try:
+                subprocess.run(command, check=True, capture_output=True)
+            except subprocess.CalledProcessError as e:
+                print(f"⚠️ Could not copy the audio track into {extension}: {e.stderr.decode(errors='replace')[-200:]}")
+                if os.path.exists(part_path):
+                    os.remove(part_path)
+                continue
+            os.replace(part_path, output_path)
+            return output_path
+        return None
+
+    @staticmethod
+    def link_or_copy(source: str, destination: str) -> str:
+        """
+        Makes destination a hardlink to source, replacing any existing file, so no bytes are copied.
+        Falls back to a copy where links are impossible (another filesystem, or no link support).
+        """
+        if os.path.lexists(destination):
+            os.remove(destination)
+        try:
+            os.link(source, destination)
+        except OSError:
+            shutil.copy2(source, destination)
+        return destination
+
+    @staticmethod
+    def _single_chunk(input_path: str, output_pattern: str) -> List[str]:
+        directory = os.path.dirname(output_pattern) or "."
+        # Determine the single output path
+        final_path = os.path.join(directory, os.path.basename(output_pattern).replace("%03d", "001"))
+        AudioProcessor.link_or_copy(input_path, final_path)
+        return [final_path]
+
+    @staticmethod
+    def _needs_duration(input_path: str, segment_time: int, max_size_mb: int) -> bool:
+        return segment_time > 0 or not AudioProcessor.is_under_limit(input_path, max_size_mb)
+
+    @staticmethod
+    def process_for_transcription(input_path: str, segment_time: int = 1800, max_size_mb: int = 15, output_dir: str = "temp", threads: int = 0, output_pattern: str = None) -> List[str]:
+        """
+        Orchestrates the audio processing: splits if needed, at cut points planned from the packet
+        sizes (the estimated segment time is only used when packets cannot be listed).
+        Assumes the input is already optimized.
+        """
+        output_pattern = AudioProcessor._resolve_output_pattern(input_path, output_dir, output_pattern)
+
+        duration = 0.0
+        if AudioProcessor._needs_duration(input_path, segment_time, max_size_mb):
+            duration = AudioProcessor.get_duration(input_path)
+        split_time = AudioProcessor.plan_chunking(input_path, duration, segment_time, max_size_mb)
+        if not split_time:
+            return AudioProcessor._single_chunk(input_path, output_pattern)
+
+        chunks = AudioProcessor.split_at_packets(input_path, output_pattern, segment_time, max_size_mb, threads=threads)
+        if chunks is None:
+            chunks = AudioProcessor.split_into_chunks(input_path, output_pattern, split_time, threads=threads)
+        print(f"   - Split into {len(chunks)} chunks.")
+        return chunks
+
+    @staticmethod
+    async def process_for_transcription_async(input_path: str, segment_time: int = 1800, max_size_mb: int = 15, output_dir: str = "temp", threads: int = 0, output_pattern: str = None) -> List[str]:
+        """Async counterpart of process_for_transcription."""
+        output_pattern = AudioProcessor._resolve_output_pattern(input_path, output_dir, output_pattern)
+
+        duration = 0.0
+        if AudioProcessor._needs_duration(input_path, segment_time, max_size_mb):
+            duration = await AudioProcessor.get_duration_async(input_path)
+        split_time = AudioProcessor.plan_chunking(input_path, duration, segment_time, max_size_mb)
+        if not split_time:
+            return await asyncio.to_thread(AudioProcessor._single_chunk, input_path, output_pattern)
+
+        chunks = await AudioProcessor.split_at_packets_async(input_path, output_pattern, segment_time, max_size_mb, threads=threads)
+        if chunks is None:
+            chunks = await AudioProcessor.split_into_chunks_async(input_path, output_pattern, split_time, threads=threads)
         print(f"   - Split into {len(chunks)} chunks.")
         return chunks
@@ -0,0 +1,112 @@
+import os
+import json
+import hashlib
+from typing import Callable, List, Optional
+
+class ChunkManifest:
+    """
+    Per-job record of the audio chunks and their transcription state.
+
+    Each entry holds the chunk's path, size, duration, checksum and state. A finished chunk's
+    text goes to its own part file, so chunks may complete in any order and a resumed job
+    knows exactly which ones are left. The transcript is assembled from the parts at the end.
+    """
+    PENDING = "pending"
+    DONE = "done"
+    # Read size used when hashing chunks
+    HASH_BLOCK_SIZE = 1024 * 1024
+
+    def __init__(self, path: str, chunks: Optional[List[dict]] = None):
+        self.path = path
+        self.chunks = chunks or []
+
+    @staticmethod
+    def path_for(temp_dir: str, job_id) -> str:
+        return os.path.join(temp_dir, f"job_{job_id}_manifest.json")
+
+    @staticmethod
+    def checksum(file_path: str) -> str:
+        """SHA-256 of the file contents, read in blocks."""
+        digest = hashlib.sha256()
+        with open(file_path, "rb") as f:
+            for block in iter(lambda: f.read(ChunkManifest.HASH_BLOCK_SIZE), b""):
+                digest.update(block)
+        return digest.hexdigest()
+
+    @classmethod
+    def create(cls, path: str, chunk_paths: List[str], duration_of: Optional[Callable[[str], float]] = None) -> "ChunkManifest":
+        """Describes the given chunk files (in order) and saves a new manifest with every chunk pending."""
+        base = os.path.splitext(path)[0]
+        chunks = []
+        for index, chunk_path in enumerate(chunk_paths, start=1):
+            duration = duration_of(chunk_path) if duration_of else None
+            chunks.append({
+                "index": index,
+                "path": chunk_path,
+                "size": os.path.getsize(chunk_path),
+                "duration": float(duration) if duration is not None else None,
+                "checksum": cls.checksum(chunk_path),
+                "state": cls.PENDING,
+                "part": f"{base}_part_{index:03d}.txt",
+            })
+        manifest = cls(path, chunks)
+        manifest.save()
+        return manifest
+
+    @classmethod
+    def load(cls, path: str) -> Optional["ChunkManifest"]:
+        """Returns the saved manifest, or None if there is none (or it is unreadable)."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(path, data.get("chunks", []))
+
+    def save(self):
+        # Write-then-rename, so an interruption never leaves a truncated manifest behind
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"chunks": self.chunks}, f, indent=2)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def paths(self) -> List[str]:
+        return [chunk["path"] for chunk in self.chunks]
+
+    def entry(self, index: int) -> dict:
+        return self.chunks[index - 1]
+
+    def pending(self) -> List[dict]:
+        """Entries still to transcribe. A done chunk whose part file went missing counts as pending."""
+        return [
+            chunk for chunk in self.chunks
+            if chunk["state"] != self.DONE or not os.path.exists(chunk["part"])
+        ]
+
+    def is_complete(self) -> bool:
+        return bool(self.chunks) and not self.pending()
+
+    def mark_done(self, index: int, text: str):
+        """Writes the chunk's transcript part, then records the chunk as done."""
+        chunk = self.entry(index)
+        tmp_path = f"{chunk['part']}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, chunk["part"])
+        chunk["state"] = self.DONE
+        self.save()
+
+    def assemble(self, transcript_path: str):
+        """Concatenates the part files in chunk order into the transcript."""
+        tmp_path = f"{transcript_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for chunk in self.chunks:
+                with open(chunk["part"], "r", encoding="utf-8") as f:
+                    out.write(f.read())
+                out.write("\n\n")
+        os.replace(tmp_path, transcript_path)
+
+    def files(self) -> List[str]:
+        """The manifest and its part files (not the chunks), for cleanup."""
+        return [self.path] + [chunk["part"] for chunk in self.chunks]
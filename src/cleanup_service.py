@@ -28,70 +28,93 @@ class FileCleanupService:
                 except Exception as e:
                     print(f"Cleanup: Failed to delete {path}: {e}")
 
+    @staticmethod
+    def cleanup_scratch_dir(job, temp_dir="temp") -> bool:
+        """Removes the job's registered scratch directory with a single rmtree."""
+        scratch_dir = job.get("scratch_dir")
+        # Never the shared temp root itself
+        if not scratch_dir or os.path.abspath(scratch_dir) == os.path.abspath(temp_dir):
+            return False
+        try:
+            shutil.rmtree(scratch_dir)
+            print(f"Cleanup: Deleted {scratch_dir}")
+            return True
+        except FileNotFoundError:
+            return False
+        except Exception as e:
+            print(f"Cleanup: Failed to delete {scratch_dir}: {e}")
+            return False
+
+    @staticmethod
+    def _purge_entries(directory, should_delete, label):
+        """Deletes the entries of directory selected by should_delete(name), in one scandir pass."""
+        if not os.path.exists(directory):
+            return
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if not should_delete(entry.name):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False): shutil.rmtree(entry.path)
+                    else: os.remove(entry.path)
+                    print(f"{label}: Deleted {entry.path}")
+                except: pass
+
+    @staticmethod
+    def _download_stem(name) -> str:
+        """Strips .part/.ytdl and the media extension: "Lecture_1.mp3.part" -> "Lecture_1"."""
+        for suffix in (".part", ".ytdl"):
+            if name.endswith(suffix):
+                name = name[:-len(suffix)]
+        return os.path.splitext(name)[0]
+
     @staticmethod
     def cleanup_all_temp_files(temp_dir="temp", downloads_dir="downloads", uploads_dir="uploads", jobs_to_purge=None, include_uploads=False):
         """
         Manually cleans up intermediate files.
-        If jobs_to_purge is provided, only files related to those specific jobs are removed.
+        If jobs_to_purge is provided, only files related to those specific jobs are removed:
+        each job's scratch directory, plus one scandir of temp and downloads for files that
+        match the jobs exactly (downloads and older flat temp/ files).
         Otherwise, everything in the directories is removed (except .gitkeep).
         """
         if jobs_to_purge is not None:
             # Targeted cleanup: Purge EVERYTHING for these specific jobs
             print(f"🧹 Purging all intermediate files for {len(jobs_to_purge)} jobs...")
+            from src.downloader import get_expected_audio_path
+            legacy_prefixes = []
+            legacy_names = set()
+            safe_names = set()
             for job in jobs_to_purge:
+                # 1. Scratch directory (chunks, manifest and transcript)
+                FileCleanupService.cleanup_scratch_dir(job, temp_dir)
+
+                # Files jobs left directly in temp/ before they had scratch directories
                 safe_name = job['name'].replace(" ", "_").replace("/", "-")
-                # 1. Temp directory (chunks and transcripts)
-                if os.path.exists(temp_dir):
-                    for f in os.listdir(temp_dir):
-                        if f.startswith(f"job_{job['id']}_") or f.startswith(f"{job['id']}_") or f.startswith(safe_name):
-                            path = os.path.join(temp_dir, f)
-                            try:
-                                if os.path.isfile(path): os.remove(path)
-                                elif os.path.isdir(path): shutil.rmtree(path)
-                                print(f"Targeted Cleanup: Deleted {path}")
-                            except: pass
-                
-                # 2. Downloads directory (main audio and partials)
-                from src.downloader import get_expected_audio_path
+                legacy_prefixes.extend([f"job_{job['id']}_", f"{job['id']}_"])
+                legacy_names.update([f"{safe_name}_transcript.txt", f"{safe_name}_prepared.mp3"])
+                safe_names.add(safe_name)
+
+                # 2. Downloads directory (main audio)
                 audio_path = get_expected_audio_path(job)
                 if os.path.exists(audio_path):
                     try:
                         os.remove(audio_path)
                         print(f"Targeted Cleanup: Deleted {audio_path}")
                     except: pass
-                
-                if os.path.exists(downloads_dir):
-                    safe_name = job['name'].replace(" ", "_").replace("/", "-")
-                    for f in os.listdir(downloads_dir):
-                        if f.startswith(safe_name) and any(f.endswith(ext) for ext in [".part", ".ytdl", ".mp3"]):
-                            path = os.path.join(downloads_dir, f)
-                            try:
-                                os.remove(path)
-                                print(f"Targeted Cleanup: Deleted {path}")
-                            except: pass
+
+            legacy_prefixes = tuple(legacy_prefixes)
+            FileCleanupService._purge_entries(
+                temp_dir, lambda name: name in legacy_names or name.startswith(legacy_prefixes), "Targeted Cleanup")
+            # Partial downloads; names must match a job exactly, so "Lecture_1" never takes "Lecture_10"
+            FileCleanupService._purge_entries(
+                downloads_dir,
+                lambda name: name.endswith((".part", ".ytdl", ".mp3")) and FileCleanupService._download_stem(name) in safe_names,
+                "Targeted Cleanup")
         else:
             # Option 1: Purge Everything regardless of status
             print("🧹 Purging EVERYTHING in temp and downloads...")
-            
-            if os.path.exists(temp_dir):
-                for f in os.listdir(temp_dir):
-                    if f == ".gitkeep": continue
-                    path = os.path.join(temp_dir, f)
-                    try:
-                        if os.path.isfile(path): os.remove(path)
-                        elif os.path.isdir(path): shutil.rmtree(path)
-                        print(f"Full Cleanup: Deleted {path}")
-                    except: pass
-
-            if os.path.exists(downloads_dir):
-                for f in os.listdir(downloads_dir):
-                    if f == ".gitkeep" or f == "temp": continue
-                    path = os.path.join(downloads_dir, f)
-                    try:
-                        if os.path.isfile(path): os.remove(path)
-                        elif os.path.isdir(path): shutil.rmtree(path)
-                        print(f"Full Cleanup: Deleted {path}")
-                    except: pass
+            FileCleanupService._purge_entries(temp_dir, lambda name: name != ".gitkeep", "Full Cleanup")
+            FileCleanupService._purge_entries(downloads_dir, lambda name: name not in (".gitkeep", "temp"), "Full Cleanup")
             
             if include_uploads:
                 FileCleanupService.cleanup_uploads(uploads_dir)
@@ -10,9 +10,54 @@ class ConfigManager:
         "api_timeout": 300,
         "api_max_retries": 3,
         "api_retry_delay": 10,
+        "api_stream_idle_timeout": 30,
         "notion_integration_enabled": False,
         "rclone_integration_enabled": False,
-        "max_chunk_size_mb": 15
+        "max_chunk_size_mb": 15,
+        "max_concurrent_jobs": 0,
+        "pipeline_mode": "jobs",
+        "stage_workers": {
+            "download": 2,
+            "audio": 1,
+            "transcribe": 2,
+            "notes": 1
+        },
+        "stage_queue_size": 2,
+        "max_inflight_chunks": 0,
+        "rate_limit_rpm": 60,
+        "rate_limit_min_rpm": 2,
+        "rate_limit_max_rpm": 120,
+        "account_cooldown": 30,
+        "account_cooldown_max": 300,
+        "token_refresh_margin": 300,
+        "token_refresh_interval": 60,
+        "job_lease_seconds": 600,
+        "job_heartbeat_interval": 60,
+        "http2_enabled": True,
+        "http_max_connections": 20,
+        "http_max_keepalive": 10,
+        "http_keepalive_expiry": 60,
+        "transcript_cache_enabled": True,
+        "transcript_cache_max_mb": 200,
+        "audio_prep_mode": "separate",
+        "audio_profile": "mp3-48k",
+        "audio_tempo": 1.0,
+        "passthrough_enabled": True,
+        "passthrough_min_saving": 0.1,
+        "extract_video_audio": True,
+        "prep_workers": 0,
+        "vad_margin_db": 12,
+        "vad_min_silence": 0.6,
+        "vad_padding": 0.2,
+        "non_speech_filter_enabled": False,
+        "non_speech_min_region": 10
+    }
+
+    # Concurrent jobs per performance profile when max_concurrent_jobs is 0 (auto)
+    PROFILE_CONCURRENCY = {
+        "low": 1,
+        "balanced": 2,
+        "high": 4
     }
 
     def __init__(self, config_file: str = "config.json"):
@@ -46,6 +91,42 @@ class ConfigManager:
             return "balanced"
         return "low"
 
+    def get_max_concurrent_jobs(self) -> int:
+        """Returns how many jobs may run at once, falling back to the performance profile."""
+        try:
+            configured = int(self.get("max_concurrent_jobs") or 0)
+        except (TypeError, ValueError):
+            configured = 0
+        if configured > 0:
+            return configured
+        return self.PROFILE_CONCURRENCY.get(self.get("performance_profile"), 1)
+
+    def get_prep_workers(self) -> int:
+        """
+        Returns how many ffmpeg processes one job's parallel audio prep may run. When prep_workers
+        is 0 (auto), the cores are shared between the preps that can run at once.
+        """
+        try:
+            configured = int(self.get("prep_workers") or 0)
+        except (TypeError, ValueError):
+            configured = 0
+        if configured > 0:
+            return configured
+        if self.get("pipeline_mode") == "staged":
+            concurrent = self.get_stage_workers().get("audio", 1)
+        else:
+            concurrent = self.get_max_concurrent_jobs()
+        cores, _ = self.detect_system_resources()
+        return max(1, cores // max(1, concurrent))
+
+    def get_stage_workers(self) -> Dict[str, int]:
+        """Returns the worker count per pipeline stage, filling in defaults for missing stages."""
+        workers = dict(self.DEFAULT_CONFIG["stage_workers"])
+        configured = self.get("stage_workers")
+        if isinstance(configured, dict):
+            workers.update(configured)
+        return workers
+
     def load_config(self) -> Dict[str, Any]:
         if not os.path.exists(self.config_file):
             return self.DEFAULT_CONFIG.copy()
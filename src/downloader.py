@@ -1,4 +1,5 @@
 import os
+import asyncio
 import subprocess
 import shlex
 import sys
@@ -45,26 +46,60 @@ def run_command(cmd_args: List[str]):
         raise Exception(process.stderr)
     return process.stdout.strip()
 
+async def run_command_async(cmd_args: List[str]):
+    """Runs a command as an asyncio subprocess without blocking the event loop."""
+    print(f"Executing: {' '.join(shlex.quote(arg) for arg in cmd_args)}")
+    process = await asyncio.create_subprocess_exec(
+        *cmd_args, stdout=asyncio.subprocess.PIPE, stderr=asyncio.subprocess.PIPE
+    )
+    stdout, stderr = await process.communicate()
+    if process.returncode != 0:
+        error = stderr.decode("utf-8", errors="replace")
+        print(f"❌ Error: {error}")
+        raise Exception(error)
+    return stdout.decode("utf-8", errors="replace").strip()
+
 def get_expected_audio_path(job):
     name = job['name']
     safe_name = name.replace(" ", "_").replace("/", "-")
     return os.path.join(DOWNLOAD_DIR, f"{safe_name}.mp3")
 
-def download_audio(job):
+def get_download_mode(url: str) -> str:
+    """Maps a URL to the download strategy used for it."""
+    if any(x in url for x in ["facebook.com", "fb.watch"]):
+        return "facebook"
+    if any(x in url for x in ["youtube.com", "youtu.be", "youtube-nocookie.com"]):
+        return "youtube"
+    if "mediadelivery.net" in url:
+        return "mediadelivery"
+    if "player.vimeo.com" in url:
+        return "vimeo"
+    if "edgecoursebd" in url:
+        return "edgecoursebd"
+    return "fallback"
+
+def build_scraper_command(url: str, cookie_file=None, ua=None) -> List[str]:
+    """Builds the link extractor command that resolves EdgeCourseBD pages to Vimeo URLs."""
+    script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "link_extractor.py")
+    scraper_cmd = [sys.executable, script_path, "--url", url]
+    if cookie_file:
+        scraper_cmd.extend(["--cookies", cookie_file])
+    if ua:
+        scraper_cmd.extend(["--user-agent", ua])
+    return scraper_cmd
+
+def build_download_command(job, mode: str, ua=None, cookie_file=None, resolved_url=None) -> List[str]:
+    """
+    Builds the yt-dlp command for a job.
+    resolved_url is the media URL found by the scraper (EdgeCourseBD only).
+    """
     url = job['url']
     name = job['name']
     
-    config = ConfigManager()
-    ua = config.get("user_agent")
-    
     # Clean filename
     safe_name = name.replace(" ", "_").replace("/", "-")
     filename_tmpl = f"{safe_name}.%(ext)s"
     
-    cookie_file = get_cookie_path()
-
-    print(f"\n⬇️  Starting Download: {name}")
-    
     # Base command as a list
     # Use sys.executable -m yt_dlp to ensure we use the venv's version
     base_cmd = [sys.executable, "-m", "yt_dlp"]
@@ -83,45 +118,37 @@ def download_audio(job):
     if cookie_file:
         common_args.extend(["--cookies", cookie_file])
 
-    match_found = False
-    
     # 1. FACEBOOK
-    if any(x in url for x in ["facebook.com", "fb.watch"]):
+    if mode == "facebook":
         print(">> Mode: Facebook")
-        cmd = base_cmd + ["-N", "16", "--no-part", "--no-keep-fragments"] + common_args + [
+        return base_cmd + ["-N", "16", "--no-part", "--no-keep-fragments"] + common_args + [
             "-x", "--audio-format", "mp3", url
         ]
-        run_command(cmd)
-        match_found = True
 
     # 2. YOUTUBE
-    elif any(x in url for x in ["youtube.com", "youtu.be", "youtube-nocookie.com"]):
+    if mode == "youtube":
         print(">> Mode: YouTube")
-        cmd = base_cmd + ["-N", "4"] + common_args + [
+        return base_cmd + ["-N", "4"] + common_args + [
             "--extract-audio", "--audio-format", "mp3", "--audio-quality", "0", # 0 is best
             "--continue",
             "--add-header", "Referer: https://www.youtube.com/",
             "--add-header", f"User-Agent: {ua}",
             url
         ]
-        run_command(cmd)
-        match_found = True
 
     # 3. MEDIADELIVERY (Apar's Classroom)
-    elif "mediadelivery.net" in url:
+    if mode == "mediadelivery":
         print(">> Mode: MediaDelivery")
-        cmd = base_cmd + ["-N", "16", "--no-part", "--no-keep-fragments", "--no-playlist"] + common_args + [
+        return base_cmd + ["-N", "16", "--no-part", "--no-keep-fragments", "--no-playlist"] + common_args + [
             "-x", "--audio-format", "mp3",
             "--add-header", "Referer: https://academic.aparsclassroom.com/",
             "--add-header", "Origin: https://academic.aparsclassroom.com",
             "--add-header", f"User-Agent: {ua}",
             url
         ]
-        run_command(cmd)
-        match_found = True
 
     # 4. Vimeo (EdgeCourseBD vimeo_url directly)
-    elif "player.vimeo.com" in url:
+    if mode == "vimeo":
         print(">> Mode: Vimeo Url (Direct)")
         # SPEC: Disable cookies for direct Vimeo URLs and use vimeo.com headers
         cmd = base_cmd + ["-N", "16", "--no-part", "--no-keep-fragments", "--no-playlist"] + common_args + [
@@ -137,51 +164,89 @@ def download_audio(job):
             idx = cmd.index("--cookies")
             cmd.pop(idx) # remove --cookies
             cmd.pop(idx) # remove the cookie file path
-            
-        run_command(cmd)
-        match_found = True
-
+        return cmd
 
     # 5. EDGECOURSEBD
-    elif "edgecoursebd" in url:
+    if mode == "edgecoursebd":
+        return base_cmd + ["-N", "16", "--no-part", "--no-keep-fragments", "--downloader", "ffmpeg", "--hls-use-mpegts", "--referer", url] + common_args + [
+            "-x", "--audio-format", "mp3", resolved_url
+        ]
+
+    # 6. FALLBACK
+    print(">> Mode: Default/Fallback")
+    return base_cmd + ["-N", "16"] + common_args + [
+        "--extract-audio", "--audio-format", "mp3", "--audio-quality", "5",
+        "--continue",
+        "--add-header", "Referer: https://www.youtube.com/",
+        "--add-header", f"User-Agent: {ua}",
+        url
+    ]
+
+def download_audio(job):
+    url = job['url']
+    name = job['name']
+    
+    config = ConfigManager()
+    ua = config.get("user_agent")
+    cookie_file = get_cookie_path()
+    mode = get_download_mode(url)
+
+    print(f"\n⬇️  Starting Download: {name}")
+
+    resolved_url = None
+    if mode == "edgecoursebd":
         print(">> Mode: EdgeCourseBD (Running Scraper...)")
-        
-        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "link_extractor.py")
-        scraper_cmd = [sys.executable, script_path, "--url", url]
-        if cookie_file:
-            scraper_cmd.extend(["--cookies", cookie_file])
-        if ua:
-            scraper_cmd.extend(["--user-agent", ua])
-            
         try:
-            vimeo_url = run_command(scraper_cmd)
-            print(f"   Found Vimeo URL: {vimeo_url}")
-            
-            cmd = base_cmd + ["-N", "16", "--no-part", "--no-keep-fragments", "--downloader", "ffmpeg", "--hls-use-mpegts", "--referer", url] + common_args + [
-                "-x", "--audio-format", "mp3", vimeo_url
-            ]
-            run_command(cmd)
-            match_found = True
+            resolved_url = run_command(build_scraper_command(url, cookie_file, ua))
+            print(f"   Found Vimeo URL: {resolved_url}")
+            run_command(build_download_command(job, mode, ua, cookie_file, resolved_url))
         except Exception as e:
             print(f"❌ Scraper failed: {e}")
             raise e
+    else:
+        try:
+            run_command(build_download_command(job, mode, ua, cookie_file))
+        except Exception as e:
+            if mode == "fallback":
+                print(f"❌ Fallback download failed: {e}")
+            raise e
+    
+    return _finish_download(name)
 
-    # 6. FALLBACK
-    if not match_found:
-        print(">> Mode: Default/Fallback")
-        cmd = base_cmd + ["-N", "16"] + common_args + [
-            "--extract-audio", "--audio-format", "mp3", "--audio-quality", "5",
-            "--continue",
-            "--add-header", "Referer: https://www.youtube.com/",
-            "--add-header", f"User-Agent: {ua}",
-            url
-        ]
+async def download_audio_async(job):
+    """Async counterpart of download_audio that runs yt-dlp as an asyncio subprocess."""
+    url = job['url']
+    name = job['name']
+    
+    config = ConfigManager()
+    ua = config.get("user_agent")
+    cookie_file = get_cookie_path()
+    mode = get_download_mode(url)
+
+    print(f"\n⬇️  Starting Download: {name}")
+
+    resolved_url = None
+    if mode == "edgecoursebd":
+        print(">> Mode: EdgeCourseBD (Running Scraper...)")
         try:
-            run_command(cmd)
+            resolved_url = await run_command_async(build_scraper_command(url, cookie_file, ua))
+            print(f"   Found Vimeo URL: {resolved_url}")
+            await run_command_async(build_download_command(job, mode, ua, cookie_file, resolved_url))
         except Exception as e:
-            print(f"❌ Fallback download failed: {e}")
+            print(f"❌ Scraper failed: {e}")
+            raise e
+    else:
+        try:
+            await run_command_async(build_download_command(job, mode, ua, cookie_file))
+        except Exception as e:
+            if mode == "fallback":
+                print(f"❌ Fallback download failed: {e}")
             raise e
     
+    return _finish_download(name)
+
+def _finish_download(name):
+    safe_name = name.replace(" ", "_").replace("/", "-")
     final_output = f"{DOWNLOAD_DIR}/{safe_name}.mp3"
     print(f"✅ Download Complete: {final_output}")
     return final_output
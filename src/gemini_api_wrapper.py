@@ -4,13 +4,19 @@ import logging
 import json
 import os
 import asyncio
+import threading
+import importlib.util
 from typing import Optional, List, Dict, Any
 from src.gemini_auth_service import GeminiAuthService, GeminiCliAuthRecord
 from src.usage_tracker import UsageTracker
-from src.audio_processor import AudioProcessor
+from src.rate_limiter import AdaptiveRateLimiter
+from src.request_body import AudioPayload, StreamingJSONBody
 
 logger = logging.getLogger(__name__)
 
+class GeminiAPIError(Exception):
+    """An error response from Gemini that was already logged and counted against the account."""
+
 class BackoffManager:
     """Manages exponential backoff for API retries and delays."""
     def __init__(self, initial_delay: float = 10.0, max_delay: float = 60.0, factor: float = 2.0):
@@ -56,13 +62,157 @@ class GeminiAPIWrapper:
         self.api_timeout = self.config.get("api_timeout", 300)
         self.api_max_retries = self.config.get("api_max_retries", 3)
         self.api_retry_delay = self.config.get("api_retry_delay", 10)
+        self.stream_idle_timeout = float(self.config.get("api_stream_idle_timeout", 30))
         
         self.backoff_manager = BackoffManager(
             initial_delay=float(self.api_retry_delay),
             max_delay=float(self.config.get("api_max_delay", 60.0))
         )
         
+        # Paces requests per (account, model); replaces fixed sleeps between calls
+        self.rate_limiter = AdaptiveRateLimiter.from_config(self.config)
+
         self.error_file = "error.json"
+        self._error_lock = threading.Lock()
+
+        # Long-lived HTTP clients, one per event loop (httpx clients are bound to the loop they run on)
+        self._clients: Dict[asyncio.AbstractEventLoop, httpx.AsyncClient] = {}
+        self._client_lock = threading.Lock()
+        # Event loop thread that serves the synchronous wrappers, so they share one client
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[threading.Thread] = None
+        scheduler = self.auth_service.scheduler
+        scheduler.cooldown = float(self.config.get("account_cooldown", 30))
+        scheduler.max_cooldown = float(self.config.get("account_cooldown_max", 300))
+        self.auth_service.refresh_margin = float(self.config.get("token_refresh_margin", 300))
+        self._refresher = None
+        # Token refreshes and project discovery reuse the same pooled connections
+        self.auth_service.http_client_provider = self.get_http_client
+
+    def _create_http_client(self) -> httpx.AsyncClient:
+        """Builds a keep-alive client using the http_* pool settings from config."""
+        http2 = bool(self.config.get("http2_enabled", True))
+        if http2 and importlib.util.find_spec("h2") is None:
+            logger.debug("h2 is not installed; falling back to HTTP/1.1 keep-alive")
+            http2 = False
+        limits = httpx.Limits(
+            max_connections=int(self.config.get("http_max_connections", 20)),
+            max_keepalive_connections=int(self.config.get("http_max_keepalive", 10)),
+            keepalive_expiry=float(self.config.get("http_keepalive_expiry", 60)),
+        )
+        return httpx.AsyncClient(timeout=self.api_timeout, limits=limits, http2=http2)
+
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Returns the shared client for the running event loop, creating it on first use."""
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._clients.get(loop)
+            if client is None or client.is_closed is True:
+                # Forget clients of loops that have since been closed
+                for old_loop in [l for l in self._clients if l.is_closed()]:
+                    del self._clients[old_loop]
+                client = self._clients[loop] = self._create_http_client()
+        return client
+
+    def _background_loop(self) -> asyncio.AbstractEventLoop:
+        """Returns the wrapper's background event loop, starting its thread on first use."""
+        with self._client_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._loop_thread = threading.Thread(target=self._loop.run_forever, name="zaknotes-gemini-http", daemon=True)
+                self._loop_thread.start()
+            return self._loop
+
+    def _run_sync(self, coro):
+        """Runs a coroutine on the wrapper's background loop and blocks until it finishes."""
+        return asyncio.run_coroutine_threadsafe(coro, self._background_loop()).result()
+
+    def validate_accounts(self) -> Dict[str, Optional[Exception]]:
+        """Refreshes every account whose token is expired or about to expire, all concurrently."""
+        return self._run_sync(self.auth_service.refresh_accounts())
+
+    def start_token_refresher(self):
+        """Starts renewing tokens ahead of expiry on the background loop, off the request path."""
+        if self._refresher is None or self._refresher.done():
+            interval = float(self.config.get("token_refresh_interval", 60))
+            self._refresher = asyncio.run_coroutine_threadsafe(self.auth_service.run_refresher(interval), self._background_loop())
+
+    async def aclose(self):
+        """Closes the shared client of the running event loop."""
+        loop = asyncio.get_running_loop()
+        with self._client_lock:
+            client = self._clients.pop(loop, None)
+        if client is not None:
+            await client.aclose()
+
+    def close(self):
+        """Closes the background loop's client and stops its thread. Safe to call more than once."""
+        if self._refresher is not None:
+            self._refresher.cancel()
+            self._refresher = None
+        with self._client_lock:
+            loop, thread = self._loop, self._loop_thread
+            self._loop = self._loop_thread = None
+        if loop is not None:
+            asyncio.run_coroutine_threadsafe(self.aclose(), loop).result()
+            loop.call_soon_threadsafe(loop.stop)
+            thread.join()
+            loop.close()
+
+    async def _next_account(self):
+        """
+        Returns the healthiest available account. When every account is cooling down after
+        a 429, waits for the first one to come back; returns None if none are configured.
+        """
+        while True:
+            record = self.auth_service.get_next_account()
+            if record:
+                return record
+            wait = self.auth_service.scheduler.seconds_until_available()
+            if wait is None:
+                return None
+            logger.warning(f"All Gemini accounts are cooling down. Waiting {wait:.0f}s...")
+            await asyncio.sleep(wait)
+
+    def available_account_count(self) -> int:
+        """Returns how many configured accounts are currently usable (at least 1)."""
+        return len([acc for acc in self.auth_service.accounts if acc.get("status") == "valid"]) or 1
+
+    async def _read_sse_text(self, resp: httpx.Response) -> str:
+        """
+        Parses SSE events as they arrive and returns the concatenated text parts.
+        Once the first event is in, a gap longer than stream_idle_timeout aborts the stream.
+        """
+        text_parts: List[str] = []
+        lines = resp.aiter_lines()
+        idle_timeout = None # The first event may take as long as the model needs to start
+        while True:
+            try:
+                line = await asyncio.wait_for(anext(lines), timeout=idle_timeout)
+            except StopAsyncIteration:
+                break
+            except TimeoutError:
+                raise httpx.ReadTimeout(f"Gemini stream idle for more than {idle_timeout}s")
+
+            # Ensure line is a string for startswith and slicing
+            if isinstance(line, bytes):
+                line = line.decode('utf-8')
+
+            if line.startswith("data:"):
+                idle_timeout = self.stream_idle_timeout
+                json_str = line[5:].strip()
+                if not json_str: continue
+                try:
+                    chunk = json.loads(json_str)
+                    candidates = chunk.get("response", {}).get("candidates", [])
+                    if candidates:
+                        parts_resp = candidates[0].get("content", {}).get("parts", [])
+                        for p in parts_resp:
+                            if "text" in p:
+                                text_parts.append(p["text"])
+                except Exception:
+                    continue
+        return "".join(text_parts)
 
     def _log_error(self, request_body: Any, response_data: Any):
         """Logs the full request and response to error.json with truncation for large data."""
@@ -84,174 +234,192 @@ class GeminiAPIWrapper:
             "response": response_data
         }
         
-        errors = []
-        if os.path.exists(self.error_file):
-            try:
-                with open(self.error_file, 'r') as f:
-                    errors = json.load(f)
-                    if not isinstance(errors, list):
-                        errors = []
-            except Exception:
-                errors = []
-        
-        errors.append(error_entry)
-        # Keep last 50 errors to avoid massive file
-        errors = errors[-50:]
-        
-        with open(self.error_file, 'w') as f:
-            json.dump(errors, f, indent=4)
+        with self._error_lock:
+            errors = []
+            if os.path.exists(self.error_file):
+                try:
+                    with open(self.error_file, 'r') as f:
+                        errors = json.load(f)
+                        if not isinstance(errors, list):
+                            errors = []
+                except Exception:
+                    errors = []
+            
+            errors.append(error_entry)
+            # Keep last 50 errors to avoid massive file
+            errors = errors[-50:]
+            
+            with open(self.error_file, 'w') as f:
+                json.dump(errors, f, indent=4)
 
-    async def generate_content_async(self, prompt: str, audio_base64: Optional[str] = None, model_type: str = "note", system_instruction: Optional[str] = None) -> str:
+    def model_name(self, model_type: str = "note") -> str:
+        """The configured Gemini model for a request type ('note' or 'transcription')."""
         # Map 'note' to 'note_generation' to match config key
         config_prefix = "note_generation" if model_type == "note" else model_type
-        model_name = self.config.get(f"{config_prefix}_model") or "gemini-2.0-flash"
+        return self.config.get(f"{config_prefix}_model") or "gemini-2.0-flash"
+
+    async def generate_content_async(self, prompt: str, audio_base64: Optional[str] = None, model_type: str = "note", system_instruction: Optional[str] = None, audio_payload: Optional[AudioPayload] = None) -> str:
+        model_name = self.model_name(model_type)
         
         max_accounts_to_try = len(self.auth_service.accounts) or 1
         accounts_tried = 0
         
         while accounts_tried < max_accounts_to_try:
             accounts_tried += 1
-            auth_record = self.auth_service.get_next_account()
+            auth_record = await self._next_account()
             if not auth_record:
                 raise Exception("No Gemini CLI accounts configured. Please add an account first.")
-            
-            # Ensure token is valid
+
+            picked = auth_record
             try:
-                auth_record = await self.auth_service.get_valid_account(auth_record)
-            except Exception as e:
-                logger.error(f"Failed to refresh token for {auth_record.get('email')}: {e}")
-                continue # Try next account
-
-            # Prepare parts
-            parts = []
-            if audio_base64:
-                parts.append({"inline_data": {"mime_type": "audio/mp3", "data": audio_base64}})
-            parts.append({"text": prompt})
-
-            request_id = f"pi-{int(time.time()*1000)}-{os.urandom(4).hex()}"
-            request_body = {
-                "project": auth_record["projectId"],
-                "model": model_name,
-                "request": {
-                    "contents": [
-                        {
-                            "role": "user",
-                            "parts": parts,
-                        },
-                    ],
-                },
-                "userAgent": "pi-cli-standalone",
-                "requestId": request_id,
-            }
-
-            # Add systemInstruction inside 'request' with camelCase
-            if system_instruction:
-                request_body["request"]["systemInstruction"] = {
-                    "parts": [{"text": system_instruction}]
+                # Ensure token is valid
+                try:
+                    auth_record = await self.auth_service.get_valid_account(auth_record)
+                except Exception as e:
+                    logger.error(f"Failed to refresh token for {auth_record.get('email')}: {e}")
+                    continue # Try next account
+
+                # Prepare parts
+                parts = []
+                if audio_payload:
+                    # Filled in from the file while the request is sent
+                    parts.append({"inline_data": {"mime_type": audio_payload.mime_type, "data": StreamingJSONBody.PLACEHOLDER}})
+                elif audio_base64:
+                    parts.append({"inline_data": {"mime_type": "audio/mp3", "data": audio_base64}})
+                parts.append({"text": prompt})
+
+                request_id = f"pi-{int(time.time()*1000)}-{os.urandom(4).hex()}"
+                request_body = {
+                    "project": auth_record["projectId"],
+                    "model": model_name,
+                    "request": {
+                        "contents": [
+                            {
+                                "role": "user",
+                                "parts": parts,
+                            },
+                        ],
+                    },
+                    "userAgent": "pi-cli-standalone",
+                    "requestId": request_id,
                 }
 
-            for attempt in range(self.api_max_retries + 1):
-                logger.info(f"Gemini API Request - Account: {auth_record['email']}, Type: {model_type}, Model: {model_name} (Attempt: {attempt + 1})")
+                # Add systemInstruction inside 'request' with camelCase
+                if system_instruction:
+                    request_body["request"]["systemInstruction"] = {
+                        "parts": [{"text": system_instruction}]
+                    }
+
+                limiter_key = (auth_record["email"], model_name)
+                for attempt in range(self.api_max_retries + 1):
+                    await self.rate_limiter.acquire_async(limiter_key)
+                    logger.info(f"Gemini API Request - Account: {auth_record['email']}, Type: {model_type}, Model: {model_name} (Attempt: {attempt + 1})")
                 
-                start_time = time.time()
-                try:
-                    async with httpx.AsyncClient(timeout=self.api_timeout) as client:
-                        resp = await client.post(
+                    start_time = time.time()
+                    try:
+                        client = self.get_http_client()
+                        headers = {
+                            "Authorization": f"Bearer {auth_record['access']}",
+                            "Content-Type": "application/json",
+                            "Accept": "text/event-stream",
+                            **self.GEMINI_CLI_HEADERS,
+                        }
+                        if audio_payload:
+                            body = StreamingJSONBody(request_body, audio_payload)
+                            headers["Content-Length"] = str(body.content_length)
+                            body_args = {"content": body}
+                        else:
+                            body_args = {"json": request_body}
+                        # api_timeout bounds the whole exchange; _read_sse_text cuts streams that go quiet
+                        async with asyncio.timeout(self.api_timeout), client.stream(
+                            "POST",
                             f"{self.CODE_ASSIST_ENDPOINT}/v1internal:streamGenerateContent?alt=sse",
-                            headers={
-                                "Authorization": f"Bearer {auth_record['access']}",
-                                "Content-Type": "application/json",
-                                "Accept": "text/event-stream",
-                                **self.GEMINI_CLI_HEADERS,
-                            },
-                            json=request_body
-                        )
-
-                        if resp.status_code != 200:
-                            error_payload = resp.text
-                            try:
-                                error_payload = resp.json()
-                            except: pass
-                            
-                            self._log_error(request_body, error_payload)
-                            logger.error(f"Gemini API Error ({resp.status_code}) for {auth_record['email']}")
+                            headers=headers,
+                            **body_args
+                        ) as resp:
+
+                            if resp.status_code != 200:
+                                await resp.aread()
+                                error_payload = resp.text
+                                try:
+                                    error_payload = resp.json()
+                                except: pass
                             
-                            if resp.status_code == 429:
-                                backoff_429 = BackoffManager(initial_delay=30, max_delay=300)
-                                logger.warning(f"Rate limit (429) for {auth_record['email']}. Waiting and retrying indefinitely...")
-                                await backoff_429.async_sleep(attempt)
-                                accounts_tried = 0 # Reset safety to allow indefinite retries
-                                break # Move to next account (or same if only one)
+                                self._log_error(request_body, error_payload)
+                                logger.error(f"Gemini API Error ({resp.status_code}) for {auth_record['email']}")
                             
-                            if resp.status_code in [401, 403]:
-                                break # Move to next account
+                                if resp.status_code == 429:
+                                    logger.warning(f"Rate limit (429) for {auth_record['email']}. Slowing this account down and retrying indefinitely...")
+                                    # Only this account cools down; the scheduler keeps dispatching to the others
+                                    self.auth_service.scheduler.record_throttle(picked)
+                                    self.rate_limiter.on_throttle(limiter_key, retry_after=0)
+                                    accounts_tried = 0 # Reset safety to allow indefinite retries
+                                    break # Move to next account (or same if only one)
                             
-                            if resp.status_code == 503:
-                                logger.warning("Service Unavailable (503). Retrying...")
-                                await self.backoff_manager.async_sleep(attempt)
-                                continue
+                                if resp.status_code in [401, 403]:
+                                    self.auth_service.scheduler.suspend(picked)
+                                    break # Move to next account
                             
-                            raise Exception(f"API Error {resp.status_code}: {resp.text}")
-
-                        # Process SSE stream
-                        full_text = ""
-                        for line in resp.iter_lines():
-                            # Ensure line is a string for startswith and slicing
-                            if isinstance(line, bytes):
-                                line = line.decode('utf-8')
-                                
-                            if line.startswith("data:"):
-                                json_str = line[5:].strip()
-                                if not json_str: continue
-                                try:
-                                    chunk = json.loads(json_str)
-                                    candidates = chunk.get("response", {}).get("candidates", [])
-                                    if candidates:
-                                        parts_resp = candidates[0].get("content", {}).get("parts", [])
-                                        for p in parts_resp:
-                                            if "text" in p:
-                                                full_text += p["text"]
-                                except Exception:
+                                self.auth_service.scheduler.record_error(picked)
+                                if resp.status_code == 503:
+                                    logger.warning("Service Unavailable (503). Retrying...")
+                                    await self.backoff_manager.async_sleep(attempt)
                                     continue
+                            
+                                raise GeminiAPIError(f"API Error {resp.status_code}: {resp.text}")
+
+                            full_text = await self._read_sse_text(resp)
 
                         duration = time.time() - start_time
                         logger.info(f"Gemini API Response - Success - Duration: {duration:.2f}s")
-                        
+                    
+                        self.rate_limiter.on_success(limiter_key)
+                        self.auth_service.scheduler.record_success(picked, duration)
+
                         # Record usage
                         self.usage_tracker.record_usage(auth_record["email"] or "unknown", model_name)
-                        
+                    
                         if not full_text.strip():
                             logger.warning(f"Empty/whitespace response from Gemini for {auth_record['email']}. Retrying indefinitely...")
                             await self.backoff_manager.async_sleep(attempt)
                             # Reset safety to allow indefinite retries for this specific issue
                             accounts_tried = 0
                             continue # Retry current account/request
-                            
+                        
                         return full_text
 
-                except httpx.TimeoutException:
-                    logger.warning(f"Gemini API Timeout (Attempt {attempt+1})")
-                    if attempt >= self.api_max_retries:
-                        break # Try next account
-                    await self.backoff_manager.async_sleep(attempt)
-                except Exception as e:
-                    logger.error(f"Gemini API Exception ({type(e).__name__}): {e}")
-                    self._log_error(request_body, f"{type(e).__name__}: {str(e)}")
-                    if attempt >= self.api_max_retries:
-                        break # Try next account
-                    await self.backoff_manager.async_sleep(attempt)
+                    except (httpx.TimeoutException, TimeoutError):
+                        logger.warning(f"Gemini API Timeout (Attempt {attempt+1})")
+                        self.auth_service.scheduler.record_error(picked)
+                        if attempt >= self.api_max_retries:
+                            break # Try next account
+                        await self.backoff_manager.async_sleep(attempt)
+                    except Exception as e:
+                        if not isinstance(e, GeminiAPIError):
+                            logger.error(f"Gemini API Exception ({type(e).__name__}): {e}")
+                            self._log_error(request_body, f"{type(e).__name__}: {str(e)}")
+                            self.auth_service.scheduler.record_error(picked)
+                        if attempt >= self.api_max_retries:
+                            break # Try next account
+                        await self.backoff_manager.async_sleep(attempt)
+            finally:
+                self.auth_service.release_account(picked)
 
         raise Exception("All configured Gemini CLI accounts failed or were skipped.")
 
     # Synchronous wrappers for existing pipeline
     def generate_content(self, prompt, model_type="note", system_instruction=None):
-        import asyncio
-        return asyncio.run(self.generate_content_async(prompt, model_type=model_type, system_instruction=system_instruction))
+        return self._run_sync(self.generate_content_async(prompt, model_type=model_type, system_instruction=system_instruction))
 
     def generate_content_with_file(self, file_path, prompt, model_type="transcription", system_instruction=None):
-        import asyncio
-        audio_base64 = AudioProcessor.encode_to_base64(file_path)
-        return asyncio.run(self.generate_content_async(prompt, audio_base64=audio_base64, model_type=model_type, system_instruction=system_instruction))
+        # The audio is streamed from disk on every attempt rather than held as a base64 string
+        audio_payload = AudioPayload(file_path)
+        return self._run_sync(self.generate_content_async(prompt, model_type=model_type, system_instruction=system_instruction, audio_payload=audio_payload))
+
+    async def generate_content_with_file_async(self, file_path, prompt, model_type="transcription", system_instruction=None):
+        """Awaitable counterpart of generate_content_with_file for callers already on an event loop."""
+        audio_payload = AudioPayload(file_path)
+        return await self.generate_content_async(prompt, model_type=model_type, system_instruction=system_instruction, audio_payload=audio_payload)
 
     def _wait_for_file_active(self, client, file_obj):
         """Waits for the uploaded file to be in ACTIVE state."""
@@ -4,10 +4,15 @@ import time
 import hashlib
 import base64
 import secrets
+import asyncio
 import logging
+import threading
+import concurrent.futures
 import httpx
-from typing import Optional, Dict, List, TypedDict
+from contextlib import asynccontextmanager
+from typing import Callable, Optional, Dict, List, TypedDict
 from urllib.parse import urlencode, urlparse, parse_qs
+from src.account_scheduler import AccountScheduler
 
 logger = logging.getLogger(__name__)
 
@@ -33,10 +38,27 @@ class GeminiAuthService:
         "https://www.googleapis.com/auth/userinfo.profile",
     ]
 
-    def __init__(self, auth_file: str = "gemini_cli_auth.json"):
+    def __init__(self, auth_file: str = "gemini_cli_auth.json", refresh_margin: float = 300.0):
         self.auth_file = auth_file
+        # Tokens are renewed this many seconds before they expire
+        self.refresh_margin = refresh_margin
         self.accounts: List[GeminiCliAuthRecord] = self._load_accounts()
-        self.current_index = 0
+        self._lock = threading.Lock()
+        # Chooses the account for each request based on load and recent health
+        self.scheduler = AccountScheduler(lambda: self.accounts)
+        # In-progress refreshes by account; thread-safe futures so callers on any event loop can share them
+        self._refreshes: Dict[str, concurrent.futures.Future] = {}
+        # Set by GeminiAPIWrapper so token and project calls reuse its pooled client
+        self.http_client_provider: Optional[Callable[[], httpx.AsyncClient]] = None
+
+    @asynccontextmanager
+    async def _http_client(self):
+        """Yields the shared client if one is provided, otherwise a short-lived one."""
+        if self.http_client_provider is not None:
+            yield self.http_client_provider()
+            return
+        async with httpx.AsyncClient() as client:
+            yield client
 
     def _load_accounts(self) -> List[GeminiCliAuthRecord]:
         if not os.path.exists(self.auth_file):
@@ -52,8 +74,9 @@ class GeminiAuthService:
 
     def _save_accounts(self):
         try:
-            with open(self.auth_file, 'w') as f:
-                json.dump(self.accounts, f, indent=4)
+            with self._lock:
+                with open(self.auth_file, 'w') as f:
+                    json.dump(self.accounts, f, indent=4)
         except IOError as e:
             logger.error(f"Error saving auth records: {e}")
 
@@ -87,7 +110,7 @@ class GeminiAuthService:
         if client_secret:
             data["client_secret"] = client_secret
 
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             resp = await client.post(self.TOKEN_URL, data=data)
             if resp.status_code != 200:
                 raise Exception(f"Token exchange failed: {resp.text}")
@@ -130,7 +153,7 @@ class GeminiAuthService:
         self.accounts.append(record)
         self._save_accounts()
 
-    async def refresh_token(self, record: GeminiCliAuthRecord) -> GeminiCliAuthRecord:
+    async def refresh_token(self, record: GeminiCliAuthRecord, save: bool = True) -> GeminiCliAuthRecord:
         data = {
             "client_id": record["clientId"],
             "refresh_token": record["refresh"],
@@ -139,11 +162,12 @@ class GeminiAuthService:
         if record["clientSecret"]:
             data["client_secret"] = record["clientSecret"]
 
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             resp = await client.post(self.TOKEN_URL, data=data)
             if resp.status_code != 200:
                 record["status"] = "invalid"
-                self._save_accounts()
+                if save:
+                    self._save_accounts()
                 raise Exception(f"Token refresh failed: {resp.text}")
             
             token_data = resp.json()
@@ -155,12 +179,65 @@ class GeminiAuthService:
             record["expires"] = int(time.time() * 1000) + (expires_in * 1000) - (5 * 60 * 1000)
             record["status"] = "valid"
             
-            self._save_accounts()
+            if save:
+                self._save_accounts()
             return record
 
+    async def refresh_token_once(self, record: GeminiCliAuthRecord, save: bool = True) -> GeminiCliAuthRecord:
+        """
+        Refreshes the account's token, or waits for the refresh already running for it.
+        Concurrent callers share a single token request.
+        """
+        key = AccountScheduler._key(record)
+        with self._lock:
+            future = self._refreshes.get(key)
+            owner = future is None
+            if owner:
+                future = self._refreshes[key] = concurrent.futures.Future()
+        if not owner:
+            return await asyncio.wrap_future(future)
+
+        try:
+            result = await self.refresh_token(record, save=save)
+            future.set_result(result)
+            return result
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._refreshes.pop(key, None)
+
+    def needs_refresh(self, record: GeminiCliAuthRecord) -> bool:
+        """True once the token is within refresh_margin of expiring."""
+        return int(time.time() * 1000) >= record["expires"] - int(self.refresh_margin * 1000)
+
+    async def refresh_accounts(self, force: bool = False) -> Dict[str, Optional[Exception]]:
+        """
+        Refreshes all accounts whose tokens are about to expire (or every account when force is set)
+        concurrently, then saves the auth file once. Returns the error per account email (None on success).
+        """
+        due = [acc for acc in self.accounts if force or (acc.get("status") == "valid" and self.needs_refresh(acc))]
+        if not due:
+            return {}
+        outcomes = await asyncio.gather(*(self.refresh_token_once(acc, save=False) for acc in due), return_exceptions=True)
+        self._save_accounts()
+        return {acc.get("email"): (o if isinstance(o, BaseException) else None) for acc, o in zip(due, outcomes)}
+
+    async def run_refresher(self, interval: float = 60.0):
+        """Renews expiring tokens in the background until cancelled."""
+        while True:
+            try:
+                for email, error in (await self.refresh_accounts()).items():
+                    if error is not None:
+                        logger.error(f"Background token refresh failed for {email}: {error}")
+            except Exception as e:
+                logger.error(f"Background token refresh error: {e}")
+            await asyncio.sleep(interval)
+
     async def _get_user_email(self, access_token: str) -> Optional[str]:
         try:
-            async with httpx.AsyncClient() as client:
+            async with self._http_client() as client:
                 resp = await client.get(self.USERINFO_URL, headers={"Authorization": f"Bearer {access_token}"})
                 if resp.status_code == 200:
                     return resp.json().get("email")
@@ -188,8 +265,8 @@ class GeminiAuthService:
             },
         }
 
-        async with httpx.AsyncClient(timeout=30.0) as client:
-            resp = await client.post(f"{self.CODE_ASSIST_ENDPOINT}/v1internal:loadCodeAssist", headers=headers, json=load_body)
+        async with self._http_client() as client:
+            resp = await client.post(f"{self.CODE_ASSIST_ENDPOINT}/v1internal:loadCodeAssist", headers=headers, json=load_body, timeout=30.0)
             
             data = {}
             if resp.status_code != 200:
@@ -227,7 +304,7 @@ class GeminiAuthService:
                 onboard_body["cloudaicompanionProject"] = env_project
                 onboard_body["metadata"]["duetProject"] = env_project
 
-            onboard_resp = await client.post(f"{self.CODE_ASSIST_ENDPOINT}/v1internal:onboardUser", headers=headers, json=onboard_body)
+            onboard_resp = await client.post(f"{self.CODE_ASSIST_ENDPOINT}/v1internal:onboardUser", headers=headers, json=onboard_body, timeout=30.0)
             if onboard_resp.status_code != 200:
                 raise Exception(f"onboardUser failed: {onboard_resp.status_code} {onboard_resp.text}")
             
@@ -244,7 +321,7 @@ class GeminiAuthService:
         raise Exception("Could not discover or provision a Google Cloud project. Set GOOGLE_CLOUD_PROJECT.")
 
     async def _poll_operation(self, op_name: str, headers: dict) -> dict:
-        async with httpx.AsyncClient() as client:
+        async with self._http_client() as client:
             for _ in range(24):
                 await asyncio.sleep(5)
                 resp = await client.get(f"{self.CODE_ASSIST_ENDPOINT}/v1internal/{op_name}", headers=headers)
@@ -256,17 +333,18 @@ class GeminiAuthService:
         raise Exception("Operation polling timeout")
 
     def get_next_account(self) -> Optional[GeminiCliAuthRecord]:
-        valid_accounts = [acc for acc in self.accounts if acc["status"] == "valid"]
-        if not valid_accounts:
-            return None
-        
-        acc = valid_accounts[self.current_index % len(valid_accounts)]
-        self.current_index += 1
-        return acc
+        """
+        Returns the best available valid account and counts it as in flight until
+        release_account is called. Returns None if every valid account is cooling down.
+        """
+        return self.scheduler.pick()
+
+    def release_account(self, record: GeminiCliAuthRecord):
+        self.scheduler.release(record)
 
     async def get_valid_account(self, record: GeminiCliAuthRecord) -> GeminiCliAuthRecord:
         """Ensures the record has a valid access token, refreshing if necessary."""
         if int(time.time() * 1000) >= record["expires"]:
             logger.info(f"Refreshing token for {record['email']}")
-            return await self.refresh_token(record)
+            return await self.refresh_token_once(record)
         return record
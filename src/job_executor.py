@@ -0,0 +1,331 @@
+import os
+import socket
+import asyncio
+import logging
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+class JobExecutor:
+    """Runs pipeline jobs on a bounded pool of worker threads."""
+
+    def __init__(self, pipeline, max_workers: int = 1):
+        self.pipeline = pipeline
+        self.manager = pipeline.manager
+        self.max_workers = max(1, int(max_workers))
+
+    def _run_job(self, job) -> bool:
+        """Runs a single job, isolating its failure from the rest of the batch."""
+        print(f"\n--- Processing Job: {job['name']} ---")
+        try:
+            success = self.pipeline.execute_job(job)
+        except Exception as e:
+            print(f"❌ Unhandled exception for job '{job['name']}': {e}")
+            self.manager.update_job_status(job['id'], 'failed')
+            success = False
+
+        # Save progress after each job
+        self.manager.save_history()
+        if not success:
+            print(f"⚠️ Job '{job['name']}' failed. Continuing with remaining jobs...")
+        return success
+
+    def run(self, jobs: List[dict]) -> Dict[str, bool]:
+        """
+        Executes all jobs with at most max_workers running at once.
+        Returns a mapping of job id to success flag.
+        """
+        results: Dict[str, bool] = {}
+        if not jobs:
+            return results
+
+        if self.max_workers == 1:
+            for job in jobs:
+                results[job['id']] = self._run_job(job)
+            return results
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="zaknotes-job") as pool:
+            futures = {pool.submit(self._run_job, job): job for job in jobs}
+            for future in as_completed(futures):
+                job = futures[future]
+                try:
+                    results[job['id']] = future.result()
+                except Exception as e:
+                    logger.error(f"Worker crashed for job {job['id']}: {e}")
+                    results[job['id']] = False
+        return results
+
+
+class StagedJobExecutor:
+    """
+    Runs jobs through the pipeline stages as separate worker pools connected by bounded queues,
+    so one job can download while another is transcribed and a third gets its notes.
+    """
+
+    # Marks the end of input for a stage worker
+    _DONE = object()
+
+    def __init__(self, pipeline, stage_workers: Optional[Dict[str, int]] = None, queue_size: int = 2):
+        self.pipeline = pipeline
+        self.manager = pipeline.manager
+        self.stages = list(pipeline.STAGES)
+        stage_workers = stage_workers or {}
+        self.stage_workers = {stage: max(1, int(stage_workers.get(stage, 1))) for stage in self.stages}
+        self.queue_size = max(1, int(queue_size))
+        self._lock = threading.Lock()
+
+    def run(self, jobs: List[dict]) -> Dict[str, bool]:
+        """
+        Executes all jobs through every stage.
+        Returns a mapping of job id to success flag.
+        """
+        results: Dict[str, bool] = {}
+        if not jobs:
+            return results
+
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in self.stages]
+        remaining = {stage: self.stage_workers[stage] for stage in self.stages}
+
+        def record(job, success):
+            with self._lock:
+                results[job['id']] = success
+            # Save progress after each job
+            self.manager.save_history()
+            if success:
+                print(f"🏁 Job '{job['name']}' finished all stages.")
+            else:
+                print(f"⚠️ Job '{job['name']}' failed. Continuing with remaining jobs...")
+
+        def worker(index):
+            stage = self.stages[index]
+            inbox = queues[index]
+            is_last = index == len(self.stages) - 1
+            try:
+                while True:
+                    ctx = inbox.get()
+                    if ctx is self._DONE:
+                        break
+                    # Whatever goes wrong with one job, the worker lives on to serve the rest
+                    try:
+                        try:
+                            success = self.pipeline.run_stage(stage, ctx)
+                        except Exception as e:
+                            logger.error(f"Stage '{stage}' crashed for job {ctx['job']['id']}: {e}")
+                            self.manager.update_job_status(ctx['job']['id'], 'failed')
+                            success = False
+                        if not success:
+                            record(ctx["job"], False)
+                        elif is_last:
+                            record(ctx["job"], True)
+                        else:
+                            # Blocks while the next stage is saturated (backpressure)
+                            queues[index + 1].put(ctx)
+                    except Exception as e:
+                        logger.error(f"Stage '{stage}' worker failed on job {ctx['job']['id']}: {e}")
+                        with self._lock:
+                            results.setdefault(ctx['job']['id'], False)
+            finally:
+                # The last worker of a stage to finish closes the next stage's queue
+                with self._lock:
+                    remaining[stage] -= 1
+                    close_next = remaining[stage] == 0 and not is_last
+                if close_next:
+                    next_stage = self.stages[index + 1]
+                    for _ in range(self.stage_workers[next_stage]):
+                        queues[index + 1].put(self._DONE)
+
+        threads = []
+        for index, stage in enumerate(self.stages):
+            for n in range(self.stage_workers[stage]):
+                t = threading.Thread(target=worker, args=(index,), name=f"zaknotes-{stage}-{n + 1}", daemon=True)
+                t.start()
+                threads.append(t)
+
+        for job in jobs:
+            print(f"\n--- Queued Job: {job['name']} ---")
+            queues[0].put(self.pipeline.create_context(job))
+        for _ in range(self.stage_workers[self.stages[0]]):
+            queues[0].put(self._DONE)
+
+        for t in threads:
+            t.join()
+        return results
+
+
+class AsyncJobExecutor:
+    """
+    Runs jobs with ProcessingPipeline.execute_job_async on a single event loop,
+    with at most max_concurrency jobs in flight.
+    """
+
+    def __init__(self, pipeline, max_concurrency: int = 1):
+        self.pipeline = pipeline
+        self.manager = pipeline.manager
+        self.max_concurrency = max(1, int(max_concurrency))
+
+    async def _run_job(self, job, semaphore: asyncio.Semaphore) -> bool:
+        async with semaphore:
+            print(f"\n--- Processing Job: {job['name']} ---")
+            try:
+                success = await self.pipeline.execute_job_async(job)
+            except Exception as e:
+                print(f"❌ Unhandled exception for job '{job['name']}': {e}")
+                self.manager.update_job_status(job['id'], 'failed')
+                success = False
+
+        # Save progress after each job
+        self.manager.save_history()
+        if not success:
+            print(f"⚠️ Job '{job['name']}' failed. Continuing with remaining jobs...")
+        return success
+
+    async def run_async(self, jobs: List[dict]) -> Dict[str, bool]:
+        """Executes all jobs concurrently on the running loop. Returns job id to success flag."""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        outcomes = await asyncio.gather(*(self._run_job(job, semaphore) for job in jobs))
+        return {job['id']: success for job, success in zip(jobs, outcomes)}
+
+    async def _run_and_close(self, jobs: List[dict]) -> Dict[str, bool]:
+        try:
+            return await self.run_async(jobs)
+        finally:
+            # The loop is about to be closed; release its pooled connections first
+            await self.pipeline.aclose()
+
+    def run(self, jobs: List[dict]) -> Dict[str, bool]:
+        """Executes all jobs on a fresh event loop."""
+        if not jobs:
+            return {}
+        return asyncio.run(self._run_and_close(jobs))
+
+
+def _renew_or_fence(manager, job_id: str, owner: str, lease_seconds: float) -> bool:
+    """Renews owner's lease on a job; if it was lost, fences the job off so this process stops writing it."""
+    if manager.renew_lease(job_id, owner, lease_seconds):
+        return True
+    logger.warning(f"Worker {owner} lost its lease on job {job_id}; stopping it")
+    manager.fence_job(job_id)
+    return False
+
+
+class JobLeases:
+    """
+    Leases for a batch of jobs handed to an executor (the interactive menu) rather than claimed
+    one at a time by a LeasedJobWorker. claim() takes the jobs no other worker holds; while the
+    batch runs (inside the with block) a heartbeat renews the leases, and they are released after.
+    """
+
+    def __init__(self, manager, owner: Optional[str] = None, lease_seconds: float = 600, heartbeat_interval: float = 60):
+        self.manager = manager
+        self.owner = owner or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = float(lease_seconds)
+        self.heartbeat_interval = float(heartbeat_interval)
+        self.job_ids: List[str] = []
+        self._stop = threading.Event()
+        self._thread = None
+
+    def claim(self, jobs: List[dict]) -> List[dict]:
+        claimed = self.manager.claim_jobs(self.owner, self.lease_seconds, jobs)
+        self.job_ids = [job['id'] for job in claimed]
+        return claimed
+
+    def _heartbeat(self):
+        held = list(self.job_ids)
+        while held and not self._stop.wait(self.heartbeat_interval):
+            held = [job_id for job_id in held if _renew_or_fence(self.manager, job_id, self.owner, self.lease_seconds)]
+
+    def __enter__(self):
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._heartbeat, name="zaknotes-leases", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        for job_id in self.job_ids:
+            self.manager.release_job(job_id, self.owner)
+        return False
+
+
+class LeasedJobWorker:
+    """
+    Drains the shared job queue by claiming one job at a time with a lease.
+    Several worker processes, on one box or several, can run against the same job store.
+    The lease is renewed by a heartbeat while the job runs, so if a worker dies its job
+    goes back to the queue once the lease runs out.
+    """
+
+    def __init__(self, pipeline, worker_id: Optional[str] = None, lease_seconds: float = 600,
+                 heartbeat_interval: float = 60, max_workers: int = 1):
+        self.pipeline = pipeline
+        self.manager = pipeline.manager
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}"
+        self.lease_seconds = float(lease_seconds)
+        self.heartbeat_interval = float(heartbeat_interval)
+        self.max_workers = max(1, int(max_workers))
+        self._lock = threading.Lock()
+        # Jobs this worker already tried in this run; a failed job is not retried in a loop
+        self._attempted = set()
+
+    def _heartbeat(self, job, stop: threading.Event):
+        while not stop.wait(self.heartbeat_interval):
+            if not _renew_or_fence(self.manager, job['id'], self.worker_id, self.lease_seconds):
+                return
+
+    def _claim(self):
+        with self._lock:
+            job = self.manager.claim_job(self.worker_id, self.lease_seconds, exclude=list(self._attempted))
+            if job is not None:
+                self._attempted.add(job['id'])
+            return job
+
+    def _work(self, results: Dict[str, bool]):
+        while True:
+            job = self._claim()
+            if job is None:
+                return
+
+            print(f"\n--- [{self.worker_id}] Processing Job: {job['name']} ---")
+            stop = threading.Event()
+            heartbeat = threading.Thread(target=self._heartbeat, args=(job, stop), daemon=True)
+            heartbeat.start()
+            try:
+                success = self.pipeline.execute_job(job)
+            except Exception as e:
+                print(f"❌ Unhandled exception for job '{job['name']}': {e}")
+                self.manager.update_job_status(job['id'], 'failed')
+                success = False
+            finally:
+                stop.set()
+                heartbeat.join()
+                self.manager.release_job(job['id'], self.worker_id)
+
+            with self._lock:
+                results[job['id']] = success
+            if not success:
+                print(f"⚠️ Job '{job['name']}' failed. Continuing with remaining jobs...")
+
+    def run(self) -> Dict[str, bool]:
+        """
+        Claims and runs jobs until none are left to claim.
+        Returns a mapping of job id to success flag for the jobs this worker ran.
+        """
+        results: Dict[str, bool] = {}
+        if self.max_workers == 1:
+            self._work(results)
+            return results
+
+        threads = [
+            threading.Thread(target=self._work, args=(results,), name=f"zaknotes-worker-{n + 1}", daemon=True)
+            for n in range(self.max_workers)
+        ]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        return results
+
@@ -1,29 +1,105 @@
 import re
 import json
 import os
+import threading
 from datetime import datetime
+from src.job_store import JobStore
 
 HISTORY_FILE = "history.json"
+JOBS_DB = "jobs.db"
+
+# Statuses of jobs that still have work left (plus TRANSCRIBING_CHUNK_N)
+RESUMABLE_STATUSES = ['queue', 'failed', 'downloading', 'processing',
+                      'DOWNLOADED', 'SILENCE_REMOVED', 'BITRATE_MODIFIED', 'CHUNKED']
+CHUNK_STATUS_PREFIX = 'TRANSCRIBING_CHUNK_'
 
 class JobManager:
-    def __init__(self):
-        self.history = []
+    def __init__(self, db_path: str = None):
+        # Guards history mutations and saves when jobs run on worker threads
+        self._lock = threading.RLock()
+        self.store = JobStore(db_path or JOBS_DB)
+        self._history = []
+        self._by_id = {}
+        # Last JSON written per job id, so saves only touch rows that changed
+        self._persisted = {}
+        # Jobs whose lease this process lost; their rows now belong to another worker
+        self._fenced = set()
         self.load_history()
 
-    def load_history(self):
+    @property
+    def history(self):
+        return self._history
+
+    @history.setter
+    def history(self, jobs):
+        with self._lock:
+            self._history = list(jobs)
+            self._by_id = {job.get('id'): job for job in self._history}
+
+    def _migrate_history_file(self):
+        """One-time import of the legacy history.json into the job store."""
+        if self.store.get_meta("history_migrated"):
+            return
         if os.path.exists(HISTORY_FILE):
             try:
                 with open(HISTORY_FILE, 'r') as f:
-                    self.history = json.load(f)
+                    jobs = json.load(f)
             except:
-                self.history = []
-        else:
-            self.history = []
+                jobs = []
+            rows = [(job['id'], job.get('status', ''), json.dumps(job)) for job in jobs if job.get('id') is not None]
+            self.store.write(rows)
+            if rows:
+                print(f"📦 Migrated {len(rows)} jobs from {HISTORY_FILE} to {self.store.db_path}.")
+        self.store.set_meta("history_migrated", "1")
+
+    def load_history(self):
+        with self._lock:
+            self._migrate_history_file()
+            self.history = self.store.load_all()
+            self._persisted = {job.get('id'): json.dumps(job) for job in self._history}
 
     def save_history(self):
-        # Save entire history to file
-        with open(HISTORY_FILE, 'w') as f:
-            json.dump(self.history, f, indent=4)
+        """Writes jobs that were added, changed or removed since the last save."""
+        with self._lock:
+            current = {}
+            rows = []
+            for job in self._history:
+                job_id = job.get('id')
+                if job_id is None:
+                    continue
+                if job_id in self._fenced:
+                    if job_id in self._persisted:
+                        current[job_id] = self._persisted[job_id]
+                    continue
+                data = json.dumps(job)
+                current[job_id] = data
+                if self._persisted.get(job_id) != data:
+                    rows.append((job_id, job.get('status', ''), data))
+            deleted = [job_id for job_id in self._persisted if job_id not in current]
+            self.store.write(rows, deleted)
+            self._persisted = current
+
+    def _save_job(self, job):
+        """Persists a single job row (unless the job was fenced off)."""
+        if job['id'] in self._fenced:
+            return
+        data = json.dumps(job)
+        self.store.write([(job['id'], job.get('status', ''), data)])
+        self._persisted[job['id']] = data
+
+    def _find(self, job_id):
+        job = self._by_id.get(job_id)
+        if job is None or job.get('id') != job_id:
+            # Jobs appended to history directly are not indexed yet
+            self._by_id = {j.get('id'): j for j in self._history}
+            job = self._by_id.get(job_id)
+        return job
+
+    def _resumable_jobs(self):
+        """Jobs that still have work left, found through the status index."""
+        self.save_history()
+        ids = self.store.ids_with_status(RESUMABLE_STATUSES, prefixes=[CHUNK_STATUS_PREFIX])
+        return [job for job in (self._find(job_id) for job_id in ids) if job is not None]
 
     def get_pending_from_last_150(self):
         """
@@ -31,63 +107,126 @@ class JobManager:
         Also includes granular intermediate states.
         Exclude 'no_link_found' from retry.
         """
-        target_statuses = [
-            'queue', 'failed', 'downloading', 'processing',
-            'DOWNLOADED', 'SILENCE_REMOVED', 'BITRATE_MODIFIED', 'CHUNKED'
-        ]
-        # Use regex for TRANSCRIBING_CHUNK_N
-        pending = []
-        for job in self.history:
-            status = job.get('status', '')
-            if status in target_statuses or status.startswith('TRANSCRIBING_CHUNK_'):
-                pending.append(job)
-        return pending
+        with self._lock:
+            return self._resumable_jobs()
+
+    def _transition_pending(self, update):
+        """
+        Applies update to the stored resumable jobs that no worker holds a lease on, then mirrors
+        the changed rows in memory. Jobs another worker is running are left alone.
+        """
+        with self._lock:
+            self.save_history()
+            for record in self.store.transition_unleased(RESUMABLE_STATUSES, [CHUNK_STATUS_PREFIX], update):
+                job = self._find(record['id'])
+                if job is None:
+                    self._history.append(record)
+                    self._by_id[record['id']] = record
+                else:
+                    job.clear()
+                    job.update(record)
+                self._persisted[record['id']] = json.dumps(record)
 
     def cancel_pending(self):
-        """Cancel ALL pending, failed, and stuck jobs in history"""
-        target_statuses = [
-            'queue', 'failed', 'downloading', 'processing',
-            'DOWNLOADED', 'SILENCE_REMOVED', 'BITRATE_MODIFIED', 'CHUNKED'
-        ]
-        for job in self.history:
-            status = job.get('status', '')
-            if status in target_statuses or status.startswith('TRANSCRIBING_CHUNK_'):
-                job['status'] = 'cancelled'
-        self.save_history()
+        """Cancel ALL pending, failed, and stuck jobs in history (except those leased by a worker)"""
+        def cancel(job):
+            job['status'] = 'cancelled'
+            return True
+        self._transition_pending(cancel)
 
     def fail_pending(self):
-        """Mark ALL pending, downloading, or processing jobs as failed"""
-        target_statuses = [
-            'queue', 'downloading', 'processing',
-            'DOWNLOADED', 'SILENCE_REMOVED', 'BITRATE_MODIFIED', 'CHUNKED'
-        ]
-        for job in self.history:
+        """Mark ALL pending, downloading, or processing jobs as failed (except those leased by a worker)"""
+        def fail(job):
             status = job.get('status', '')
-            if status in target_statuses or status.startswith('TRANSCRIBING_CHUNK_'):
-                # Preserve the current state in a separate field if it's granular
-                if status not in ['queue', 'downloading', 'processing']:
-                    job['last_granular_state'] = status
-                job['status'] = 'failed'
-        self.save_history()
+            if status == 'failed':
+                return False
+            # Preserve the current state in a separate field if it's granular
+            if status not in ['queue', 'downloading', 'processing']:
+                job['last_granular_state'] = status
+            job['status'] = 'failed'
+            return True
+        self._transition_pending(fail)
 
     def update_job_status(self, job_id, status):
         """Update the status of a specific job by ID."""
-        for job in self.history:
-            if job.get('id') == job_id:
-                old_status = job.get('status')
-                if status == 'failed' and old_status not in ['queue', 'downloading', 'processing', 'failed', 'completed', 'cancelled']:
-                    job['last_granular_state'] = old_status
-                job['status'] = status
-                self.save_history()
-                return True
-        return False
+        with self._lock:
+            job = self._find(job_id)
+            if job is None or job_id in self._fenced:
+                return False
+            old_status = job.get('status')
+            if status == 'failed' and old_status not in ['queue', 'downloading', 'processing', 'failed', 'completed', 'cancelled']:
+                job['last_granular_state'] = old_status
+            job['status'] = status
+            self._save_job(job)
+            return True
+
+    def update_job(self, job_id, **fields):
+        """Sets extra fields on a job record (e.g. its scratch directory) and saves that row."""
+        with self._lock:
+            job = self._find(job_id)
+            if job is None or job_id in self._fenced:
+                return False
+            job.update(fields)
+            self._save_job(job)
+            return True
+
+    def claim_job(self, worker_id, lease_seconds, exclude=(), only=None):
+        """
+        Leases the next resumable job (optionally only among the ids in only) to worker_id for
+        lease_seconds. Returns the live job record, refreshed from the store, or None when no job is free.
+        """
+        with self._lock:
+            self.save_history()
+            claimed = self.store.claim(worker_id, lease_seconds, RESUMABLE_STATUSES,
+                                       prefixes=[CHUNK_STATUS_PREFIX], exclude=exclude, only=only)
+            if claimed is None:
+                return None
+            self._fenced.discard(claimed['id'])
+            job = self._find(claimed['id'])
+            if job is None:
+                # Added by another process after this one loaded
+                job = claimed
+                self._history.append(job)
+                self._by_id[job['id']] = job
+            else:
+                job.clear()
+                job.update(claimed)
+            self._persisted[job['id']] = json.dumps(job)
+            return job
+
+    def claim_jobs(self, worker_id, lease_seconds, jobs):
+        """Leases each of jobs that no other worker holds. Returns the claimed records in queue order."""
+        ids = [job['id'] for job in jobs]
+        claimed = []
+        while True:
+            job = self.claim_job(worker_id, lease_seconds, exclude=[j['id'] for j in claimed], only=ids)
+            if job is None:
+                return claimed
+            claimed.append(job)
+
+    def fence_job(self, job_id):
+        """
+        Called when this process lost its lease on a job: the job now belongs to another worker, so
+        its row is no longer written from here, and the pipeline stops it at its next stage.
+        """
+        with self._lock:
+            self._fenced.add(job_id)
+            job = self._find(job_id)
+            if job is not None:
+                job['lease_lost'] = True
+
+    def renew_lease(self, job_id, worker_id, lease_seconds):
+        """Heartbeat for a claimed job. Returns False if the lease was lost."""
+        return self.store.renew_lease(job_id, worker_id, lease_seconds)
+
+    def release_job(self, job_id, worker_id):
+        """Gives up worker_id's lease on a job."""
+        self.store.release_lease(job_id, worker_id)
 
     def get_job(self, job_id):
         """Get a specific job by ID."""
-        for job in self.history:
-            if job.get('id') == job_id:
-                return job
-        return None
+        with self._lock:
+            return self._find(job_id)
 
     def smart_split(self, text):
         """Splits by comma/pipe/newline but respects (groups)"""
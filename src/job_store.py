@@ -0,0 +1,193 @@
+import json
+import time
+import sqlite3
+import threading
+from typing import Callable, Iterable, List, Optional, Sequence, Tuple
+
+class JobStore:
+    """
+    SQLite persistence for job records (WAL mode).
+    Each job is one row keyed by id, with its status in an indexed column and the full
+    record as JSON, so a status change rewrites a single row instead of the whole history.
+    Workers in several processes share the queue through leases: a claimed job carries its
+    owner and an expiry time, and becomes claimable again once the lease lapses.
+    """
+
+    def __init__(self, db_path: str = "jobs.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        # Autocommit mode; multi-row writes use explicit transactions
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT NOT NULL UNIQUE,"
+            " status TEXT NOT NULL DEFAULT '',"
+            " data TEXT NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs(status)")
+        columns = {row[1] for row in self.conn.execute("PRAGMA table_info(jobs)")}
+        if "lease_owner" not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN lease_owner TEXT")
+        if "lease_expires" not in columns:
+            self.conn.execute("ALTER TABLE jobs ADD COLUMN lease_expires REAL NOT NULL DEFAULT 0")
+        self.conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    def load_all(self) -> List[dict]:
+        """Returns every job in insertion order."""
+        with self._lock:
+            rows = self.conn.execute("SELECT data FROM jobs ORDER BY rowid").fetchall()
+        return [json.loads(data) for (data,) in rows]
+
+    def get(self, job_id: str) -> Optional[dict]:
+        with self._lock:
+            row = self.conn.execute("SELECT data FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def write(self, rows: Sequence[Tuple[str, str, str]], deleted: Iterable[str] = ()):
+        """Upserts (id, status, json) rows and deletes the given ids in one transaction."""
+        deleted = list(deleted)
+        if not rows and not deleted:
+            return
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                self.conn.executemany(
+                    "INSERT INTO jobs (id, status, data) VALUES (?, ?, ?) "
+                    "ON CONFLICT(id) DO UPDATE SET status = excluded.status, data = excluded.data",
+                    rows,
+                )
+                self.conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in deleted])
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    @staticmethod
+    def _status_clause(statuses: Iterable[str], prefixes: Iterable[str] = ()) -> Tuple[str, list]:
+        statuses = list(statuses)
+        clauses, params = [], []
+        if statuses:
+            clauses.append(f"status IN ({', '.join('?' for _ in statuses)})")
+            params.extend(statuses)
+        for prefix in prefixes:
+            # Range form of a prefix match, so the status index is used
+            clauses.append("(status >= ? AND status < ?)")
+            params.extend([prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)])
+        return " OR ".join(clauses), params
+
+    def ids_with_status(self, statuses: Iterable[str], prefixes: Iterable[str] = ()) -> List[str]:
+        """Returns ids (in insertion order) whose status is in statuses or starts with one of prefixes."""
+        clause, params = self._status_clause(statuses, prefixes)
+        if not clause:
+            return []
+        query = f"SELECT id FROM jobs WHERE {clause} ORDER BY rowid"
+        with self._lock:
+            return [job_id for (job_id,) in self.conn.execute(query, params).fetchall()]
+
+    def claim(self, owner: str, lease_seconds: float, statuses: Iterable[str], prefixes: Iterable[str] = (),
+              exclude: Iterable[str] = (), only: Optional[Iterable[str]] = None) -> Optional[dict]:
+        """
+        Atomically leases the oldest job with a matching status that is not leased (or whose lease
+        has lapsed) to owner, optionally only among the ids in only. Returns the job record, or
+        None if nothing is claimable.
+        """
+        clause, params = self._status_clause(statuses, prefixes)
+        if not clause:
+            return None
+        exclude = list(exclude)
+        now = time.time()
+        query = f"SELECT id, data FROM jobs WHERE ({clause}) AND lease_expires < ?"
+        params.append(now)
+        if exclude:
+            query += f" AND id NOT IN ({', '.join('?' for _ in exclude)})"
+            params.extend(exclude)
+        if only is not None:
+            only = list(only)
+            if not only:
+                return None
+            query += f" AND id IN ({', '.join('?' for _ in only)})"
+            params.extend(only)
+        query += " ORDER BY rowid LIMIT 1"
+        with self._lock:
+            # IMMEDIATE takes the write lock up front, so two workers cannot claim the same row
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute(query, params).fetchone()
+                if row:
+                    self.conn.execute(
+                        "UPDATE jobs SET lease_owner = ?, lease_expires = ? WHERE id = ?",
+                        (owner, now + lease_seconds, row[0]),
+                    )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return json.loads(row[1]) if row else None
+
+    def transition_unleased(self, statuses: Iterable[str], prefixes: Iterable[str], update: Callable[[dict], bool]) -> List[dict]:
+        """
+        Applies update to every job with a matching status that no worker holds a live lease on,
+        in one transaction, and writes back the jobs it changed (update returns True for those).
+        Returns the changed records.
+        """
+        clause, params = self._status_clause(statuses, prefixes)
+        if not clause:
+            return []
+        query = f"SELECT data FROM jobs WHERE ({clause}) AND lease_expires < ? ORDER BY rowid"
+        params.append(time.time())
+        changed = []
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                for (data,) in self.conn.execute(query, params).fetchall():
+                    job = json.loads(data)
+                    if update(job):
+                        changed.append(job)
+                self.conn.executemany(
+                    "UPDATE jobs SET status = ?, data = ? WHERE id = ?",
+                    [(job.get('status', ''), json.dumps(job), job['id']) for job in changed],
+                )
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return changed
+
+    def renew_lease(self, job_id: str, owner: str, lease_seconds: float) -> bool:
+        """Extends owner's lease on a job. Returns False if the lease was lost to another worker."""
+        with self._lock:
+            cursor = self.conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND lease_owner = ?",
+                (time.time() + lease_seconds, job_id, owner),
+            )
+        return cursor.rowcount == 1
+
+    def release_lease(self, job_id: str, owner: str):
+        with self._lock:
+            self.conn.execute(
+                "UPDATE jobs SET lease_owner = NULL, lease_expires = 0 WHERE id = ? AND lease_owner = ?",
+                (job_id, owner),
+            )
+
+    def lease_owner(self, job_id: str) -> Optional[str]:
+        """Returns the worker currently holding an unexpired lease on the job, if any."""
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT lease_owner FROM jobs WHERE id = ? AND lease_expires >= ?", (job_id, time.time())
+            ).fetchone()
+        return row[0] if row else None
+
+    def get_meta(self, key: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key: str, value: str):
+        with self._lock:
+            self.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
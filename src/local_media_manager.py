@@ -2,9 +2,16 @@ import os
 from typing import List, Dict
 
 class LocalMediaManager:
+    # Uploads whose audio is demuxed into the job's scratch dir before processing
+    VIDEO_EXTENSIONS = {".mp4", ".mkv"}
+
     def __init__(self, uploads_dir: str = "uploads"):
         self.uploads_dir = uploads_dir
-        self.supported_extensions = {".mp3", ".mp4", ".m4a", ".wav", ".mkv"}
+        self.supported_extensions = {".mp3", ".m4a", ".wav"} | self.VIDEO_EXTENSIONS
+
+    @staticmethod
+    def is_video(file_path: str) -> bool:
+        return os.path.splitext(file_path)[1].lower() in LocalMediaManager.VIDEO_EXTENSIONS
 
     def get_available_files(self) -> List[str]:
         """Returns a list of supported media files in the uploads directory, sorted by modification time."""
@@ -4,10 +4,11 @@ from src.prompts import NOTE_GENERATION_PROMPT
 
 class NoteGenerationService:
     @staticmethod
-    def generate(transcript_path: str, output_path: str, prompt_text: str = None) -> bool:
+    def generate(transcript_path: str, output_path: str, prompt_text: str = None, api: GeminiAPIWrapper = None) -> bool:
         """
         Generates notes from a transcript file.
         Saves the notes to output_path.
+        Reuses the given api wrapper; otherwise a temporary one is created and closed afterwards.
         """
         if not os.path.exists(transcript_path):
             print(f"      ❌ Transcript file not found: {transcript_path}")
@@ -20,12 +21,17 @@ class NoteGenerationService:
             with open(transcript_path, 'r', encoding='utf-8') as f:
                 transcript_content = f.read()
             
-            api = GeminiAPIWrapper()
-            notes = api.generate_content(
-                prompt=f"TRANSCRIPT:\n{transcript_content}",
-                model_type="note",
-                system_instruction=prompt_text
-            )
+            owned_api = api is None
+            api = api or GeminiAPIWrapper()
+            try:
+                notes = api.generate_content(
+                    prompt=f"TRANSCRIPT:\n{transcript_content}",
+                    model_type="note",
+                    system_instruction=prompt_text
+                )
+            finally:
+                if owned_api:
+                    api.close()
             
             if notes:
                 out_dir = os.path.dirname(output_path)
@@ -41,4 +47,49 @@ class NoteGenerationService:
                 return False
         except Exception as e:
             print(f"      ❌ Note generation failed: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    @staticmethod
+    async def generate_async(transcript_path: str, output_path: str, prompt_text: str = None, api: GeminiAPIWrapper = None) -> bool:
+        """
+        Async counterpart of generate that awaits the Gemini call on the running event loop.
+        Reuses the given api wrapper instead of creating a new one.
+        """
+        if not os.path.exists(transcript_path):
+            print(f"      ❌ Transcript file not found: {transcript_path}")
+            return False
+
+        if prompt_text is None:
+            prompt_text = NOTE_GENERATION_PROMPT
+
+        try:
+            with open(transcript_path, 'r', encoding='utf-8') as f:
+                transcript_content = f.read()
+            
+            owned_api = api is None
+            api = api or GeminiAPIWrapper()
+            try:
+                notes = await api.generate_content_async(
+                    prompt=f"TRANSCRIPT:\n{transcript_content}",
+                    model_type="note",
+                    system_instruction=prompt_text
+                )
+            finally:
+                if owned_api:
+                    await api.aclose()
+            
+            if notes:
+                out_dir = os.path.dirname(output_path)
+                if out_dir and not os.path.exists(out_dir):
+                    os.makedirs(out_dir, exist_ok=True)
+                    
+                with open(output_path, 'w', encoding='utf-8') as f:
+                    f.write(notes)
+                
+                return True
+            else:
+                print("      ⚠️ Warning: No notes extracted.")
+                return False
+        except Exception as e:
+            print(f"      ❌ Note generation failed: {str(e)}")
+            return False
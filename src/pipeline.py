@@ -1,313 +1,836 @@
 import os
 import time
-import shutil
-from src.downloader import download_audio, get_expected_audio_path
-from src.audio_processor import AudioProcessor
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Optional
+from src.downloader import download_audio, download_audio_async, get_expected_audio_path
+from src.audio_processor import AudioProcessor, ENCODING_PROFILES, DEFAULT_ENCODING_PROFILE, MIN_TEMPO, MAX_TEMPO
 from src.note_generation_service import NoteGenerationService
 from src.cleanup_service import FileCleanupService
+from src.chunk_manifest import ChunkManifest
+from src.voice_activity import SpeechMap, VoiceActivityDetector, NonSpeechClassifier, subtract_regions
+from src.transcript_cache import TranscriptCache
 from src.gemini_api_wrapper import GeminiAPIWrapper
 from src.prompts import TRANSCRIPTION_PROMPT
 from src.job_manager import JobManager
+from src.local_media_manager import LocalMediaManager
 from src.notion_service import NotionService
 from src.notion_config_manager import NotionConfigManager
 from src.rclone_service import RcloneService
 from src.rclone_config_manager import RcloneConfigManager
 
 class ProcessingPipeline:
-    def __init__(self, config_manager, api_wrapper=None, job_manager=None):
+    def __init__(self, config_manager, api_wrapper=None, job_manager=None, transcript_cache=None):
         self.config = config_manager
         self.manager = job_manager or JobManager()
         self.api = api_wrapper or GeminiAPIWrapper()
         self.notion_config = NotionConfigManager()
         self.rclone_config = RcloneConfigManager()
         self.rclone_service = RcloneService()
+        self._transcript_cache = transcript_cache
+        self._cache_lock = threading.Lock()
+
+    @property
+    def transcript_cache(self):
+        """The shared transcript cache, opened on first use; None when caching is disabled."""
+        if self._transcript_cache is None and self.config.get("transcript_cache_enabled", False):
+            with self._cache_lock:
+                if self._transcript_cache is None:
+                    self._transcript_cache = TranscriptCache.from_config(self.config)
+        return self._transcript_cache
+
+    def close(self):
+        """Releases the pooled HTTP connections held by the API wrapper."""
+        self.api.close()
+        if self._transcript_cache is not None:
+            self._transcript_cache.close()
+
+    async def aclose(self):
+        """Closes the API wrapper's client for the running event loop."""
+        await self.api.aclose()
+        if self._transcript_cache is not None:
+            self._transcript_cache.close()
+
+    # Ordered stages a job passes through; each can run on its own worker pool
+    STAGES = ["download", "audio", "transcribe", "notes"]
+    TEMP_ROOT = "temp"
+
+    def create_context(self, job) -> dict:
+        """Creates the per-job state that is carried from one stage to the next."""
+        return {
+            "job": job,
+            "temp_dir": self._scratch_dir(job),
+            "audio_path": None,
+            "source_path": None,
+            "prepared_path": None,
+            "chunks": [],
+            "manifest": None,
+            "transcript_path": None,
+            "final_notes_path": None,
+        }
+
+    def _scratch_dir(self, job) -> str:
+        """
+        Returns the job's own directory under temp/. Jobs that were already past download before
+        scratch directories existed keep working from the shared temp/ they started in.
+        """
+        if not job.get("scratch_dir"):
+            status = job.get('status', '')
+            if status == 'failed':
+                status = job.get('last_granular_state', '')
+            if status in ['SILENCE_REMOVED', 'BITRATE_MODIFIED', 'CHUNKED'] or status.startswith('TRANSCRIBING_CHUNK_'):
+                return self.TEMP_ROOT
+        return os.path.join(self.TEMP_ROOT, str(job['id']).replace("/", "_"))
+
+    def _register_scratch_dir(self, ctx: dict):
+        """Records the scratch directory in the job record, so cleanup can remove it in one go."""
+        job = ctx["job"]
+        temp_dir = ctx["temp_dir"]
+        if temp_dir != self.TEMP_ROOT and job.get("scratch_dir") != temp_dir:
+            job["scratch_dir"] = temp_dir
+            self.manager.update_job(job['id'], scratch_dir=temp_dir)
 
     def execute_job(self, job) -> bool:
         """
         Executes the full pipeline for a single job with resumption support.
         Supports both URL-based and local file-based jobs.
         """
+        ctx = self.create_context(job)
+        for stage in self.STAGES:
+            if not self.run_stage(stage, ctx):
+                return False
+        return True
+
+    async def execute_job_async(self, job) -> bool:
+        """
+        Async-native counterpart of execute_job.
+        Gemini calls are awaited directly and ffmpeg/yt-dlp run as asyncio subprocesses,
+        so many jobs can share a single event loop.
+        """
+        ctx = self.create_context(job)
+        for stage in self.STAGES:
+            if not await self.run_stage_async(stage, ctx):
+                return False
+        return True
+
+    @staticmethod
+    def _lease_lost(job) -> bool:
+        """True once another worker has taken the job over (see JobManager.fence_job)."""
+        if job.get("lease_lost"):
+            print(f"⛔ Lost the lease on job {job['id']} to another worker; stopping it here.")
+            return True
+        return False
+
+    def run_stage(self, stage: str, ctx: dict) -> bool:
+        """
+        Runs a single named stage for the job in ctx.
+        Returns False (and marks the job failed on exceptions) if the job cannot continue.
+        """
+        job = ctx["job"]
+        if self._lease_lost(job):
+            return False
+        try:
+            return getattr(self, f"_stage_{stage}")(ctx)
+        except Exception as e:
+            print(f"❌ Exception in pipeline for job {job['id']}: {e}")
+            self.manager.update_job_status(job['id'], 'failed')
+            return False
+
+    async def run_stage_async(self, stage: str, ctx: dict) -> bool:
+        """Async counterpart of run_stage."""
+        job = ctx["job"]
+        if self._lease_lost(job):
+            return False
+        try:
+            return await getattr(self, f"_stage_{stage}_async")(ctx)
+        except Exception as e:
+            print(f"❌ Exception in pipeline for job {job['id']}: {e}")
+            self.manager.update_job_status(job['id'], 'failed')
+            return False
+
+    # --- Stage 1: Source acquisition (download or local file) ---
+
+    def _check_source(self, ctx: dict):
+        """
+        Resolves the job's source audio without downloading.
+        Returns True if the source is ready, False if the job failed, or None if a download is needed.
+        """
+        job = ctx["job"]
+        temp_dir = ctx["temp_dir"]
+        if not os.path.exists(temp_dir):
+            os.makedirs(temp_dir, exist_ok=True)
+        self._register_scratch_dir(ctx)
+
+        is_local = "file_path" in job
         
-        audio_path = None
-        chunks = []
-        transcript_path = None
-        notes_path = None
+        if is_local:
+            audio_path = job["file_path"]
+            if not os.path.exists(audio_path):
+                print(f"❌ Local file missing: {audio_path}")
+                self.manager.update_job_status(job['id'], 'failed')
+                return False
+            print(f"📂 [1/4] Using local file: {audio_path}")
+            # Ensure status is at least DOWNLOADED for local files to enter next step
+            if job.get('status') == 'queue' or job.get('status') == 'downloading':
+                job['status'] = 'DOWNLOADED'
+                self.manager.update_job_status(job['id'], 'DOWNLOADED')
+            ctx["audio_path"] = audio_path
+            return True
+
+        # URL-based: 1. Download
+        audio_path = get_expected_audio_path(job)
+        ready_states = ['DOWNLOADED', 'SILENCE_REMOVED', 'BITRATE_MODIFIED', 'CHUNKED']
+        if job.get('status') in ready_states or job.get('status', '').startswith('TRANSCRIBING_CHUNK_'):
+            if os.path.exists(audio_path):
+                print(f"⏩ Skipping download: {audio_path} already exists.")
+                ctx["audio_path"] = audio_path
+                return True
+        elif os.path.exists(audio_path):
+            print(f"⏩ Audio file {audio_path} already exists. Skipping download and setting status to DOWNLOADED.")
+            job['status'] = 'DOWNLOADED'
+            self.manager.update_job_status(job['id'], 'DOWNLOADED')
+            ctx["audio_path"] = audio_path
+            return True
+
+        print(f"📥 [1/4] Downloading audio for: {job['name']}...")
+        self.manager.update_job_status(job['id'], 'downloading')
+        return None
+
+    def _extract_local_audio(self, ctx: dict):
+        """Points a local video job at its speech track, demuxed into the scratch dir, before the audio is prepared."""
+        job = ctx["job"]
+        if ("file_path" not in job or job.get('status') != 'DOWNLOADED' or not LocalMediaManager.is_video(ctx["audio_path"])
+                or not self.config.get("extract_video_audio", True)):
+            return
+        extracted = AudioProcessor.extract_audio(ctx["audio_path"], ctx["temp_dir"])
+        if extracted:
+            # The upload itself is still removed once the job completes
+            ctx["source_path"] = ctx["audio_path"]
+            ctx["audio_path"] = extracted
+
+    def _finish_download(self, ctx: dict, audio_path) -> bool:
+        job = ctx["job"]
+        if not audio_path or not os.path.exists(audio_path):
+            print(f"❌ Download failed or file missing for job: {job['name']}")
+            self.manager.update_job_status(job['id'], 'failed')
+            return False
+        self.manager.update_job_status(job['id'], 'DOWNLOADED')
+        job['status'] = 'DOWNLOADED'
+        ctx["audio_path"] = audio_path
+        return True
+
+    def _stage_download(self, ctx: dict) -> bool:
+        ready = self._check_source(ctx)
+        if ready:
+            self._extract_local_audio(ctx)
+        if ready is not None:
+            return ready
+        return self._finish_download(ctx, download_audio(ctx["job"]))
+
+    async def _stage_download_async(self, ctx: dict) -> bool:
+        ready = self._check_source(ctx)
+        if ready:
+            await asyncio.to_thread(self._extract_local_audio, ctx)
+        if ready is not None:
+            return ready
+        return self._finish_download(ctx, await download_audio_async(ctx["job"]))
+
+    # --- Stage 2: Audio preparation (optimization and chunking) ---
+
+    def _encoding_profile(self) -> str:
+        name = self.config.get("audio_profile", DEFAULT_ENCODING_PROFILE)
+        if name not in ENCODING_PROFILES:
+            raise ValueError(f"Unknown audio_profile '{name}' (choose from {', '.join(ENCODING_PROFILES)})")
+        return name
+
+    def _audio_extension(self) -> str:
+        """Extension of prepared audio and chunks, which also sets the MIME type they are sent with."""
+        return ENCODING_PROFILES[self._encoding_profile()].extension
+
+    def _tempo(self, ctx: dict) -> float:
+        """
+        Speed-up applied while preparing the job's audio. The first prep records it on the job, so a
+        resumed job keeps the tempo its existing chunks were made with even if the config changed.
+        """
+        job = ctx["job"]
+        if "audio_tempo" not in job:
+            tempo = float(self.config.get("audio_tempo", 1.0))
+            if not MIN_TEMPO <= tempo <= MAX_TEMPO:
+                raise ValueError(f"audio_tempo {tempo:g} is outside {MIN_TEMPO:g}-{MAX_TEMPO:g}")
+            job["audio_tempo"] = tempo
+            if tempo != 1.0:
+                self.manager.update_job(job['id'], audio_tempo=tempo)
+        return float(job["audio_tempo"])
+
+    def _needs_optimization(self, ctx: dict) -> bool:
+        """Sets the prepared path and returns True if the optimization pass still has to run."""
+        job = ctx["job"]
+        audio_path = ctx["audio_path"]
+        base_name = os.path.splitext(os.path.basename(audio_path))[0]
+        # Use the profile's extension for the prepared file so its container matches the encode
+        prepared_path = os.path.join(ctx["temp_dir"], f"{base_name}_prepared{self._audio_extension()}")
+        ctx["prepared_path"] = prepared_path
+
+        # 2.1 Optimization (Silence, Bitrate, Mono, 16kHz)
+        if job.get('status') != 'DOWNLOADED':
+            return False
+        print(f"✂️ [2/4] Optimizing audio (single pass): {audio_path}")
+        if os.path.exists(prepared_path):
+            print(f"⏩ Prepared audio already exists.")
+            self.manager.update_job_status(job['id'], 'BITRATE_MODIFIED')
+            job['status'] = 'BITRATE_MODIFIED'
+            return False
+        return True
+
+    def _fused_prep(self, ctx: dict) -> Optional[str]:
+        """
+        Returns the prep mode when the job is optimized and chunked straight from the download:
+        "fused" (one ffmpeg pass), "parallel" (one ffmpeg pass per time range) or "vad" (only the
+        speech found by voice activity detection is encoded). None otherwise.
+        """
+        mode = self.config.get("audio_prep_mode", "separate")
+        if ctx["job"].get('status') != 'DOWNLOADED' or mode not in ("fused", "parallel", "vad"):
+            return None
+        print(f"✂️ [2/4] Optimizing and chunking audio ({mode} pass): {ctx['audio_path']}")
+        return mode
+
+    def _fused_args(self, ctx: dict, mode: str) -> dict:
+        args = self._chunking_args(ctx)
+        del args["output_dir"]
+        args["profile"] = self._encoding_profile()
+        args["tempo"] = self._tempo(ctx)
+        if mode in ("parallel", "vad"):
+            args["workers"] = self.config.get_prep_workers()
+        return args
+
+    def _speech_map(self, ctx: dict) -> SpeechMap:
+        """Loads the job's speech map, or runs voice activity detection on the download to make one."""
+        path = SpeechMap.path_for(ctx["temp_dir"], ctx["job"]["id"])
+        speech_map = SpeechMap.load(path)
+        if speech_map is None:
+            print(f"🗣️ Detecting speech in {ctx['audio_path']}...")
+            speech_map = VoiceActivityDetector.from_config(self.config).detect(ctx["audio_path"], path)
+            regions = self._non_speech_regions(ctx, ctx["audio_path"])
+            if regions:
+                before = speech_map.speech_seconds
+                speech_map.segments = subtract_regions(speech_map.segments, regions)
+                speech_map.save()
+                self._record_non_speech(ctx, before - speech_map.speech_seconds)
+        else:
+            print(f"⏩ Speech map already exists.")
+        saved = speech_map.duration - speech_map.speech_seconds
+        print(f"   - {len(speech_map.segments)} speech segment(s), {saved:.0f}s of {speech_map.duration:.0f}s is not speech.")
+        return speech_map
+
+    def _non_speech_regions(self, ctx: dict, audio_path: str) -> list:
+        """Music and other long non-speech regions of audio_path, when the non-speech filter is on."""
+        if not self.config.get("non_speech_filter_enabled", False) or "non_speech_removed" in ctx["job"]:
+            return []
+        print(f"🎵 Looking for music and non-speech stretches in {audio_path}...")
+        duration, regions = NonSpeechClassifier.from_config(self.config).classify(audio_path)
+        if not regions:
+            self._record_non_speech(ctx, 0.0)
+        return regions
+
+    def _record_non_speech(self, ctx: dict, seconds: float):
+        job = ctx["job"]
+        if seconds:
+            print(f"   - Removed {seconds:.0f}s of music/non-speech audio.")
+        job["non_speech_removed"] = round(seconds, 1)
+        self.manager.update_job(job['id'], non_speech_removed=job["non_speech_removed"])
+
+    def _excise_non_speech(self, ctx: dict):
+        """Cuts music and non-speech regions out of the prepared audio (without re-encoding it) before it is chunked."""
+        prepared_path = ctx["prepared_path"]
+        regions = self._non_speech_regions(ctx, prepared_path)
+        if not regions:
+            return
+        duration = AudioProcessor.get_duration(prepared_path)
+        keep = subtract_regions([(0.0, duration)], regions)
+        base, extension = os.path.splitext(prepared_path)
+        excised_path = f"{base}_excised{extension}"
+        if not keep or not AudioProcessor.excise(prepared_path, excised_path, keep):
+            print(f"⚠️ Keeping the prepared audio as it is.")
+            return
+        os.replace(excised_path, prepared_path)
+        self._record_non_speech(ctx, duration - sum(end - start for start, end in keep))
+
+    def _prepare_chunks(self, ctx: dict, mode: str) -> list:
+        args = self._fused_args(ctx, mode)
+        if mode == "vad":
+            return AudioProcessor.optimize_speech(ctx["audio_path"], speech_map=self._speech_map(ctx), **args)
+        if mode == "parallel":
+            return AudioProcessor.optimize_parallel(ctx["audio_path"], **args)
+        return AudioProcessor.optimize_and_segment(ctx["audio_path"], **args)
+
+    async def _prepare_chunks_async(self, ctx: dict, mode: str) -> list:
+        args = self._fused_args(ctx, mode)
+        if mode == "vad":
+            # Decoding and analysing the whole recording is blocking work
+            speech_map = await asyncio.to_thread(self._speech_map, ctx)
+            return await AudioProcessor.optimize_speech_async(ctx["audio_path"], speech_map=speech_map, **args)
+        if mode == "parallel":
+            return await AudioProcessor.optimize_parallel_async(ctx["audio_path"], **args)
+        return await AudioProcessor.optimize_and_segment_async(ctx["audio_path"], **args)
+
+    def _passthrough(self, ctx: dict) -> bool:
+        """True when re-encoding would not shrink the source enough, so it is chunked as it is."""
+        if not self.config.get("passthrough_enabled", True):
+            return False
+        return not AudioProcessor.should_reencode(
+            ctx["audio_path"], profile=self._encoding_profile(), tempo=self._tempo(ctx),
+            min_saving=float(self.config.get("passthrough_min_saving", 0.1)),
+        )
+
+    def _finish_optimization(self, ctx: dict, optimized: bool):
+        job = ctx["job"]
+        if not optimized:
+            # Passed through (or the encode failed): the source itself is chunked, linked rather than copied
+            AudioProcessor.link_or_copy(ctx["audio_path"], ctx["prepared_path"])
+        self.manager.update_job_status(job['id'], 'BITRATE_MODIFIED')
+        job['status'] = 'BITRATE_MODIFIED'
+
+    def _manifest_path(self, ctx: dict) -> str:
+        return ChunkManifest.path_for(ctx["temp_dir"], ctx["job"]["id"])
+
+    def _find_chunks(self, ctx: dict) -> list:
+        """Scans temp for chunk files; only used for jobs chunked before manifests were recorded."""
+        temp_dir = ctx["temp_dir"]
+        return sorted([os.path.join(temp_dir, f) for f in os.listdir(temp_dir) if f.startswith(f"job_{ctx['job']['id']}_chunk_")])
+
+    def _remove_stale_chunks(self, ctx: dict):
+        """Deletes chunk files from an interrupted split, which a shorter re-split would not overwrite."""
+        for chunk in self._find_chunks(ctx):
+            os.remove(chunk)
+
+    def _chunking_args(self, ctx: dict) -> dict:
+        segment_time = self.config.get("segment_time", 1800)
+        print(f"✂️ Splitting audio into chunks based on time ({segment_time}s)...")
+        return {
+            "segment_time": segment_time,
+            "max_size_mb": self.config.get("max_chunk_size_mb", 15),
+            "output_dir": ctx["temp_dir"],
+            "output_pattern": os.path.join(ctx["temp_dir"], f"job_{ctx['job']['id']}_chunk_%03d{self._audio_extension()}"),
+        }
+
+    def _record_chunks(self, ctx: dict, chunks: list):
+        """Writes the manifest for freshly produced chunks (sizes, durations and checksums)."""
+        if not chunks:
+            return None
+        return ChunkManifest.create(self._manifest_path(ctx), chunks, AudioProcessor.get_duration)
+
+    def _use_manifest(self, ctx: dict, manifest: ChunkManifest):
+        ctx["manifest"] = manifest
+        ctx["chunks"] = manifest.paths
+
+    def _finish_chunking(self, ctx: dict, manifest, created: bool) -> bool:
+        job = ctx["job"]
+        if manifest is None or not manifest.chunks:
+            print(f"❌ Error: Chunking failed to produce chunks for job {job['id']}")
+            self.manager.update_job_status(job['id'], 'failed')
+            return False
+        if not created:
+            print(f"⏩ Skipping chunking: {len(manifest.chunks)} chunk(s) already recorded.")
+        self.manager.update_job_status(job['id'], 'CHUNKED')
+        job['status'] = 'CHUNKED'
+        self._use_manifest(ctx, manifest)
+        return True
+
+    def _verify_chunks(self, ctx: dict) -> bool:
+        """Loads the chunk manifest for the next step (Transcription) when resuming a chunked job."""
+        job = ctx["job"]
+        if ctx["manifest"] is None and (job.get('status') == 'CHUNKED' or job.get('status', '').startswith('TRANSCRIBING_CHUNK_')):
+            manifest = ChunkManifest.load(self._manifest_path(ctx))
+            if manifest is None:
+                # Chunked before manifests existed: record the chunks once, all still pending
+                legacy_chunks = self._find_chunks(ctx)
+                if legacy_chunks:
+                    print(f"⏩ Recording a chunk manifest for {len(legacy_chunks)} existing chunk(s).")
+                manifest = self._record_chunks(ctx, legacy_chunks)
+            if manifest is None or not manifest.chunks:
+                print(f"❌ Error: Status is {job['status']} but no chunks found for job {job['id']}")
+                self.manager.update_job_status(job['id'], 'failed')
+                return False
+            self._use_manifest(ctx, manifest)
+        return True
+
+    def _stage_audio(self, ctx: dict) -> bool:
+        job = ctx["job"]
+        mode = self._fused_prep(ctx)
+        if mode:
+            manifest = ChunkManifest.load(self._manifest_path(ctx))
+            created = manifest is None
+            if created:
+                chunks = self._prepare_chunks(ctx, mode)
+                manifest = self._record_chunks(ctx, chunks)
+            if not self._finish_chunking(ctx, manifest, created):
+                return False
+        elif self._needs_optimization(ctx):
+            self._finish_optimization(ctx, not self._passthrough(ctx) and AudioProcessor.optimize_audio(
+                ctx["audio_path"], ctx["prepared_path"], profile=self._encoding_profile(), tempo=self._tempo(ctx)
+            ))
+
+        # 2.2 Chunking
+        if job.get('status') == 'BITRATE_MODIFIED':
+            # Chunk files without a manifest are from an interrupted split, so they are redone
+            manifest = ChunkManifest.load(self._manifest_path(ctx))
+            created = manifest is None
+            if created:
+                self._remove_stale_chunks(ctx)
+                self._excise_non_speech(ctx)
+                chunks = AudioProcessor.process_for_transcription(ctx["prepared_path"], **self._chunking_args(ctx))
+                manifest = self._record_chunks(ctx, chunks)
+            if not self._finish_chunking(ctx, manifest, created):
+                return False
+        return self._verify_chunks(ctx)
+
+    async def _stage_audio_async(self, ctx: dict) -> bool:
+        job = ctx["job"]
+        mode = self._fused_prep(ctx)
+        if mode:
+            manifest = ChunkManifest.load(self._manifest_path(ctx))
+            created = manifest is None
+            if created:
+                chunks = await self._prepare_chunks_async(ctx, mode)
+                manifest = await asyncio.to_thread(self._record_chunks, ctx, chunks)
+            if not self._finish_chunking(ctx, manifest, created):
+                return False
+        elif self._needs_optimization(ctx):
+            optimized = False
+            # Probing and scanning for silence is blocking work
+            if not await asyncio.to_thread(self._passthrough, ctx):
+                optimized = await AudioProcessor.optimize_audio_async(
+                    ctx["audio_path"], ctx["prepared_path"], profile=self._encoding_profile(), tempo=self._tempo(ctx)
+                )
+            await asyncio.to_thread(self._finish_optimization, ctx, optimized)
+
+        # 2.2 Chunking
+        if job.get('status') == 'BITRATE_MODIFIED':
+            manifest = ChunkManifest.load(self._manifest_path(ctx))
+            created = manifest is None
+            if created:
+                await asyncio.to_thread(self._remove_stale_chunks, ctx)
+                await asyncio.to_thread(self._excise_non_speech, ctx)
+                chunks = await AudioProcessor.process_for_transcription_async(ctx["prepared_path"], **self._chunking_args(ctx))
+                # Hashing and probing the chunks is blocking work
+                manifest = await asyncio.to_thread(self._record_chunks, ctx, chunks)
+            if not self._finish_chunking(ctx, manifest, created):
+                return False
+        return await asyncio.to_thread(self._verify_chunks, ctx)
+
+    # --- Stage 3: Transcription ---
+
+    def _start_transcription(self, ctx: dict) -> ChunkManifest:
+        """Sets the transcript path and returns the job's chunk manifest."""
+        job = ctx["job"]
+        temp_dir = ctx["temp_dir"]
+        print(f"📝 [3/4] Transcribing {len(ctx['chunks'])} chunks using Gemini...")
+        safe_name = job['name'].replace(" ", "_").replace("/", "-")
+        transcript_path = os.path.join(temp_dir, f"{safe_name}_transcript.txt")
+        ctx["transcript_path"] = transcript_path
         
-        temp_dir = "temp"
+        # Ensure the directory for transcript exists
         if not os.path.exists(temp_dir):
             os.makedirs(temp_dir, exist_ok=True)
 
+        if ctx["manifest"] is None:
+            # Chunks handed over without a manifest (e.g. by a caller driving the stages itself)
+            ctx["manifest"] = ChunkManifest.create(self._manifest_path(ctx), ctx["chunks"])
+        return ctx["manifest"]
+
+    def _chunk_concurrency(self) -> int:
+        """Returns how many chunks of one job may be transcribed at once."""
         try:
-            # 1. Source Acquisition (Download or Local)
-            is_local = "file_path" in job
-            
-            if is_local:
-                audio_path = job["file_path"]
-                if not os.path.exists(audio_path):
-                    print(f"❌ Local file missing: {audio_path}")
-                    self.manager.update_job_status(job['id'], 'failed')
-                    return False
-                print(f"📂 [1/4] Using local file: {audio_path}")
-                # Ensure status is at least DOWNLOADED for local files to enter next step
-                if job.get('status') == 'queue' or job.get('status') == 'downloading':
-                    job['status'] = 'DOWNLOADED'
-                    self.manager.update_job_status(job['id'], 'DOWNLOADED')
-            else:
-                # URL-based: 1. Download
-                audio_path = get_expected_audio_path(job)
-                skip_download = False
-                ready_states = ['DOWNLOADED', 'SILENCE_REMOVED', 'BITRATE_MODIFIED', 'CHUNKED']
-                if job.get('status') in ready_states or job.get('status', '').startswith('TRANSCRIBING_CHUNK_'):
-                    if os.path.exists(audio_path):
-                        print(f"⏩ Skipping download: {audio_path} already exists.")
-                        skip_download = True
-                elif os.path.exists(audio_path):
-                    print(f"⏩ Audio file {audio_path} already exists. Skipping download and setting status to DOWNLOADED.")
-                    job['status'] = 'DOWNLOADED'
-                    self.manager.update_job_status(job['id'], 'DOWNLOADED')
-                    skip_download = True
-                
-                if not skip_download:
-                    print(f"📥 [1/4] Downloading audio for: {job['name']}...")
-                    self.manager.update_job_status(job['id'], 'downloading')
-                    audio_path = download_audio(job)
-                    if not audio_path or not os.path.exists(audio_path):
-                        print(f"❌ Download failed or file missing for job: {job['name']}")
-                        self.manager.update_job_status(job['id'], 'failed')
-                        return False
-                    self.manager.update_job_status(job['id'], 'DOWNLOADED')
-                    job['status'] = 'DOWNLOADED'
-
-            # 2. Audio Processing (Granular steps)
-            base_name = os.path.splitext(os.path.basename(audio_path))[0]
-            # Use .mp3 extension for prepared file to ensure compatibility and trigger conversion
-            prepared_path = os.path.join(temp_dir, f"{base_name}_prepared.mp3")
-            
-            # 2.1 Optimization (Silence, Bitrate, Mono, 16kHz)
-            if job.get('status') == 'DOWNLOADED':
-                print(f"✂️ [2/4] Optimizing audio (single pass): {audio_path}")
-                if not os.path.exists(prepared_path):
-                    if AudioProcessor.optimize_audio(audio_path, prepared_path):
-                        self.manager.update_job_status(job['id'], 'BITRATE_MODIFIED')
-                        job['status'] = 'BITRATE_MODIFIED'
-                    else:
-                        shutil.copy2(audio_path, prepared_path)
-                        self.manager.update_job_status(job['id'], 'BITRATE_MODIFIED')
-                        job['status'] = 'BITRATE_MODIFIED'
-                else:
-                    print(f"⏩ Prepared audio already exists.")
-                    self.manager.update_job_status(job['id'], 'BITRATE_MODIFIED')
-                    job['status'] = 'BITRATE_MODIFIED'
-
-            # 2.2 Chunking
-            if job.get('status') == 'BITRATE_MODIFIED':
-                chunks = sorted([os.path.join(temp_dir, f) for f in os.listdir(temp_dir) if f.startswith(f"job_{job['id']}_chunk_")])
-                if not chunks:
-                    segment_time = self.config.get("segment_time", 1800)
-                    print(f"✂️ Splitting audio into chunks based on time ({segment_time}s)...")
-                    max_size_mb = self.config.get("max_chunk_size_mb", 15)
-                    # Use .mp3 for chunks
-                    output_pattern = os.path.join(temp_dir, f"job_{job['id']}_chunk_%03d.mp3")
-
-                    chunks = AudioProcessor.process_for_transcription(
-                        prepared_path, 
-                        segment_time=segment_time,
-                        max_size_mb=max_size_mb, 
-                        output_dir=temp_dir, 
-                        output_pattern=output_pattern
-                    )
-
-                    if not chunks:
-                        print(f"❌ Error: Chunking failed to produce chunks for job {job['id']}")
-                        self.manager.update_job_status(job['id'], 'failed')
-                        return False
-                    self.manager.update_job_status(job['id'], 'CHUNKED')
-                    job['status'] = 'CHUNKED'
-                else:
-                    print(f"⏩ Skipping chunking: {len(chunks)} chunk(s) already exist.")
-                    self.manager.update_job_status(job['id'], 'CHUNKED')
-                    job['status'] = 'CHUNKED'
-            
-            # Re-verify chunks existence for next step (Transcription)
-            if not chunks and (job.get('status') == 'CHUNKED' or job.get('status', '').startswith('TRANSCRIBING_CHUNK_')):
-                chunks = sorted([os.path.join(temp_dir, f) for f in os.listdir(temp_dir) if f.startswith(f"job_{job['id']}_chunk_")])
-            
-            if not chunks and (job.get('status') == 'CHUNKED' or job.get('status', '').startswith('TRANSCRIBING_CHUNK_')):
-                chunks = sorted([os.path.join(temp_dir, f) for f in os.listdir(temp_dir) if f.startswith(f"job_{job['id']}_chunk_")])
-                if not chunks:
-                    print(f"❌ Error: Status is {job['status']} but no chunks found for job {job['id']}")
-                    self.manager.update_job_status(job['id'], 'failed')
-                    return False
-
-            # 3. Transcription
-            print(f"📝 [3/4] Transcribing {len(chunks)} chunks using Gemini...")
-            safe_name = job['name'].replace(" ", "_").replace("/", "-")
-            transcript_path = os.path.join(temp_dir, f"{safe_name}_transcript.txt")
-            
-            # Ensure the directory for transcript exists
-            if not os.path.exists(temp_dir):
-                os.makedirs(temp_dir, exist_ok=True)
-
-            # Count existing chunks in the transcript file for resumption
-            # Each chunk is separated by \n\n
-            completed_chunks = 0
-            if os.path.exists(transcript_path):
-                with open(transcript_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    # Split by double newline and filter empty parts
-                    completed_chunks = len([p for p in content.split("\n\n") if p.strip()])
-            
-            any_success = completed_chunks > 0
+            configured = int(self.config.get("max_inflight_chunks", 0) or 0)
+        except (TypeError, ValueError):
+            configured = 0
+        if configured > 0:
+            return configured
+        # Auto: one in-flight chunk per usable Gemini account
+        return max(1, int(self.api.available_account_count()))
+
+    def _cache_key(self, chunk: dict) -> str:
+        return TranscriptCache.make_key(chunk["checksum"], self.api.model_name("transcription"), TRANSCRIPTION_PROMPT)
 
-            for i, chunk in enumerate(chunks):
-                chunk_index = i + 1
-                if chunk_index <= completed_chunks:
-                    print(f"      - Chunk {chunk_index}/{len(chunks)} already transcribed in {transcript_path}. Skipping.")
-                    continue
+    def _pending_chunks(self, manifest: ChunkManifest) -> list:
+        """
+        Returns (chunk_index, path) pairs that still need a transcription.
+        Chunks whose audio was transcribed before (same bytes, model and prompt) are filled in
+        from the transcript cache without an API call.
+        """
+        pending_indexes = {chunk["index"] for chunk in manifest.pending()}
+        cache = self.transcript_cache
+        pending = []
+        for chunk in manifest.chunks:
+            if chunk["index"] not in pending_indexes:
+                print(f"      - Chunk {chunk['index']}/{len(manifest.chunks)} already transcribed. Skipping.")
+                continue
+            cached = cache.get(self._cache_key(chunk)) if cache is not None else None
+            if cached:
+                print(f"      - Chunk {chunk['index']}/{len(manifest.chunks)} found in transcript cache.")
+                manifest.mark_done(chunk["index"], cached)
+                continue
+            pending.append((chunk["index"], chunk["path"]))
+        return pending
+
+    def _dispatch_chunk(self, ctx: dict, chunk_index: int):
+        print(f"      - Processing chunk {chunk_index}/{len(ctx['chunks'])}...")
+        self.manager.update_job_status(ctx["job"]['id'], f'TRANSCRIBING_CHUNK_{chunk_index}')
 
-                if any_success: # If we processed at least one chunk (resumed or new)
-                    print(f"      - Waiting before next chunk...")
-                    self.api.backoff_manager.sync_sleep(0) # Start with base delay
+    def _collect_transcript(self, ctx: dict, chunk_index: int, text, error) -> bool:
+        """Saves a finished chunk's transcript part; returns False (and fails the job) on an error or empty text."""
+        if error is not None:
+            return self._transcription_failed(ctx, chunk_index, error)
+        if not text:
+            print(f"      ⚠️ Warning: No text extracted from chunk {chunk_index}")
+            self.manager.update_job_status(ctx["job"]['id'], 'failed')
+            return False
+        ctx["manifest"].mark_done(chunk_index, text)
+        cache = self.transcript_cache
+        if cache is not None:
+            cache.put(self._cache_key(ctx["manifest"].entry(chunk_index)), text, self.api.model_name("transcription"))
+        return True
 
-                print(f"      - Processing chunk {chunk_index}/{len(chunks)}...")
+    def _transcription_failed(self, ctx: dict, chunk_index: int, error: Exception) -> bool:
+        print(f"      ❌ Failed to get transcription for chunk {chunk_index}: {str(error)}")
+        self.manager.update_job_status(ctx["job"]['id'], 'failed')
+        return False
 
-                self.manager.update_job_status(job['id'], f'TRANSCRIBING_CHUNK_{chunk_index}')
+    def _finish_transcription(self, ctx: dict) -> bool:
+        job = ctx["job"]
+        if not ctx["manifest"].is_complete():
+            print(f"❌ Transcription failed for job: {job['name']}")
+            self.manager.update_job_status(job['id'], 'failed')
+            return False
+        ctx["manifest"].assemble(ctx["transcript_path"])
+        print(f"   - Transcription complete: {ctx['transcript_path']}")
+        return True
+
+    def _transcribe_chunk(self, chunk: str):
+        return self.api.generate_content_with_file(
+            file_path=chunk,
+            prompt="Please transcribe this audio chunk.",
+            model_type="transcription",
+            system_instruction=TRANSCRIPTION_PROMPT
+        )
+
+    async def _transcribe_chunk_async(self, chunk: str):
+        return await self.api.generate_content_with_file_async(
+            file_path=chunk,
+            prompt="Please transcribe this audio chunk.",
+            model_type="transcription",
+            system_instruction=TRANSCRIPTION_PROMPT
+        )
+
+    def _stage_transcribe(self, ctx: dict) -> bool:
+        """
+        Fans the job's chunks out over up to _chunk_concurrency() requests at a time.
+        Each finished chunk is recorded in the manifest as soon as it completes, in any order,
+        so an interrupted job resumes with exactly the chunks that are still pending.
+        """
+        manifest = self._start_transcription(ctx)
+        pending = iter(self._pending_chunks(manifest))
+        limit = self._chunk_concurrency()
+        if limit > 1:
+            print(f"      - Transcribing up to {limit} chunks in parallel...")
+
+        failed = False
+        in_flight = {}
+        with ThreadPoolExecutor(max_workers=limit, thread_name_prefix="zaknotes-chunk") as pool:
+            while True:
+                while not failed and len(in_flight) < limit:
+                    item = next(pending, None)
+                    if item is None:
+                        break
+                    chunk_index, chunk = item
+                    self._dispatch_chunk(ctx, chunk_index)
+                    in_flight[pool.submit(self._transcribe_chunk, chunk)] = chunk_index
+                if not in_flight:
+                    break
+
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    chunk_index = in_flight.pop(future)
+                    try:
+                        text, error = future.result(), None
+                    except Exception as e:
+                        text, error = None, e
+                    if not self._collect_transcript(ctx, chunk_index, text, error):
+                        failed = True
+
+        if failed:
+            return False
+        return self._finish_transcription(ctx)
+
+    async def _stage_transcribe_async(self, ctx: dict) -> bool:
+        """Async counterpart of _stage_transcribe using tasks on the running loop."""
+        manifest = self._start_transcription(ctx)
+        pending = iter(await asyncio.to_thread(self._pending_chunks, manifest))
+        limit = self._chunk_concurrency()
+        if limit > 1:
+            print(f"      - Transcribing up to {limit} chunks in parallel...")
+
+        failed = False
+        in_flight = {}
+        while True:
+            while not failed and len(in_flight) < limit:
+                item = next(pending, None)
+                if item is None:
+                    break
+                chunk_index, chunk = item
+                self._dispatch_chunk(ctx, chunk_index)
+                in_flight[asyncio.ensure_future(self._transcribe_chunk_async(chunk))] = chunk_index
+            if not in_flight:
+                break
+
+            done, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                chunk_index = in_flight.pop(task)
                 try:
-                    text = self.api.generate_content_with_file(
-                        file_path=chunk,
-                        prompt="Please transcribe this audio chunk.",
-                        model_type="transcription",
-                        system_instruction=TRANSCRIPTION_PROMPT
-                    )
-                    if text:
-                        with open(transcript_path, 'a', encoding='utf-8') as f:
-                            f.write(text)
-                            f.write("\n\n")
-                        any_success = True
-                    else:
-                        print(f"      ⚠️ Warning: No text extracted from chunk {chunk_index}")
-                        self.manager.update_job_status(job['id'], 'failed')
-                        return False
+                    text, error = task.result(), None
                 except Exception as e:
-                    print(f"      ❌ Failed to get transcription for chunk {chunk_index}: {str(e)}")
-                    self.manager.update_job_status(job['id'], 'failed')
-                    return False
+                    text, error = None, e
+                if not self._collect_transcript(ctx, chunk_index, text, error):
+                    failed = True
 
-            if not any_success:
-                print(f"❌ Transcription failed for job: {job['name']}")
-                self.manager.update_job_status(job['id'], 'failed')
-                return False
-            print(f"   - Transcription complete: {transcript_path}")
-
-            # 4. Note Generation
-            print(f"🗒️ [4/4] Generating study notes...")
-            safe_name = job['name'].replace(" ", "_").replace("/", "-")
-            notes_dir = "notes"
-            if not os.path.exists(notes_dir):
-                os.makedirs(notes_dir, exist_ok=True)
+        if failed:
+            return False
+        return self._finish_transcription(ctx)
+
+    # --- Stage 4: Note generation, pushes and cleanup ---
+
+    def _notes_path(self, ctx: dict) -> str:
+        job = ctx["job"]
+        print(f"🗒️ [4/4] Generating study notes...")
+        safe_name = job['name'].replace(" ", "_").replace("/", "-")
+        notes_dir = "notes"
+        if not os.path.exists(notes_dir):
+            os.makedirs(notes_dir, exist_ok=True)
+        
+        final_notes_path = os.path.join(notes_dir, f"{safe_name}.md")
+        ctx["final_notes_path"] = final_notes_path
+        return final_notes_path
+
+    def _notes_failed(self, ctx: dict) -> bool:
+        job = ctx["job"]
+        print(f"❌ Note generation failed for job: {job['name']}")
+        self.manager.update_job_status(job['id'], 'failed')
+        return False
+
+    def _stage_notes(self, ctx: dict) -> bool:
+        final_notes_path = self._notes_path(ctx)
+        if not NoteGenerationService.generate(ctx["transcript_path"], final_notes_path, api=self.api):
+            return self._notes_failed(ctx)
+        print(f"   - Notes generated: {final_notes_path}")
+        return self._publish(ctx)
+
+    async def _stage_notes_async(self, ctx: dict) -> bool:
+        final_notes_path = self._notes_path(ctx)
+        if not await NoteGenerationService.generate_async(ctx["transcript_path"], final_notes_path, api=self.api):
+            return self._notes_failed(ctx)
+        print(f"   - Notes generated: {final_notes_path}")
+        # Notion/Rclone clients are blocking; keep them off the event loop
+        return await asyncio.to_thread(self._publish, ctx)
+
+    def _publish(self, ctx: dict) -> bool:
+        """Pushes the generated notes to enabled destinations, sets the final status and cleans up."""
+        job = ctx["job"]
+        final_notes_path = ctx["final_notes_path"]
+
+        # 5. Notion Integration (Post-generation)
+        pushed_to_notion = False
+        if self.config.get("notion_integration_enabled", False):
+            print(f"🚀 [5/5] Pushing to Notion...")
+            notion_secret, database_id = self.notion_config.get_credentials()
             
-            final_notes_path = os.path.join(notes_dir, f"{safe_name}.md")
+            if not notion_secret or not database_id:
+                print("⚠️ Notion credentials not configured. Skipping Notion push.")
+            else:
+                try:
+                    notion_service = NotionService(notion_secret, database_id)
+                    
+                    # Title: replace underscores with spaces, remove extension
+                    title = os.path.splitext(os.path.basename(final_notes_path))[0].replace("_", " ")
+                    
+                    with open(final_notes_path, 'r', encoding='utf-8') as f:
+                        markdown_content = f.read()
+                    
+                    url = notion_service.create_page(title, markdown_content)
+                    if url:
+                        print(f"✅ Successfully pushed to Notion: {url}")
+                        pushed_to_notion = True
+                    else:
+                        print("❌ Notion push failed: No URL returned.")
+                except Exception as e:
+                    print(f"❌ Notion push failed with exception: {e}")
+
+        # 5.1 Rclone Integration (Post-generation)
+        pushed_to_rclone = False
+        if self.config.get("rclone_integration_enabled", False):
+            print(f"🚀 [5.1/5] Pushing to Rclone...")
+            remote_name, remote_path = self.rclone_config.get_credentials()
             
-            if not NoteGenerationService.generate(transcript_path, final_notes_path):
-                print(f"❌ Note generation failed for job: {job['name']}")
-                self.manager.update_job_status(job['id'], 'failed')
-                return False
-            print(f"   - Notes generated: {final_notes_path}")
-
-            # Optional delay before next phase
-            print(f"      - Waiting before Notion integration...")
-            self.api.backoff_manager.sync_sleep(0) # Base delay
-
-            # 5. Notion Integration (Post-generation)
-            pushed_to_notion = False
-            if self.config.get("notion_integration_enabled", False):
-                print(f"🚀 [5/5] Pushing to Notion...")
-                notion_secret, database_id = self.notion_config.get_credentials()
-                
-                if not notion_secret or not database_id:
-                    print("⚠️ Notion credentials not configured. Skipping Notion push.")
-                else:
-                    try:
-                        notion_service = NotionService(notion_secret, database_id)
-                        
-                        # Title: replace underscores with spaces, remove extension
-                        title = os.path.splitext(os.path.basename(final_notes_path))[0].replace("_", " ")
-                        
-                        with open(final_notes_path, 'r', encoding='utf-8') as f:
-                            markdown_content = f.read()
-                        
-                        url = notion_service.create_page(title, markdown_content)
-                        if url:
-                            print(f"✅ Successfully pushed to Notion: {url}")
-                            pushed_to_notion = True
-                        else:
-                            print("❌ Notion push failed: No URL returned.")
-                    except Exception as e:
-                        print(f"❌ Notion push failed with exception: {e}")
-
-            # 5.1 Rclone Integration (Post-generation)
-            pushed_to_rclone = False
-            if self.config.get("rclone_integration_enabled", False):
-                print(f"🚀 [5.1/5] Pushing to Rclone...")
-                remote_name, remote_path = self.rclone_config.get_credentials()
-                
-                if not remote_name:
-                    print("⚠️ Rclone remote not configured. Skipping Rclone push.")
-                else:
-                    try:
-                        # Construct remote destination: remote:path/filename.md
-                        remote_dest = f"{remote_name}:{remote_path}"
-                        success, message = self.rclone_service.push_note(final_notes_path, remote_dest)
-                        
-                        if success:
-                            print(f"✅ Successfully pushed to Rclone: {remote_dest}")
-                            pushed_to_rclone = True
-                        else:
-                            print(f"❌ Rclone push failed: {message}")
-                    except Exception as e:
-                        print(f"❌ Rclone push failed with exception: {e}")
+            if not remote_name:
+                print("⚠️ Rclone remote not configured. Skipping Rclone push.")
+            else:
+                try:
+                    # Construct remote destination: remote:path/filename.md
+                    remote_dest = f"{remote_name}:{remote_path}"
+                    success, message = self.rclone_service.push_note(final_notes_path, remote_dest)
+                    
+                    if success:
+                        print(f"✅ Successfully pushed to Rclone: {remote_dest}")
+                        pushed_to_rclone = True
+                    else:
+                        print(f"❌ Rclone push failed: {message}")
+                except Exception as e:
+                    print(f"❌ Rclone push failed with exception: {e}")
 
-            # 6. Cleanup
-            print(f"🧹 Cleaning up intermediate files...")
-            files_to_cleanup = [audio_path, transcript_path, prepared_path]
-            for c in chunks:
+        # 6. Cleanup
+        print(f"🧹 Cleaning up intermediate files...")
+        files_to_cleanup = [ctx["audio_path"]]
+        if ctx["source_path"]:
+            files_to_cleanup.append(ctx["source_path"])
+        if not job.get("scratch_dir"):
+            # Shared temp/ layout: the job's files are removed one by one
+            files_to_cleanup.extend([ctx["transcript_path"], ctx["prepared_path"]])
+            for c in ctx["chunks"]:
                 if c not in files_to_cleanup:
                     files_to_cleanup.append(c)
-            
-            # Completion status determination
-            notion_enabled = self.config.get("notion_integration_enabled", False)
-            rclone_enabled = self.config.get("rclone_integration_enabled", False)
-            
-            # If at least one enabled integration was successful, we consider it pushed
-            is_pushed = (notion_enabled and pushed_to_notion) or (rclone_enabled and pushed_to_rclone)
-            
-            # If all ENABLED integrations succeeded, we can cleanup the final note
-            can_cleanup_note = True
-            if notion_enabled and not pushed_to_notion:
-                can_cleanup_note = False
-            if rclone_enabled and not pushed_to_rclone:
-                can_cleanup_note = False
-            
-            if is_pushed:
-                self.manager.update_job_status(job['id'], 'completed')
-                if can_cleanup_note:
-                    files_to_cleanup.append(final_notes_path)
-                    print(f"✅ Job '{job['name']}' completed and pushed to all enabled destinations!")
-                else:
-                    print(f"✅ Job '{job['name']}' completed (partial push success). Notes kept: {final_notes_path}")
+            if ctx["manifest"] is not None:
+                files_to_cleanup.extend(ctx["manifest"].files())
+        
+        # Completion status determination
+        notion_enabled = self.config.get("notion_integration_enabled", False)
+        rclone_enabled = self.config.get("rclone_integration_enabled", False)
+        
+        # If at least one enabled integration was successful, we consider it pushed
+        is_pushed = (notion_enabled and pushed_to_notion) or (rclone_enabled and pushed_to_rclone)
+        
+        # If all ENABLED integrations succeeded, we can cleanup the final note
+        can_cleanup_note = True
+        if notion_enabled and not pushed_to_notion:
+            can_cleanup_note = False
+        if rclone_enabled and not pushed_to_rclone:
+            can_cleanup_note = False
+        
+        if is_pushed:
+            self.manager.update_job_status(job['id'], 'completed')
+            if can_cleanup_note:
+                files_to_cleanup.append(final_notes_path)
+                print(f"✅ Job '{job['name']}' completed and pushed to all enabled destinations!")
             else:
-                if notion_enabled or rclone_enabled:
-                    # If any was enabled but none succeeded
-                    self.manager.update_job_status(job['id'], 'completed_local_only')
-                    print(f"✅ Job '{job['name']}' completed locally (All push integrations failed). Notes: {final_notes_path}")
-                else:
-                    self.manager.update_job_status(job['id'], 'completed')
-                    print(f"✅ Job '{job['name']}' completed successfully! Notes: {final_notes_path}")
-
-            FileCleanupService.cleanup_job_files(files_to_cleanup)
-            return True
+                print(f"✅ Job '{job['name']}' completed (partial push success). Notes kept: {final_notes_path}")
+        else:
+            if notion_enabled or rclone_enabled:
+                # If any was enabled but none succeeded
+                self.manager.update_job_status(job['id'], 'completed_local_only')
+                print(f"✅ Job '{job['name']}' completed locally (All push integrations failed). Notes: {final_notes_path}")
+            else:
+                self.manager.update_job_status(job['id'], 'completed')
+                print(f"✅ Job '{job['name']}' completed successfully! Notes: {final_notes_path}")
 
-        except Exception as e:
-            print(f"❌ Exception in pipeline for job {job['id']}: {e}")
-            self.manager.update_job_status(job['id'], 'failed')
-            return False
+        FileCleanupService.cleanup_job_files(files_to_cleanup)
+        FileCleanupService.cleanup_scratch_dir(job, self.TEMP_ROOT)
+        return True
@@ -0,0 +1,113 @@
+import time
+import asyncio
+import logging
+import threading
+from typing import Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class _Bucket:
+    """Token bucket state for a single (account, model) key."""
+    __slots__ = ("rate", "tokens", "updated", "blocked_until")
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.tokens = burst
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+class AdaptiveRateLimiter:
+    """
+    Token bucket limiter with AIMD rate control, keyed by (account email, model).
+
+    Requests only wait when the key's bucket is empty or the key is cooling down after a 429.
+    A 429 multiplies the key's rate by decrease_factor; each success adds increase_rpm back,
+    up to max_rpm. Rates are expressed in requests per minute.
+    """
+
+    def __init__(self, initial_rpm: float = 60.0, min_rpm: float = 2.0, max_rpm: float = 120.0,
+                 burst: float = 2.0, increase_rpm: float = 1.0, decrease_factor: float = 0.5,
+                 cooldown: float = 30.0):
+        self.min_rate = max(float(min_rpm), 0.01) / 60.0
+        self.max_rate = max(float(max_rpm) / 60.0, self.min_rate)
+        self.initial_rate = min(max(float(initial_rpm) / 60.0, self.min_rate), self.max_rate)
+        self.burst = max(float(burst), 1.0)
+        self.increase = float(increase_rpm) / 60.0
+        self.decrease_factor = float(decrease_factor)
+        self.cooldown = float(cooldown)
+        self._buckets: Dict[Hashable, _Bucket] = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> "AdaptiveRateLimiter":
+        """Builds a limiter from the rate_limit_* keys of a ConfigManager."""
+        return cls(
+            initial_rpm=float(config.get("rate_limit_rpm", 60)),
+            min_rpm=float(config.get("rate_limit_min_rpm", 2)),
+            max_rpm=float(config.get("rate_limit_max_rpm", 120)),
+        )
+
+    def _bucket(self, key: Hashable) -> _Bucket:
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = _Bucket(self.initial_rate, self.burst)
+        return bucket
+
+    def _refill(self, bucket: _Bucket, now: float):
+        bucket.tokens = min(self.burst, bucket.tokens + (now - bucket.updated) * bucket.rate)
+        bucket.updated = now
+
+    def reserve(self, key: Hashable) -> float:
+        """
+        Takes one token for key and returns how many seconds the caller must wait before sending.
+        The token is owned by the caller once reserved, so concurrent callers queue up fairly.
+        """
+        with self._lock:
+            bucket = self._bucket(key)
+            now = time.monotonic()
+            self._refill(bucket, now)
+            bucket.tokens -= 1.0
+            wait = 0.0
+            if bucket.tokens < 0:
+                wait = -bucket.tokens / bucket.rate
+            return max(wait, bucket.blocked_until - now)
+
+    def acquire(self, key: Hashable):
+        """Blocks until a request for key may be sent."""
+        delay = self.reserve(key)
+        if delay > 0:
+            logger.debug(f"Rate limiter wait for {key}: {delay:.2f}s")
+            time.sleep(delay)
+
+    async def acquire_async(self, key: Hashable):
+        """Awaits until a request for key may be sent."""
+        delay = self.reserve(key)
+        if delay > 0:
+            logger.debug(f"Rate limiter wait for {key}: {delay:.2f}s")
+            await asyncio.sleep(delay)
+
+    def on_success(self, key: Hashable):
+        """Additive increase after a successful request."""
+        with self._lock:
+            bucket = self._bucket(key)
+            bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def on_throttle(self, key: Hashable, retry_after: Optional[float] = None):
+        """
+        Multiplicative decrease after a 429. The key is also blocked for retry_after seconds
+        (or the configured cooldown) and its bucket is drained.
+        """
+        with self._lock:
+            bucket = self._bucket(key)
+            now = time.monotonic()
+            self._refill(bucket, now)
+            bucket.rate = max(self.min_rate, bucket.rate * self.decrease_factor)
+            bucket.tokens = min(bucket.tokens, 0.0)
+            cooldown = self.cooldown if retry_after is None else retry_after
+            bucket.blocked_until = max(bucket.blocked_until, now + cooldown)
+            logger.warning(f"Throttled {key}: rate now {bucket.rate * 60:.1f} req/min, cooling down {cooldown:.0f}s")
+
+    def current_rpm(self, key: Hashable) -> float:
+        """Returns the current allowed rate for key in requests per minute."""
+        with self._lock:
+            return self._bucket(key).rate * 60.0
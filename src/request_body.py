@@ -0,0 +1,70 @@
+import os
+import json
+import base64
+from typing import AsyncIterator, Iterator, Optional
+
+# Inline-data MIME type by container extension
+AUDIO_MIME_TYPES = {
+    ".mp3": "audio/mp3",
+    ".ogg": "audio/ogg",
+    ".opus": "audio/ogg",
+    ".flac": "audio/flac",
+    ".wav": "audio/wav",
+    ".m4a": "audio/aac",
+    ".aac": "audio/aac",
+}
+
+class AudioPayload:
+    """
+    An audio chunk sent as base64 inline data. The file is encoded block by block while the
+    request is written, so memory use does not depend on the chunk size.
+    One payload is created per chunk and reused across retries and accounts.
+    Without an explicit mime_type, it is derived from the file's container extension.
+    """
+    # Multiple of 3 so every block encodes without padding
+    BLOCK_SIZE = 3 * 64 * 1024
+
+    def __init__(self, path: str, mime_type: Optional[str] = None):
+        self.path = path
+        self.mime_type = mime_type or self.mime_type_for(path)
+        self.size = os.path.getsize(path)
+
+    @staticmethod
+    def mime_type_for(path: str) -> str:
+        return AUDIO_MIME_TYPES.get(os.path.splitext(path)[1].lower(), "audio/mp3")
+
+    @property
+    def encoded_size(self) -> int:
+        """Length of the base64 text for the whole file."""
+        return 4 * ((self.size + 2) // 3)
+
+    def iter_base64(self) -> Iterator[bytes]:
+        with open(self.path, "rb") as f:
+            while True:
+                block = f.read(self.BLOCK_SIZE)
+                if not block:
+                    break
+                yield base64.b64encode(block)
+
+class StreamingJSONBody:
+    """
+    A JSON request body whose inline audio data is streamed from an AudioPayload.
+    The envelope is serialized once with a placeholder, then sent as prefix + base64 + suffix.
+    """
+    PLACEHOLDER = "__zaknotes_audio_data__"
+
+    def __init__(self, request_body: dict, payload: AudioPayload):
+        self.payload = payload
+        envelope = json.dumps(request_body).encode("utf-8")
+        prefix, found, suffix = envelope.partition(json.dumps(self.PLACEHOLDER).encode("utf-8"))
+        if not found:
+            raise ValueError("Request body has no audio placeholder")
+        self.prefix = prefix + b'"'
+        self.suffix = b'"' + suffix
+        self.content_length = len(self.prefix) + payload.encoded_size + len(self.suffix)
+
+    async def __aiter__(self) -> AsyncIterator[bytes]:
+        yield self.prefix
+        for block in self.payload.iter_base64():
+            yield block
+        yield self.suffix
@@ -0,0 +1,126 @@
+import time
+import hashlib
+import sqlite3
+import threading
+from typing import Optional
+
+TRANSCRIPT_CACHE_DB = "transcript_cache.db"
+
+class TranscriptCache:
+    """
+    Content-addressed store of chunk transcripts (SQLite, WAL).
+
+    Keys hash the prepared chunk bytes together with the transcription model and prompt, so a
+    re-queued lecture, or the same audio under another URL or name, reuses earlier transcripts
+    while a change of model or prompt misses. Least recently used entries are evicted once the
+    stored text exceeds max_bytes.
+    """
+
+    def __init__(self, db_path: str = TRANSCRIPT_CACHE_DB, max_bytes: int = 200 * 1024 * 1024):
+        self.db_path = db_path
+        self.max_bytes = int(max_bytes)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, isolation_level=None, timeout=30)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS transcripts ("
+            " key TEXT PRIMARY KEY,"
+            " model TEXT NOT NULL,"
+            " text TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_transcripts_last_used ON transcripts(last_used)")
+        # Size of the stored text, kept in the database so every process sharing it sees the same total
+        self.conn.execute("CREATE TABLE IF NOT EXISTS cache_meta (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+        self.conn.execute(
+            "INSERT OR IGNORE INTO cache_meta (name, value)"
+            " SELECT 'total_bytes', COALESCE(SUM(size), 0) FROM transcripts"
+        )
+
+    @classmethod
+    def from_config(cls, config, db_path: str = TRANSCRIPT_CACHE_DB) -> "TranscriptCache":
+        return cls(db_path, max_bytes=float(config.get("transcript_cache_max_mb", 200)) * 1024 * 1024)
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+    @staticmethod
+    def make_key(chunk_checksum: str, model: str, prompt: str) -> str:
+        """Key for a chunk (by the SHA-256 of its bytes) transcribed with model and prompt."""
+        prompt_hash = hashlib.sha256(prompt.encode("utf-8")).hexdigest()
+        return hashlib.sha256(f"{chunk_checksum}\0{model}\0{prompt_hash}".encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Returns the cached transcript and marks it recently used, or None on a miss."""
+        with self._lock:
+            row = self.conn.execute("SELECT text FROM transcripts WHERE key = ?", (key,)).fetchone()
+            if row:
+                self.conn.execute("UPDATE transcripts SET last_used = ? WHERE key = ?", (time.time(), key))
+        return row[0] if row else None
+
+    def put(self, key: str, text: str, model: str = ""):
+        now = time.time()
+        size = len(text.encode("utf-8"))
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self.conn.execute("SELECT size FROM transcripts WHERE key = ?", (key,)).fetchone()
+                self.conn.execute(
+                    "INSERT OR REPLACE INTO transcripts (key, model, text, size, created, last_used) VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, model, text, size, now, now),
+                )
+                total = self._add_to_total(size - (row[0] if row else 0))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        if total > self.max_bytes:
+            self.prune()
+
+    def _add_to_total(self, delta: int) -> int:
+        """Adjusts the shared size total inside the caller's transaction and returns it."""
+        self.conn.execute("UPDATE cache_meta SET value = value + ? WHERE name = 'total_bytes'", (delta,))
+        return self.conn.execute("SELECT value FROM cache_meta WHERE name = 'total_bytes'").fetchone()[0]
+
+    def prune(self, max_bytes: Optional[int] = None) -> int:
+        """Evicts least recently used entries until the cache fits in max_bytes. Returns how many were removed."""
+        limit = self.max_bytes if max_bytes is None else int(max_bytes)
+        with self._lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM transcripts").fetchone()[0]
+                evicted = []
+                if total > limit:
+                    for key, size in self.conn.execute("SELECT key, size FROM transcripts ORDER BY last_used"):
+                        evicted.append((key,))
+                        total -= size
+                        if total <= limit:
+                            break
+                    self.conn.executemany("DELETE FROM transcripts WHERE key = ?", evicted)
+                self.conn.execute("UPDATE cache_meta SET value = ? WHERE name = 'total_bytes'", (total,))
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(evicted)
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries, total, oldest, newest = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(last_used), MAX(last_used) FROM transcripts"
+            ).fetchone()
+            models = self.conn.execute(
+                "SELECT model, COUNT(*) FROM transcripts GROUP BY model ORDER BY COUNT(*) DESC"
+            ).fetchall()
+        return {
+            "entries": entries,
+            "bytes": total,
+            "max_bytes": self.max_bytes,
+            "oldest_use": oldest,
+            "newest_use": newest,
+            "models": dict(models),
+        }
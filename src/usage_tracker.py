@@ -1,6 +1,7 @@
 import json
 import os
 import logging
+import threading
 from typing import Dict
 
 logger = logging.getLogger(__name__)
@@ -9,6 +10,7 @@ class UsageTracker:
     def __init__(self, usage_file: str = "usage_stats.json"):
         self.usage_file = usage_file
         self.stats = self._load_stats()
+        self._lock = threading.Lock()
 
     def _load_stats(self) -> Dict[str, Dict[str, int]]:
         if not os.path.exists(self.usage_file):
@@ -28,14 +30,15 @@ class UsageTracker:
 
     def record_usage(self, email: str, model_name: str):
         """Records a single request for a given email and model."""
-        if email not in self.stats:
-            self.stats[email] = {}
-        
-        if model_name not in self.stats[email]:
-            self.stats[email][model_name] = 0
+        with self._lock:
+            if email not in self.stats:
+                self.stats[email] = {}
             
-        self.stats[email][model_name] += 1
-        self._save_stats()
+            if model_name not in self.stats[email]:
+                self.stats[email][model_name] = 0
+                
+            self.stats[email][model_name] += 1
+            self._save_stats()
 
     def get_usage_report(self) -> Dict[str, Dict[str, int]]:
         """Returns the full usage statistics."""
@@ -0,0 +1,286 @@
+import os
+import json
+import subprocess
+from typing import Callable, List, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError: # Optional: only the "vad" prep mode and the non-speech filter need it
+    np = None
+
+Segment = Tuple[float, float]
+SAMPLE_RATE = 16000
+
+def read_frame_features(input_path: str, frame_length: int, block_seconds: int, features: Callable):
+    """
+    Decodes input_path to 16 kHz mono PCM with ffmpeg and streams it in blocks of whole frames.
+    features(frames) gets a (frames, frame_length) float32 array per block and returns a tuple
+    of per-frame arrays; returns those arrays concatenated, plus the decoded duration.
+    """
+    command = ["ffmpeg", "-v", "error", "-i", input_path, "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "-"]
+    frame_bytes = frame_length * 2
+    block_bytes = max(1, SAMPLE_RATE * block_seconds // frame_length) * frame_bytes
+    collected, total_bytes, pending = [], 0, b""
+    process = subprocess.Popen(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE)
+    try:
+        while True:
+            data = process.stdout.read(block_bytes)
+            if not data:
+                break
+            total_bytes += len(data)
+            data = pending + data
+            usable = len(data) // frame_bytes * frame_bytes
+            pending = data[usable:]
+            if usable:
+                samples = np.frombuffer(data[:usable], dtype="<i2").astype(np.float32) / 32768.0
+                collected.append(features(samples.reshape(-1, frame_length)))
+        stderr = process.stderr.read()
+    finally:
+        process.stdout.close()
+        process.stderr.close()
+        returncode = process.wait()
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, command, stderr=stderr)
+    duration = total_bytes / 2 / SAMPLE_RATE
+    if not collected:
+        return None, duration
+    return tuple(np.concatenate(parts) for parts in zip(*collected)), duration
+
+def subtract_regions(segments: List[Segment], regions: List[Segment]) -> List[Segment]:
+    """The parts of segments that fall outside every region (both sorted and non-overlapping)."""
+    result = []
+    for start, end in segments:
+        for region_start, region_end in regions:
+            if region_end <= start or region_start >= end:
+                continue
+            if region_start > start:
+                result.append((start, region_start))
+            start = max(start, region_end)
+            if start >= end:
+                break
+        if start < end:
+            result.append((start, end))
+    return result
+
+class SpeechMap:
+    """
+    Per-job record of where the speech is in a recording: (start, end) segments in seconds.
+
+    Saved next to the chunk manifest, so a resumed job does not decode the audio again. The
+    map decides what is kept (only speech is encoded) and where chunks are cut (always in a
+    pause between segments, never inside one unless a single segment exceeds a chunk).
+    """
+
+    def __init__(self, path: str, duration: float = 0.0, segments: Optional[List[Segment]] = None):
+        self.path = path
+        self.duration = float(duration)
+        self.segments = [(float(start), float(end)) for start, end in (segments or [])]
+
+    @staticmethod
+    def path_for(temp_dir: str, job_id) -> str:
+        return os.path.join(temp_dir, f"job_{job_id}_speech.json")
+
+    @classmethod
+    def load(cls, path: str) -> Optional["SpeechMap"]:
+        """Returns the saved map, or None if there is none (or it is unreadable)."""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+        return cls(path, data.get("duration", 0.0), data.get("segments", []))
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"duration": self.duration, "segments": self.segments}, f)
+        os.replace(tmp_path, self.path)
+
+    @property
+    def speech_seconds(self) -> float:
+        return sum(end - start for start, end in self.segments)
+
+    def plan_chunks(self, split_time: float) -> List[List[Segment]]:
+        """
+        Groups consecutive segments into chunks holding at most split_time seconds of speech.
+        Only a segment longer than split_time on its own is cut inside.
+        """
+        chunks, current, used = [], [], 0.0
+        for start, end in self.segments:
+            while end - start > split_time:
+                # No pause to cut in: close the open chunk and give the long segment whole chunks
+                if current:
+                    chunks.append(current)
+                    current, used = [], 0.0
+                chunks.append([(start, start + split_time)])
+                start += split_time
+            if current and used + (end - start) > split_time:
+                chunks.append(current)
+                current, used = [], 0.0
+            current.append((start, end))
+            used += end - start
+        if current:
+            chunks.append(current)
+        return chunks
+
+class VoiceActivityDetector:
+    """
+    Energy and zero-crossing voice activity detection over 16 kHz mono PCM.
+
+    ffmpeg decodes the input to raw samples, which are read in blocks and framed with NumPy,
+    so memory use does not depend on the recording length. The speech threshold adapts to
+    the recording's own noise floor, which a fixed dB threshold cannot do on noisy rooms.
+    """
+    SAMPLE_RATE = SAMPLE_RATE
+    # Frames quieter than this are never speech, whatever the noise floor
+    ABSOLUTE_FLOOR_DB = -55.0
+
+    def __init__(self, frame_ms: int = 30, margin_db: float = 12.0, max_zcr: float = 0.35,
+                 min_silence: float = 0.6, min_speech: float = 0.25, padding: float = 0.2,
+                 block_seconds: int = 60):
+        self.frame_length = self.SAMPLE_RATE * frame_ms // 1000
+        self.margin_db = margin_db
+        self.max_zcr = max_zcr
+        self.min_silence = min_silence
+        self.min_speech = min_speech
+        self.padding = padding
+        self.block_seconds = block_seconds
+
+    @classmethod
+    def from_config(cls, config) -> "VoiceActivityDetector":
+        return cls(
+            margin_db=float(config.get("vad_margin_db", 12)),
+            min_silence=float(config.get("vad_min_silence", 0.6)),
+            padding=float(config.get("vad_padding", 0.2)),
+        )
+
+    @staticmethod
+    def available() -> bool:
+        return np is not None
+
+    @staticmethod
+    def _frame_features(frames):
+        """Energy (dBFS) and zero-crossing rate of each frame."""
+        energy = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        zcr = np.mean(np.signbit(frames[:, 1:]) != np.signbit(frames[:, :-1]), axis=1)
+        return energy, zcr
+
+    def _segments(self, features, duration: float) -> List[Segment]:
+        if features is None:
+            return []
+        energy, zcr = features
+        noise_floor = float(np.percentile(energy, 10))
+        threshold = max(noise_floor + self.margin_db, self.ABSOLUTE_FLOOR_DB)
+        # Noise is loud-ish and hissy (high ZCR); loud frames count whatever their ZCR
+        speech = (energy > threshold) & ((zcr < self.max_zcr) | (energy > threshold + self.margin_db))
+
+        edges = np.diff(np.concatenate(([0], speech.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        if not len(starts):
+            return []
+        frame_seconds = self.frame_length / self.SAMPLE_RATE
+        starts, ends = starts * frame_seconds, ends * frame_seconds
+
+        # Bridge pauses shorter than min_silence, then drop blips shorter than min_speech
+        keep_gap = starts[1:] - ends[:-1] >= self.min_silence
+        starts = starts[np.concatenate(([True], keep_gap))]
+        ends = ends[np.concatenate((keep_gap, [True]))]
+        long_enough = ends - starts >= self.min_speech
+        starts, ends = starts[long_enough], ends[long_enough]
+        if not len(starts):
+            return []
+
+        # Pad so word onsets and tails survive, then merge segments the padding made overlap
+        starts = np.maximum(starts - self.padding, 0.0)
+        ends = np.minimum(ends + self.padding, duration)
+        separate = starts[1:] > ends[:-1]
+        starts = starts[np.concatenate(([True], separate))]
+        ends = ends[np.concatenate((separate, [True]))]
+        return [(round(float(s), 3), round(float(e), 3)) for s, e in zip(starts, ends)]
+
+    def detect(self, input_path: str, map_path: str) -> SpeechMap:
+        """Decodes input_path, finds its speech segments and saves them as a SpeechMap at map_path."""
+        if np is None:
+            raise RuntimeError("Voice activity detection needs NumPy (pip install numpy)")
+        features, duration = read_frame_features(input_path, self.frame_length, self.block_seconds, self._frame_features)
+        speech_map = SpeechMap(map_path, duration, self._segments(features, duration))
+        speech_map.save()
+        return speech_map
+
+class NonSpeechClassifier:
+    """
+    Marks long stretches of music or steady non-speech sound (intro music, music beds,
+    screen-share hum) using per-frame spectra over sliding windows.
+
+    Speech has a strong syllabic rhythm, so its frame energy varies a lot within a few
+    seconds. A window counts as non-speech when its energy is steady AND its spectrum agrees:
+    tonal (mostly harmonic frames, or a peaky spectrum of sustained notes) or noise-flat
+    (hum, hiss, applause).
+    Only regions longer than min_region are reported, so pauses in speech are left alone.
+    """
+    FRAME_LENGTH = 512 # 32 ms at 16 kHz
+    # Pitch range searched for harmonicity (Hz)
+    MIN_PITCH, MAX_PITCH = 60, 500
+    # Windows quieter than this are silence; silence removal deals with those
+    SILENCE_DB = -50.0
+
+    def __init__(self, window_seconds: float = 3.0, hop_seconds: float = 1.0, max_energy_std: float = 4.0,
+                 voiced_fraction: float = 0.6, peaky: float = 1e-3, flatness: float = 0.4, min_region: float = 10.0,
+                 block_seconds: int = 60):
+        frame_seconds = self.FRAME_LENGTH / SAMPLE_RATE
+        self.window_frames = max(1, int(round(window_seconds / frame_seconds)))
+        self.hop_frames = max(1, int(round(hop_seconds / frame_seconds)))
+        self.max_energy_std = max_energy_std
+        self.voiced_fraction = voiced_fraction
+        self.peaky = peaky
+        self.flatness = flatness
+        self.min_region = min_region
+        self.block_seconds = block_seconds
+
+    @classmethod
+    def from_config(cls, config) -> "NonSpeechClassifier":
+        return cls(min_region=float(config.get("non_speech_min_region", 10)))
+
+    @classmethod
+    def _frame_features(cls, frames):
+        """Energy (dBFS), spectral flatness and harmonicity (peak normalized autocorrelation) per frame."""
+        energy = 10.0 * np.log10(np.mean(frames * frames, axis=1) + 1e-10)
+        windowed = frames * np.hanning(cls.FRAME_LENGTH).astype(np.float32)
+        power = np.abs(np.fft.rfft(windowed, n=2 * cls.FRAME_LENGTH, axis=1)) ** 2 + 1e-12
+        flatness = np.exp(np.mean(np.log(power), axis=1)) / np.mean(power, axis=1)
+        # Autocorrelation via the power spectrum (Wiener-Khinchin)
+        autocorr = np.fft.irfft(power, axis=1)[:, : cls.FRAME_LENGTH]
+        lags = slice(SAMPLE_RATE // cls.MAX_PITCH, SAMPLE_RATE // cls.MIN_PITCH)
+        harmonicity = np.max(autocorr[:, lags], axis=1) / autocorr[:, 0]
+        return energy, flatness, harmonicity
+
+    def _regions(self, features, duration: float) -> List[Segment]:
+        if features is None or len(features[0]) < self.window_frames:
+            return []
+        energy, flatness, harmonicity = features
+        windows = lambda values: np.lib.stride_tricks.sliding_window_view(values, self.window_frames)[:: self.hop_frames]
+        energy_windows = windows(energy)
+        loud = np.mean(energy_windows, axis=1) > self.SILENCE_DB
+        steady = np.std(energy_windows, axis=1) < self.max_energy_std
+        mean_flatness = np.mean(windows(flatness), axis=1)
+        tonal = (np.mean(windows(harmonicity) > 0.5, axis=1) > self.voiced_fraction) | (mean_flatness < self.peaky)
+        flat = mean_flatness > self.flatness
+        non_speech = loud & steady & (tonal | flat)
+
+        frame_seconds = self.FRAME_LENGTH / SAMPLE_RATE
+        edges = np.diff(np.concatenate(([0], non_speech.astype(np.int8), [0])))
+        starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+        # Window i covers frames [i * hop, i * hop + window)
+        starts = starts * self.hop_frames * frame_seconds
+        ends = np.minimum(((ends - 1) * self.hop_frames + self.window_frames) * frame_seconds, duration)
+        return [
+            (round(float(s), 3), round(float(e), 3))
+            for s, e in zip(starts, ends) if e - s >= self.min_region
+        ]
+
+    def classify(self, input_path: str) -> Tuple[float, List[Segment]]:
+        """Returns the decoded duration and the (start, end) non-speech regions of input_path, in seconds."""
+        if np is None:
+            raise RuntimeError("Non-speech classification needs NumPy (pip install numpy)")
+        features, duration = read_frame_features(input_path, self.FRAME_LENGTH, self.block_seconds, self._frame_features)
+        return duration, self._regions(features, duration)
@@ -0,0 +1,55 @@
+import os
+import asyncio
+import json
+import pytest
+
+class FakeStreamResponse:
+    """Stands in for the response of httpx.AsyncClient.stream(); it is also its own context manager."""
+
+    def __init__(self, status_code=200, lines=(), text="", delay=0):
+        self.status_code = status_code
+        self.lines = list(lines)
+        self.text = text
+        self.delay = delay
+
+    async def aiter_lines(self):
+        for line in self.lines:
+            if self.delay:
+                await asyncio.sleep(self.delay)
+            yield line
+
+    async def aread(self):
+        return self.text.encode()
+
+    def json(self):
+        return json.loads(self.text)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return False
+
+@pytest.fixture
+def sse_response():
+    """Factory for fake streamed Gemini responses."""
+    return FakeStreamResponse
+
+@pytest.fixture
+def workdir(tmp_path, monkeypatch):
+    """Runs the test from an empty directory, so the pipeline's temp/, downloads/ and notes/ paths are real."""
+    monkeypatch.chdir(tmp_path)
+    return tmp_path
+
+@pytest.fixture
+def write_files():
+    """Returns a helper that creates the given files (and their directories) and returns their paths."""
+    def write(*paths, data=b"audio"):
+        for path in paths:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(path, "wb") as f:
+                f.write(data)
+        return list(paths)
+    return write
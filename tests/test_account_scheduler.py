@@ -0,0 +1,96 @@
+import time
+import pytest
+from unittest.mock import MagicMock, patch
+from src.account_scheduler import AccountScheduler
+from src.gemini_auth_service import GeminiAuthService
+from src.gemini_api_wrapper import GeminiAPIWrapper
+
+def make_accounts(*emails, status="valid"):
+    return [{"email": e, "status": status, "projectId": f"p-{e}", "access": f"t-{e}",
+             "refresh": "r", "expires": int(time.time() * 1000) + 3600000, "clientId": "c", "clientSecret": None}
+            for e in emails]
+
+def test_picks_least_loaded_account():
+    accounts = make_accounts("a", "b", "c")
+    scheduler = AccountScheduler(lambda: accounts)
+
+    picked = [scheduler.pick()["email"] for _ in range(3)]
+    assert sorted(picked) == ["a", "b", "c"]
+
+    scheduler.release(accounts[1])
+    assert scheduler.pick()["email"] == "b"
+
+def test_unhealthy_account_is_ranked_lower():
+    accounts = make_accounts("a", "b")
+    scheduler = AccountScheduler(lambda: accounts)
+    for _ in range(3):
+        scheduler.record_error(accounts[0])
+    scheduler.record_success(accounts[1], latency=2.0)
+
+    assert scheduler.pick()["email"] == "b"
+
+def test_throttled_account_cools_down_with_escalation():
+    accounts = make_accounts("a", "b")
+    scheduler = AccountScheduler(lambda: accounts, cooldown=10, max_cooldown=25)
+
+    assert scheduler.record_throttle(accounts[0]) == 10
+    assert scheduler.record_throttle(accounts[0]) == 20
+    assert scheduler.record_throttle(accounts[0]) == 25 # Capped
+    for _ in range(3):
+        assert scheduler.pick()["email"] == "b"
+
+    scheduler.record_throttle(accounts[1], retry_after=5)
+    assert scheduler.pick() is None
+    assert scheduler.seconds_until_available() == pytest.approx(5, abs=0.1)
+
+    # A success resets the escalation
+    scheduler.record_success(accounts[0], latency=1.0)
+    assert scheduler.record_throttle(accounts[0]) == 10
+
+def test_no_valid_accounts():
+    scheduler = AccountScheduler(lambda: make_accounts("a", status="invalid"))
+    assert scheduler.pick() is None
+    assert scheduler.seconds_until_available() is None
+
+@pytest.mark.anyio
+async def test_wrapper_moves_to_idle_account_on_429(tmp_path, sse_response):
+    auth = GeminiAuthService(auth_file=str(tmp_path / "auth.json"))
+    auth.accounts = make_accounts("a@example.com", "b@example.com")
+    config = MagicMock()
+    config.get.side_effect = lambda k, default=None: {"api_max_retries": 1, "account_cooldown": 60}.get(k, default)
+    wrapper = GeminiAPIWrapper(config=config, auth_service=auth, usage_tracker=MagicMock())
+    wrapper._log_error = MagicMock()
+
+    ok = 'data: {"response": {"candidates": [{"content": {"parts": [{"text": "done"}]}}]}}'
+    tokens = []
+    def fake_stream(method, url, headers=None, **kwargs):
+        tokens.append(headers["Authorization"])
+        return sse_response(status_code=429, text="quota") if len(tokens) == 1 else sse_response(lines=[ok])
+
+    with patch("httpx.AsyncClient.stream", side_effect=fake_stream):
+        assert await wrapper.generate_content_async("prompt") == "done"
+
+    first = tokens[0].split("t-")[1]
+    second = tokens[1].split("t-")[1]
+    assert first != second
+    throttled = next(acc for acc in auth.accounts if acc["email"] == first)
+    assert auth.scheduler.health(throttled).cooldown_until > time.monotonic() + 50
+    assert all(auth.scheduler.health(acc).in_flight == 0 for acc in auth.accounts)
+
+@pytest.mark.anyio
+async def test_wrapper_counts_error_response_once(tmp_path, sse_response):
+    """An error status is logged and counted against the account once, not again by the retry handler."""
+    auth = GeminiAuthService(auth_file=str(tmp_path / "auth.json"))
+    auth.accounts = make_accounts("a@example.com")
+    config = MagicMock()
+    config.get.side_effect = lambda k, default=None: {"api_max_retries": 0}.get(k, default)
+    wrapper = GeminiAPIWrapper(config=config, auth_service=auth, usage_tracker=MagicMock())
+    wrapper._log_error = MagicMock()
+    auth.scheduler.record_error = MagicMock()
+
+    with patch("httpx.AsyncClient.stream", side_effect=lambda *args, **kwargs: sse_response(status_code=500, text="boom")):
+        with pytest.raises(Exception, match="All configured"):
+            await wrapper.generate_content_async("prompt")
+
+    assert wrapper._log_error.call_count == 1
+    assert auth.scheduler.record_error.call_count == 1
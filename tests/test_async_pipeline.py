@@ -0,0 +1,108 @@
+import os
+import sys
+import asyncio
+import subprocess
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline import ProcessingPipeline
+from src.audio_processor import AudioProcessor
+from src.job_executor import AsyncJobExecutor
+
+@pytest.fixture
+def mock_config():
+    config = MagicMock()
+    config.get.side_effect = lambda key, default=None: {
+        "segment_time": 1800,
+        "max_chunk_size_mb": 15
+    }.get(key, default)
+    return config
+
+@pytest.fixture
+def pipeline(mock_config):
+    api = MagicMock()
+    api.generate_content_with_file_async = AsyncMock(return_value="Transcript text")
+    api.backoff_manager.async_sleep = AsyncMock()
+    with patch('src.pipeline.NotionConfigManager'), \
+         patch('src.pipeline.RcloneConfigManager'), \
+         patch('src.pipeline.RcloneService'):
+        return ProcessingPipeline(mock_config, api_wrapper=api, job_manager=MagicMock())
+
+@pytest.mark.anyio
+async def test_execute_job_async_local_file(pipeline, tmp_path, monkeypatch):
+    """Test that the async path awaits audio prep, transcription and notes on one loop."""
+    monkeypatch.chdir(tmp_path)
+    source = tmp_path / "lecture.mp3"
+    source.write_bytes(b"audio")
+    job = {"id": "a1", "name": "Async Job", "file_path": str(source), "status": "queue"}
+
+    async def fake_optimize(input_path, output_path, **kwargs):
+        with open(output_path, "wb") as f:
+            f.write(b"prepared")
+        return True
+
+    async def fake_chunking(input_path, output_pattern=None, **kwargs):
+        paths = []
+        for i in (1, 2):
+            path = output_pattern.replace("%03d", f"{i:03d}")
+            with open(path, "wb") as f:
+                f.write(b"chunk")
+            paths.append(path)
+        return paths
+
+    with patch.object(AudioProcessor, "optimize_audio_async", side_effect=fake_optimize) as mock_optimize, \
+         patch.object(AudioProcessor, "process_for_transcription_async", side_effect=fake_chunking), \
+         patch('src.pipeline.NoteGenerationService.generate_async', new_callable=AsyncMock) as mock_notes, \
+         patch('src.pipeline.FileCleanupService') as mock_cleanup:
+        mock_notes.return_value = True
+        success = await pipeline.execute_job_async(job)
+
+    assert success is True
+    mock_optimize.assert_called_once()
+    assert pipeline.api.generate_content_with_file_async.await_count == 2
+    mock_notes.assert_awaited_once()
+    assert mock_notes.call_args.kwargs["api"] is pipeline.api
+    pipeline.manager.update_job_status.assert_any_call("a1", "CHUNKED")
+    pipeline.manager.update_job_status.assert_called_with("a1", "completed")
+
+    # Everything intermediate lives in the job's scratch directory, removed as a whole
+    scratch_dir = os.path.join("temp", "a1")
+    assert job["scratch_dir"] == scratch_dir
+    pipeline.manager.update_job.assert_called_with("a1", scratch_dir=scratch_dir)
+    mock_cleanup.cleanup_scratch_dir.assert_called_once_with(job, "temp")
+    with open(os.path.join(scratch_dir, "Async_Job_transcript.txt"), encoding="utf-8") as f:
+        assert f.read() == "Transcript text\n\nTranscript text\n\n"
+
+@pytest.mark.anyio
+async def test_run_command_async_raises_on_failure(tmp_path):
+    """Test that async subprocess failures surface like subprocess.run(check=True)."""
+    with pytest.raises(subprocess.CalledProcessError):
+        await AudioProcessor.run_command_async(["ffprobe", "-v", "error", str(tmp_path / "missing.mp3")])
+
+    assert await AudioProcessor.optimize_audio_async("missing.mp3", str(tmp_path / "out.mp3")) is False
+
+def test_async_executor_bounds_concurrency():
+    """Test that AsyncJobExecutor keeps at most max_concurrency jobs in flight."""
+    state = {"active": 0, "peak": 0}
+
+    async def execute_job_async(job):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01)
+        state["active"] -= 1
+        return job["id"] != "2"
+
+    pipeline = MagicMock()
+    pipeline.execute_job_async = execute_job_async
+    pipeline.aclose = AsyncMock()
+    jobs = [{"id": str(i), "name": f"Job {i}"} for i in range(6)]
+
+    results = AsyncJobExecutor(pipeline, max_concurrency=3).run(jobs)
+
+    assert state["peak"] == 3
+    assert results["2"] is False
+    assert sum(results.values()) == 5
+    pipeline.aclose.assert_awaited_once()
@@ -6,7 +6,8 @@ import pytest
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.audio_processor import AudioProcessor
+from unittest.mock import patch
+from src.audio_processor import AudioProcessor, MediaInfo
 
 @pytest.fixture
 def dummy_file(tmp_path):
@@ -91,6 +92,39 @@ def test_get_duration(real_audio_file):
     # real_audio_file was created with -t 5
     assert 4.9 < duration < 5.1
 
+def test_probe_mp3_reads_headers_only(real_audio_file):
+    """Test that MP3 files are probed through mutagen without spawning ffprobe."""
+    with patch("src.audio_processor.subprocess.run") as mock_run:
+        info = AudioProcessor.probe(real_audio_file)
+    mock_run.assert_not_called()
+    assert info.codec == "mp3"
+    assert info.channels == 2
+    assert info.sample_rate == 44100
+    assert 4.9 < info.duration < 5.1
+    assert 120000 < info.bitrate < 140000
+
+def test_probe_is_single_call_and_memoized(tmp_path):
+    """Test that one ffprobe call fills every field and is reused until the file changes."""
+    wav = tmp_path / "tone.wav"
+    make_wav = ["ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=16000", "-ac", "1"]
+    subprocess.run(make_wav + ["-t", "2", str(wav)], check=True, capture_output=True)
+
+    with patch("src.audio_processor.subprocess.run", wraps=subprocess.run) as mock_run:
+        info = AudioProcessor.probe(str(wav))
+        assert AudioProcessor.get_duration(str(wav)) == info.duration
+        assert AudioProcessor.get_bitrate(str(wav)) == info.bitrate
+    assert mock_run.call_count == 1
+    assert info.codec == "pcm_s16le"
+    assert (info.channels, info.sample_rate) == (1, 16000)
+    assert 1.9 < info.duration < 2.1
+
+    # A rewritten file is probed again
+    subprocess.run(make_wav + ["-t", "3", str(wav)], check=True, capture_output=True)
+    assert 2.9 < AudioProcessor.get_duration(str(wav)) < 3.1
+
+def test_probe_missing_file(tmp_path):
+    assert AudioProcessor.probe(str(tmp_path / "missing.wav")) == MediaInfo()
+
 def test_thread_support(real_audio_file, tmp_path):
     """Test that threads parameter is handled in ffmpeg commands."""
     output_file = str(tmp_path / "threaded.mp3")
@@ -181,3 +215,206 @@ def test_optimize_audio_failure(tmp_path):
 
 
 
+
+def test_plan_segments_respects_size_limit():
+    """Segments are shortened when the duration limit would exceed the size limit."""
+    assert AudioProcessor.plan_segments(1800, 15, "48k") == 1800
+    # 1 MB at 48 kbit/s holds ~174s; 5% is kept for container overhead
+    assert AudioProcessor.plan_segments(1800, 1, "48k") == 166
+    assert AudioProcessor._fused_bitrate(MediaInfo(bitrate=32000), "48k") == "32k"
+    assert AudioProcessor._fused_bitrate(MediaInfo(bitrate=128000), "48k") == "48k"
+
+def test_optimize_and_segment(tmp_path):
+    """One ffmpeg pass writes mono 16kHz chunks straight to the chunk pattern."""
+    source = tmp_path / "tone.wav"
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=440:sample_rate=44100",
+        "-t", "12", "-ac", "2", str(source)
+    ], check=True, capture_output=True)
+    stale = tmp_path / "job_f1_chunk_009.mp3"
+    stale.write_bytes(b"left over")
+
+    chunks = AudioProcessor.optimize_and_segment(str(source), str(tmp_path / "job_f1_chunk_%03d.mp3"), segment_time=5)
+
+    assert [os.path.basename(c) for c in chunks] == ["job_f1_chunk_000.mp3", "job_f1_chunk_001.mp3", "job_f1_chunk_002.mp3"]
+    assert not stale.exists()
+    for chunk in chunks:
+        info = AudioProcessor.probe(chunk)
+        assert info.duration <= 5.5
+        assert (info.channels, info.sample_rate) == (1, 16000)
+
+def test_optimize_parallel_cuts_at_silences(tmp_path):
+    """Ranges are cut inside silences, stay within the segment length and are encoded in parallel."""
+    source = tmp_path / "speech.wav"
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=4",
+        "-f", "lavfi", "-i", "anullsrc=r=44100:cl=mono:d=2",
+        "-f", "lavfi", "-i", "sine=frequency=660:duration=5",
+        "-filter_complex", "[0][1][2]concat=n=3:v=0:a=1", str(source)
+    ], check=True, capture_output=True)
+
+    ranges = AudioProcessor.plan_ranges(str(source), 11.0, 5, workers=2)
+    assert ranges[0] == (0.0, 4.5) # middle of the silence (4s-6s) that falls in the search window
+    assert all(length <= 5 for _, length in ranges)
+    assert sum(length for _, length in ranges) == pytest.approx(11.0)
+
+    chunks = AudioProcessor.optimize_parallel(str(source), str(tmp_path / "job_p1_chunk_%03d.mp3"), segment_time=5, workers=2)
+    assert len(chunks) == len(ranges)
+    for chunk in chunks:
+        info = AudioProcessor.probe(chunk)
+        assert 0 < info.duration <= 5.5
+        assert (info.channels, info.sample_rate) == (1, 16000)
+
+@pytest.mark.parametrize("profile, codec, extension, sample_rate", [
+    ("opus-16k", "opus", ".ogg", 48000), # Ogg Opus always reports its 48 kHz decode rate
+    ("flac", "flac", ".flac", 16000),
+])
+def test_optimize_audio_with_profile(tmp_path, profile, codec, extension, sample_rate):
+    """Encoding profiles pick the codec and container of the prepared audio."""
+    source = tmp_path / "tone.wav"
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=3", str(source)
+    ], check=True, capture_output=True)
+    assert AudioProcessor.encoding_profile(profile).extension == extension
+    output_file = str(tmp_path / f"prepared{extension}")
+
+    assert AudioProcessor.optimize_audio(str(source), output_file, profile=profile) is True
+    info = AudioProcessor.probe(output_file)
+    assert (info.codec, info.channels, info.sample_rate) == (codec, 1, sample_rate)
+
+def test_unknown_profile():
+    with pytest.raises(ValueError):
+        AudioProcessor.encoding_profile("mp3-320k")
+
+def test_benchmark_profiles(tmp_path):
+    """The benchmark reports one encode per profile, with size and timing."""
+    source = tmp_path / "tone.wav"
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=3", str(source)
+    ], check=True, capture_output=True)
+
+    results = AudioProcessor.benchmark_profiles(str(source), str(tmp_path / "bench"), ["mp3-48k", "opus-16k"])
+
+    assert [r["profile"] for r in results] == ["mp3-48k", "opus-16k"]
+    for result in results:
+        assert result["bytes"] == os.path.getsize(result["path"])
+        assert result["encode_seconds"] > 0
+        assert result["duration"] == pytest.approx(3, abs=0.2)
+    assert results[1]["bytes"] < results[0]["bytes"]
+
+def test_tempo_filter():
+    assert AudioProcessor._tempo_filter(1.0) is None
+    assert AudioProcessor._tempo_filter(1.5) == "atempo=1.5"
+    with pytest.raises(ValueError):
+        AudioProcessor._tempo_filter(2.5)
+
+def test_benchmark_tempos(tmp_path):
+    """Faster tempos shorten the prepared audio; a stand-in transcriber is called once per output."""
+    source = tmp_path / "tone.wav"
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=440:duration=6", str(source)
+    ], check=True, capture_output=True)
+    transcribed = []
+
+    results = AudioProcessor.benchmark_tempos(str(source), str(tmp_path / "bench"), [1.0, 1.5],
+                                              transcribe=lambda path: transcribed.append(path) or "text")
+
+    assert [r["tempo"] for r in results] == [1.0, 1.5]
+    assert transcribed == [r["path"] for r in results]
+    assert results[0]["duration"] == pytest.approx(6, abs=0.2)
+    assert results[1]["duration"] == pytest.approx(4, abs=0.2)
+    assert results[1]["seconds_saved"] == pytest.approx(2, abs=0.3)
+    for result in results:
+        assert result["payload_bytes"] == len(AudioProcessor.encode_to_base64(result["path"]))
+        assert result["transcript"] == "text"
+    assert results[1]["bytes"] < results[0]["bytes"]
+
+def test_should_reencode(tmp_path):
+    """Lean mono speech in the profile's format passes through; long silences or another format do not."""
+    def make(name, source, *args):
+        path = str(tmp_path / name)
+        subprocess.run(["ffmpeg", "-y", "-f", "lavfi", "-i", source, *args, path], check=True, capture_output=True)
+        return path
+
+    lean = make("lean.mp3", "sine=frequency=440:duration=20", "-ac", "1", "-ar", "16000", "-b:a", "32k")
+    gappy = make("gappy.mp3", "sine=frequency=440:duration=20", "-af", "volume=enable='between(t,5,15)':volume=0",
+                 "-ac", "1", "-ar", "16000", "-b:a", "32k")
+    stereo = make("stereo.mp3", "sine=frequency=440:duration=5", "-ac", "2", "-ar", "16000", "-b:a", "32k")
+
+    assert AudioProcessor.should_reencode(lean) is False
+    assert AudioProcessor.should_reencode(lean, tempo=1.25) is True
+    assert AudioProcessor.should_reencode(lean, profile="opus-16k") is True
+    assert AudioProcessor.should_reencode(gappy) is True
+    assert AudioProcessor.should_reencode(stereo) is True
+
+def test_link_or_copy_shares_the_file(tmp_path):
+    source = tmp_path / "source.mp3"
+    source.write_bytes(b"audio")
+    destination = tmp_path / "prepared.mp3"
+    destination.write_bytes(b"stale")
+
+    AudioProcessor.link_or_copy(str(source), str(destination))
+    assert destination.read_bytes() == b"audio"
+    assert os.path.samefile(source, destination)
+
+def test_pick_speech_track():
+    desktop = {"codec_type": "audio", "channels": 2, "disposition": {"default": 1}}
+    mic = {"codec_type": "audio", "channels": 1}
+    assert AudioProcessor.pick_speech_track([{"codec_type": "video"}, desktop, mic]) == 1
+    titled = dict(desktop, tags={"title": "Voice"})
+    assert AudioProcessor.pick_speech_track([mic, titled]) == 1
+    music = dict(mic, tags={"title": "Music"})
+    assert AudioProcessor.pick_speech_track([music, desktop]) == 1
+    assert AudioProcessor.pick_speech_track([desktop]) == 0
+
+def test_extract_audio_copies_the_speech_track(tmp_path):
+    """The mono microphone track of a two-track video is stream-copied out; audio-only input is left alone."""
+    video = str(tmp_path / "recording.mkv")
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", "testsrc=size=64x64:rate=5:duration=3",
+        "-f", "lavfi", "-i", "sine=frequency=220:duration=3", "-f", "lavfi", "-i", "sine=frequency=880:duration=3",
+        "-map", "0", "-map", "1", "-map", "2", "-c:v", "mpeg4", "-c:a", "aac",
+        "-ac:a:0", "2", "-ac:a:1", "1", video
+    ], check=True, capture_output=True)
+
+    extracted = AudioProcessor.extract_audio(video, str(tmp_path))
+
+    assert extracted == str(tmp_path / "recording.m4a")
+    streams = AudioProcessor.media_streams(extracted)
+    assert [(s["codec_type"], s["codec_name"], s["channels"]) for s in streams] == [("audio", "aac", 1)]
+    assert AudioProcessor.extract_audio(extracted, str(tmp_path / "none")) is None
+
+def test_plan_packet_cuts():
+    packets = [(i * 0.5, 100) for i in range(10)] # 5s of 100-byte packets
+    assert AudioProcessor.plan_packet_cuts(packets, 0, 10000) == []
+    assert AudioProcessor.plan_packet_cuts(packets, 2, 10000) == [4, 8]
+    assert AudioProcessor.plan_packet_cuts(packets, 0, 350) == [3, 6, 9]
+    assert AudioProcessor.plan_packet_cuts(packets, 1, 350) == [2, 4, 6, 8]
+
+@pytest.mark.parametrize("extension, codec_args", [
+    (".mp3", ["-c:a", "libmp3lame", "-q:a", "5"]), # VBR
+    (".ogg", ["-c:a", "libopus", "-b:a", "16k"]),
+    (".flac", ["-c:a", "flac"]),
+])
+def test_vbr_chunks_stay_under_both_limits(tmp_path, extension, codec_args):
+    """Chunks cut from packet sizes respect the byte and duration limits in a single split."""
+    source = str(tmp_path / f"lecture{extension}")
+    # Loud noise then near-silence, so the bitrate varies widely along the file
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", "anoisesrc=duration=60:amplitude=0.3,volume=enable='gt(t,30)':volume=0.01",
+        "-ac", "1", "-ar", "16000", *codec_args, source
+    ], check=True, capture_output=True)
+    max_size_mb = os.path.getsize(source) / 3 / (1024 * 1024)
+
+    with patch.object(AudioProcessor, "split_into_chunks") as mock_fixed_split:
+        chunks = AudioProcessor.process_for_transcription(source, segment_time=25, max_size_mb=max_size_mb,
+                                                          output_dir=str(tmp_path / "chunks"))
+
+    mock_fixed_split.assert_not_called()
+    assert len(chunks) >= 3
+    durations = [AudioProcessor.get_duration(chunk) for chunk in chunks]
+    for chunk, duration in zip(chunks, durations):
+        assert os.path.getsize(chunk) < max_size_mb * 1024 * 1024
+        assert duration <= 25.1
+    # Each chunk reports its own length, not the whole recording's
+    assert sum(durations) == pytest.approx(60, abs=0.5)
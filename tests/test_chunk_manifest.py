@@ -0,0 +1,55 @@
+import os
+import sys
+import hashlib
+import pytest
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.chunk_manifest import ChunkManifest
+
+@pytest.fixture
+def chunks(tmp_path):
+    paths = []
+    for i, data in enumerate([b"first chunk", b"second"], start=1):
+        path = tmp_path / f"job_m1_chunk_{i:03d}.mp3"
+        path.write_bytes(data)
+        paths.append(str(path))
+    return paths
+
+def test_create_records_chunk_details(tmp_path, chunks):
+    path = ChunkManifest.path_for(str(tmp_path), "m1")
+    manifest = ChunkManifest.create(path, chunks, duration_of=lambda p: 30)
+
+    first = manifest.entry(1)
+    assert first["path"] == chunks[0]
+    assert first["size"] == len(b"first chunk")
+    assert first["duration"] == 30.0
+    assert first["checksum"] == hashlib.sha256(b"first chunk").hexdigest()
+    assert first["state"] == ChunkManifest.PENDING
+    assert ChunkManifest.load(path).chunks == manifest.chunks
+
+def test_parts_complete_in_any_order(tmp_path, chunks):
+    manifest = ChunkManifest.create(ChunkManifest.path_for(str(tmp_path), "m1"), chunks)
+    manifest.mark_done(2, "two")
+    assert [c["index"] for c in manifest.pending()] == [1]
+    assert not manifest.is_complete()
+
+    manifest.mark_done(1, "one\n\nstill one")
+    assert manifest.is_complete()
+    transcript = tmp_path / "transcript.txt"
+    manifest.assemble(str(transcript))
+    assert transcript.read_text(encoding="utf-8") == "one\n\nstill one\n\ntwo\n\n"
+
+def test_missing_part_is_pending_again(tmp_path, chunks):
+    path = ChunkManifest.path_for(str(tmp_path), "m1")
+    manifest = ChunkManifest.create(path, chunks)
+    manifest.mark_done(1, "one")
+    os.remove(manifest.entry(1)["part"])
+    assert [c["index"] for c in ChunkManifest.load(path).pending()] == [1, 2]
+
+def test_load_missing_or_corrupt_manifest(tmp_path):
+    path = tmp_path / "job_m1_manifest.json"
+    assert ChunkManifest.load(str(path)) is None
+    path.write_text("{not json", encoding="utf-8")
+    assert ChunkManifest.load(str(path)) is None
@@ -79,3 +79,36 @@ def test_cleanup_all_temp_files_excluding_uploads(tmp_path):
     
     assert not os.path.exists(temp_dir / "junk.mp3")
     assert os.path.exists(uploads_dir / "class.mp3") # Should STILL exist
+
+def test_cleanup_scratch_dir(tmp_path):
+    """Test that a job's scratch directory is removed whole, but never the temp root."""
+    temp_dir = tmp_path / "temp"
+    scratch = temp_dir / "job1"
+    scratch.mkdir(parents=True)
+    (scratch / "job_job1_chunk_001.mp3").write_text("c1")
+
+    assert FileCleanupService.cleanup_scratch_dir({"id": "job1", "scratch_dir": str(scratch)}, str(temp_dir)) is True
+    assert not os.path.exists(scratch)
+    assert FileCleanupService.cleanup_scratch_dir({"id": "job1", "scratch_dir": str(temp_dir)}, str(temp_dir)) is False
+    assert FileCleanupService.cleanup_scratch_dir({"id": "job2"}, str(temp_dir)) is False
+    assert os.path.exists(temp_dir)
+
+def test_targeted_purge_matches_names_exactly(tmp_path):
+    """Test that purging "Lecture 1" leaves "Lecture 10" alone and removes the scratch directory."""
+    temp_dir = tmp_path / "temp"
+    down_dir = tmp_path / "downloads"
+    scratch = temp_dir / "1"
+    scratch.mkdir(parents=True)
+    down_dir.mkdir()
+    (scratch / "Lecture_1_transcript.txt").write_text("t1")
+    (temp_dir / "Lecture_10_transcript.txt").write_text("t10")
+    for name in ["Lecture_1.mp3", "Lecture_1.webm.part", "Lecture_10.mp3", "Lecture_10.webm.part"]:
+        (down_dir / name).write_text("audio")
+
+    jobs = [{"id": "1", "name": "Lecture 1", "status": "completed", "scratch_dir": str(scratch)}]
+    with patch("src.downloader.get_expected_audio_path", side_effect=lambda j: str(down_dir / "Lecture_1.mp3")):
+        FileCleanupService.cleanup_all_temp_files(temp_dir=str(temp_dir), downloads_dir=str(down_dir), jobs_to_purge=jobs)
+
+    assert not os.path.exists(scratch)
+    assert sorted(os.listdir(down_dir)) == ["Lecture_10.mp3", "Lecture_10.webm.part"]
+    assert os.path.exists(temp_dir / "Lecture_10_transcript.txt")
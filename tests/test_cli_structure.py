@@ -31,6 +31,48 @@ class TestCLIStructure(unittest.TestCase):
             zaknotes.main()
             mock_main_menu.assert_not_called()
 
+    @patch('zaknotes.run_worker')
+    @patch('zaknotes.main_menu')
+    def test_worker_flag(self, mock_main_menu, mock_run_worker):
+        """Test that --worker runs the queue worker instead of the menu."""
+        with patch.object(sys, 'argv', ['zaknotes.py', '--worker', '--worker-id', 'box1']):
+            zaknotes.main()
+            mock_run_worker.assert_called_once_with('box1')
+            mock_main_menu.assert_not_called()
+
+    @patch('zaknotes.manage_transcript_cache')
+    @patch('zaknotes.main_menu')
+    def test_cache_flags(self, mock_main_menu, mock_cache):
+        """Test that the transcript cache flags run the cache tool instead of the menu."""
+        with patch.object(sys, 'argv', ['zaknotes.py', '--cache-info']):
+            zaknotes.main()
+        mock_cache.assert_called_with(True, None)
+        with patch.object(sys, 'argv', ['zaknotes.py', '--cache-prune']):
+            zaknotes.main()
+        mock_cache.assert_called_with(False, -1)
+        with patch.object(sys, 'argv', ['zaknotes.py', '--cache-prune', '50']):
+            zaknotes.main()
+        mock_cache.assert_called_with(False, 50.0)
+        mock_main_menu.assert_not_called()
+
+    @patch('zaknotes.benchmark_audio_profiles')
+    @patch('zaknotes.main_menu')
+    def test_benchmark_profiles_flag(self, mock_main_menu, mock_benchmark):
+        """Test that --benchmark-profiles runs the profile benchmark instead of the menu."""
+        with patch.object(sys, 'argv', ['zaknotes.py', '--benchmark-profiles', 'lecture.mp3', '--round-trip']):
+            zaknotes.main()
+        mock_benchmark.assert_called_once_with('lecture.mp3', True)
+        mock_main_menu.assert_not_called()
+
+    @patch('zaknotes.benchmark_audio_tempos')
+    @patch('zaknotes.main_menu')
+    def test_benchmark_tempo_flag(self, mock_main_menu, mock_benchmark):
+        """Test that --benchmark-tempo parses --tempos and runs the tempo benchmark."""
+        with patch.object(sys, 'argv', ['zaknotes.py', '--benchmark-tempo', 'lecture.mp3', '--tempos', '1,1.5']):
+            zaknotes.main()
+        mock_benchmark.assert_called_once_with('lecture.mp3', [1.0, 1.5], False)
+        mock_main_menu.assert_not_called()
+
     @patch('builtins.input', side_effect=['10']) # Exit choice
     @patch('builtins.print')
     def test_main_menu_has_rclone_option(self, mock_print, mock_input):
@@ -2,6 +2,7 @@ import os
 import json
 import sys
 import pytest
+from unittest.mock import patch
 
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -70,3 +71,25 @@ def test_auto_profile_assignment(config_manager):
     with open(TEST_CONFIG_FILE, 'r') as f:
         data = json.load(f)
         assert "performance_profile" in data
+
+def test_max_concurrent_jobs_from_profile(config_manager):
+    """Test that concurrency defaults from the performance profile unless set explicitly."""
+    config_manager.set("performance_profile", "balanced")
+    assert config_manager.get_max_concurrent_jobs() == 2
+
+    config_manager.set("performance_profile", "high")
+    assert config_manager.get_max_concurrent_jobs() == 4
+
+    config_manager.set("max_concurrent_jobs", 3)
+    assert config_manager.get_max_concurrent_jobs() == 3
+
+def test_prep_workers_share_the_cores(config_manager):
+    """Auto prep workers split the cores between the jobs that can prep at once."""
+    config_manager.set("max_concurrent_jobs", 2)
+    with patch.object(config_manager, "detect_system_resources", return_value=(8, 16.0)):
+        assert config_manager.get_prep_workers() == 4
+        config_manager.set("pipeline_mode", "staged")
+        assert config_manager.get_prep_workers() == 8 # one audio stage worker
+
+    config_manager.set("prep_workers", 3)
+    assert config_manager.get_prep_workers() == 3
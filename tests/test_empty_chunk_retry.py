@@ -5,7 +5,7 @@ from unittest.mock import AsyncMock, patch, MagicMock
 from src.gemini_api_wrapper import GeminiAPIWrapper
 
 @pytest.mark.anyio
-async def test_generate_content_empty_retry(monkeypatch):
+async def test_generate_content_empty_retry(monkeypatch, sse_response):
     # Mock ConfigManager, AuthService, UsageTracker
     mock_config = MagicMock()
     mock_config.get.side_effect = lambda k, default=None: {
@@ -26,27 +26,25 @@ async def test_generate_content_empty_retry(monkeypatch):
     # Set short max_delay for backoff to speed up test
     wrapper.backoff_manager.max_delay = 0.5
     
-    # Mock httpx.AsyncClient
+    # Mock the streamed responses of httpx.AsyncClient
     responses = [
         # First response: Empty SSE data
-        AsyncMock(status_code=200, iter_lines=MagicMock(return_value=[b"data: {}\n"])),
+        sse_response(lines=["data: {}"]),
         # Second response: Whitespace only
-        AsyncMock(status_code=200, iter_lines=MagicMock(return_value=[b'data: {"response": {"candidates": [{"content": {"parts": [{"text": "   "}]}}]}}\n'])),
+        sse_response(lines=['data: {"response": {"candidates": [{"content": {"parts": [{"text": "   "}]}}]}}']),
         # Third response: Success
-        AsyncMock(status_code=200, iter_lines=MagicMock(return_value=[b'data: {"response": {"candidates": [{"content": {"parts": [{"text": "Hello world"}]}}]}}\n']))
+        sse_response(lines=['data: {"response": {"candidates": [{"content": {"parts": [{"text": "Hello world"}]}}]}}'])
     ]
     
     call_count = 0
-    async def mock_post(*args, **kwargs):
+    def mock_stream(*args, **kwargs):
         nonlocal call_count
         resp = responses[call_count]
         call_count += 1
         return resp
 
-    # We need to mock the context manager __aenter__
-    mock_client = AsyncMock()
-    mock_client.post = mock_post
-    mock_client.__aenter__.return_value = mock_client
+    mock_client = MagicMock()
+    mock_client.stream = mock_stream
     
     with patch("httpx.AsyncClient", return_value=mock_client):
         text = await wrapper.generate_content_async("test prompt")
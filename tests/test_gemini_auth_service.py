@@ -59,3 +59,55 @@ def test_account_cycling(auth_service):
     assert auth_service.get_next_account()["email"] == "u1"
     assert auth_service.get_next_account()["email"] == "u2"
     assert auth_service.get_next_account()["email"] == "u1"
+
+def make_record(email, expires_in_s):
+    return {"email": email, "status": "valid", "access": "old", "refresh": f"r-{email}",
+            "expires": int(time.time() * 1000) + expires_in_s * 1000, "projectId": "p", "clientId": "c", "clientSecret": None}
+
+@pytest.mark.anyio
+async def test_concurrent_refreshes_are_single_flight(auth_service):
+    import asyncio
+    record = make_record("u1", -10)
+    auth_service.accounts = [record]
+    calls = []
+
+    async def fake_refresh(rec, save=True):
+        calls.append(rec["email"])
+        await asyncio.sleep(0.05)
+        rec["access"] = "new"
+        rec["expires"] = int(time.time() * 1000) + 3600000
+        return rec
+
+    with patch.object(auth_service, "refresh_token", side_effect=fake_refresh):
+        results = await asyncio.gather(*(auth_service.get_valid_account(record) for _ in range(5)))
+
+    assert calls == ["u1"]
+    assert all(r["access"] == "new" for r in results)
+
+@pytest.mark.anyio
+async def test_refresh_accounts_runs_concurrently_and_saves_once(auth_service):
+    import asyncio
+    auth_service.refresh_margin = 300
+    auth_service.accounts = [make_record("u1", 60), make_record("u2", 120), make_record("u3", 7200)]
+    active = {"now": 0, "peak": 0}
+
+    async def fake_refresh(rec, save=True):
+        assert save is False
+        active["now"] += 1
+        active["peak"] = max(active["peak"], active["now"])
+        await asyncio.sleep(0.02)
+        active["now"] -= 1
+        if rec["email"] == "u2":
+            raise Exception("revoked")
+        return rec
+
+    with patch.object(auth_service, "refresh_token", side_effect=fake_refresh), \
+         patch.object(auth_service, "_save_accounts") as mock_save:
+        results = await auth_service.refresh_accounts()
+
+    # Only tokens inside the refresh margin are renewed, in parallel
+    assert set(results) == {"u1", "u2"}
+    assert results["u1"] is None
+    assert str(results["u2"]) == "revoked"
+    assert active["peak"] == 2
+    mock_save.assert_called_once()
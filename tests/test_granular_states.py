@@ -6,16 +6,20 @@ import pytest
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.job_manager import JobManager, HISTORY_FILE
+from src.job_manager import JobManager, HISTORY_FILE, JOBS_DB
+
+def remove_job_files():
+    for path in [HISTORY_FILE, JOBS_DB, JOBS_DB + "-wal", JOBS_DB + "-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
 
 @pytest.fixture
 def job_manager():
-    if os.path.exists(HISTORY_FILE):
-        os.remove(HISTORY_FILE)
+    remove_job_files()
     manager = JobManager()
     yield manager
-    if os.path.exists(HISTORY_FILE):
-        os.remove(HISTORY_FILE)
+    manager.store.close()
+    remove_job_files()
 
 def test_granular_states_retrieval(job_manager):
     """Test that jobs in granular states are correctly retrieved as pending."""
@@ -0,0 +1,73 @@
+import pytest
+import httpx
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.gemini_api_wrapper import GeminiAPIWrapper
+from src.gemini_auth_service import GeminiAuthService
+
+OK_LINE = 'data: {"response": {"candidates": [{"content": {"parts": [{"text": "ok"}]}}]}}'
+
+@pytest.fixture
+def wrapper():
+    mock_config = MagicMock()
+    mock_config.get.side_effect = lambda k, default=None: {"http_max_connections": 7}.get(k, default)
+    mock_auth = MagicMock()
+    mock_auth.accounts = [{"email": "a@example.com", "status": "valid", "projectId": "p1", "access": "t1"}]
+    mock_auth.get_next_account.return_value = mock_auth.accounts[0]
+    async def mock_get_valid(acc): return acc
+    mock_auth.get_valid_account = mock_get_valid
+    api = GeminiAPIWrapper(config=mock_config, auth_service=mock_auth, usage_tracker=MagicMock())
+    yield api
+    api.close()
+
+@pytest.mark.anyio
+async def test_client_is_reused_across_requests(wrapper, sse_response):
+    with patch.object(httpx.AsyncClient, "stream", side_effect=lambda *args, **kwargs: sse_response(lines=[OK_LINE])):
+        assert await wrapper.generate_content_async("one") == "ok"
+        first = wrapper.get_http_client()
+        assert await wrapper.generate_content_async("two") == "ok"
+        assert wrapper.get_http_client() is first
+
+    await wrapper.aclose()
+    assert first.is_closed
+
+def test_pool_limits_come_from_config(wrapper):
+    with patch("httpx.AsyncClient") as mock_client_cls:
+        wrapper._create_http_client()
+    kwargs = mock_client_cls.call_args.kwargs
+    assert kwargs["limits"].max_connections == 7
+    assert kwargs["timeout"] == wrapper.api_timeout
+
+def test_sync_calls_share_background_loop_client(wrapper, sse_response):
+    created = []
+    real_create = wrapper._create_http_client
+
+    def track():
+        client = real_create()
+        created.append(client)
+        return client
+
+    wrapper._create_http_client = track
+    with patch.object(httpx.AsyncClient, "stream", side_effect=lambda *args, **kwargs: sse_response(lines=[OK_LINE])):
+        assert wrapper.generate_content("one") == "ok"
+        assert wrapper.generate_content("two") == "ok"
+
+    assert len(created) == 1
+    thread = wrapper._loop_thread
+    wrapper.close()
+    assert created[0].is_closed
+    assert not thread.is_alive()
+    # Closing twice is harmless
+    wrapper.close()
+
+@pytest.mark.anyio
+async def test_auth_service_uses_provided_client(tmp_path):
+    service = GeminiAuthService(auth_file=str(tmp_path / "auth.json"))
+    shared = MagicMock()
+    shared.get = AsyncMock(return_value=MagicMock(status_code=200, json=MagicMock(return_value={"email": "a@example.com"})))
+    service.http_client_provider = lambda: shared
+
+    with patch("httpx.AsyncClient") as mock_client_cls:
+        assert await service._get_user_email("token") == "a@example.com"
+
+    mock_client_cls.assert_not_called()
+    shared.get.assert_awaited_once()
@@ -0,0 +1,129 @@
+import os
+import sys
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.job_executor import JobExecutor, StagedJobExecutor
+
+def make_jobs(count):
+    return [{"id": str(i), "name": f"Job {i}", "status": "queue"} for i in range(count)]
+
+def test_runs_jobs_concurrently_within_bound():
+    """Test that no more than max_workers jobs run at the same time."""
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def execute_job(job):
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        time.sleep(0.05)
+        with lock:
+            state["active"] -= 1
+        return True
+
+    pipeline = MagicMock()
+    pipeline.execute_job.side_effect = execute_job
+
+    results = JobExecutor(pipeline, max_workers=3).run(make_jobs(8))
+
+    assert len(results) == 8
+    assert all(results.values())
+    assert state["peak"] == 3
+
+def test_failed_job_does_not_cancel_others():
+    """Test that a failed or crashing job leaves the rest of the batch running."""
+    def execute_job(job):
+        if job["id"] == "1":
+            return False
+        if job["id"] == "2":
+            raise RuntimeError("boom")
+        return True
+
+    pipeline = MagicMock()
+    pipeline.execute_job.side_effect = execute_job
+
+    results = JobExecutor(pipeline, max_workers=2).run(make_jobs(5))
+
+    assert results == {"0": True, "1": False, "2": False, "3": True, "4": True}
+    # Only the crashing job is marked failed by the executor; the rest handle their own status
+    pipeline.manager.update_job_status.assert_called_once_with("2", "failed")
+
+def test_sequential_when_single_worker():
+    """Test that a single worker processes jobs in order."""
+    order = []
+    pipeline = MagicMock()
+    pipeline.execute_job.side_effect = lambda job: order.append(job["id"]) or True
+
+    JobExecutor(pipeline, max_workers=1).run(make_jobs(4))
+
+    assert order == ["0", "1", "2", "3"]
+
+class FakeStagedPipeline:
+    """Minimal pipeline exposing the stage interface used by StagedJobExecutor."""
+    STAGES = ["download", "audio", "transcribe", "notes"]
+
+    def __init__(self, fail_at=None):
+        self.manager = MagicMock()
+        self.fail_at = fail_at or {}
+        self.lock = threading.Lock()
+        self.calls = []
+        self.active = {stage: 0 for stage in self.STAGES}
+        self.overlap = set()
+
+    def create_context(self, job):
+        return {"job": job}
+
+    def run_stage(self, stage, ctx):
+        job_id = ctx["job"]["id"]
+        with self.lock:
+            self.calls.append((stage, job_id))
+            self.active[stage] += 1
+            busy = [s for s, n in self.active.items() if n > 0]
+            if len(busy) > 1:
+                self.overlap.update(busy)
+        time.sleep(0.02)
+        with self.lock:
+            self.active[stage] -= 1
+        return self.fail_at.get(job_id) != stage
+
+def test_staged_executor_runs_all_stages_in_order():
+    """Test that every job goes through every stage in order and stages overlap across jobs."""
+    pipeline = FakeStagedPipeline()
+    executor = StagedJobExecutor(pipeline, stage_workers={"download": 2, "transcribe": 2}, queue_size=1)
+
+    results = executor.run(make_jobs(6))
+
+    assert results == {str(i): True for i in range(6)}
+    for i in range(6):
+        stages = [s for s, job_id in pipeline.calls if job_id == str(i)]
+        assert stages == FakeStagedPipeline.STAGES
+    # Different jobs were in different stages at the same time
+    assert len(pipeline.overlap) > 1
+
+def test_staged_executor_failure_stops_only_that_job():
+    """Test that a job failing in one stage is not passed on and others still finish."""
+    pipeline = FakeStagedPipeline(fail_at={"1": "audio"})
+
+    results = StagedJobExecutor(pipeline).run(make_jobs(3))
+
+    assert results == {"0": True, "1": False, "2": True}
+    assert ("transcribe", "1") not in pipeline.calls
+
+def test_staged_executor_survives_failing_record():
+    """Test that a job whose result cannot be saved does not take its worker (and run()) down."""
+    pipeline = FakeStagedPipeline(fail_at={"0": "audio"})
+    pipeline.manager.save_history.side_effect = OSError("disk full")
+    results = {}
+
+    runner = threading.Thread(target=lambda: results.update(StagedJobExecutor(pipeline).run(make_jobs(3))), daemon=True)
+    runner.start()
+    runner.join(timeout=5)
+
+    assert not runner.is_alive()
+    assert results == {"0": False, "1": True, "2": True}
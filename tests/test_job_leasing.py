@@ -0,0 +1,150 @@
+import os
+import sys
+import time
+import threading
+import pytest
+from unittest.mock import MagicMock
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.job_manager import JobManager
+from src.job_executor import LeasedJobWorker, JobLeases
+from src.pipeline import ProcessingPipeline
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "jobs.db")
+
+def seed(db_path, jobs):
+    manager = JobManager(db_path=db_path)
+    manager.history = jobs
+    manager.save_history()
+    return manager
+
+def test_claim_is_exclusive_across_managers(db_path):
+    """Test that two processes sharing the store never claim the same job."""
+    seed(db_path, [{"id": "1", "status": "queue"}, {"id": "2", "status": "completed"}, {"id": "3", "status": "CHUNKED"}])
+    worker_a = JobManager(db_path=db_path)
+    worker_b = JobManager(db_path=db_path)
+
+    assert worker_a.claim_job("a", 60)["id"] == "1"
+    assert worker_b.claim_job("b", 60)["id"] == "3"
+    assert worker_a.claim_job("a", 60) is None
+    assert worker_b.store.lease_owner("1") == "a"
+
+def test_lapsed_lease_returns_job_to_queue(db_path):
+    """Test that a job whose worker stopped heartbeating can be claimed again."""
+    seed(db_path, [{"id": "1", "status": "TRANSCRIBING_CHUNK_2"}])
+    dead = JobManager(db_path=db_path)
+    live = JobManager(db_path=db_path)
+
+    assert dead.claim_job("dead", 0.05)["id"] == "1"
+    assert live.claim_job("live", 60) is None
+    time.sleep(0.1)
+    job = live.claim_job("live", 60)
+    assert job["status"] == "TRANSCRIBING_CHUNK_2"
+    # The old owner can no longer extend the lease
+    assert dead.renew_lease("1", "dead", 60) is False
+    assert live.renew_lease("1", "live", 60) is True
+
+def test_release_and_status_updates_keep_lease_columns(db_path):
+    """Test that status writes do not clear the lease and release does."""
+    manager = seed(db_path, [{"id": "1", "status": "queue"}])
+    job = manager.claim_job("w", 60)
+    manager.update_job_status(job["id"], "DOWNLOADED")
+    assert manager.store.lease_owner("1") == "w"
+    manager.release_job("1", "w")
+    assert manager.store.lease_owner("1") is None
+    assert JobManager(db_path=db_path).get_job("1")["status"] == "DOWNLOADED"
+
+def test_workers_drain_queue_once(db_path):
+    """Test that parallel worker processes run every queued job exactly once."""
+    seed(db_path, [{"id": str(i), "name": f"Job {i}", "status": "queue"} for i in range(8)])
+    runs = []
+    lock = threading.Lock()
+
+    def make_worker(name):
+        manager = JobManager(db_path=db_path)
+        pipeline = MagicMock()
+        pipeline.manager = manager
+
+        def execute_job(job):
+            with lock:
+                runs.append(job["id"])
+            time.sleep(0.01)
+            manager.update_job_status(job["id"], "failed" if job["id"] == "5" else "completed")
+            return job["id"] != "5"
+
+        pipeline.execute_job.side_effect = execute_job
+        return LeasedJobWorker(pipeline, worker_id=name, heartbeat_interval=0.005, max_workers=2)
+
+    workers = [make_worker("a"), make_worker("b")]
+    results = {}
+    threads = [threading.Thread(target=lambda w=w: results.update(w.run())) for w in workers]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert all(runs.count(str(i)) == 1 for i in range(8) if i != 5)
+    # A failed job goes back to the queue, but each worker tries it at most once per run
+    assert 1 <= runs.count("5") <= len(workers)
+    assert set(results) == {str(i) for i in range(8)}
+    assert results["5"] is False
+    final = JobManager(db_path=db_path)
+    assert [j["status"] for j in final.history].count("completed") == 7
+
+def test_menu_batch_skips_leased_jobs(db_path):
+    """Test that a batch handed to an executor only gets the jobs no worker holds, and releases them."""
+    seed(db_path, [{"id": "1", "status": "queue"}, {"id": "2", "status": "queue"}, {"id": "3", "status": "queue"}])
+    worker = JobManager(db_path=db_path)
+    assert worker.claim_job("worker", 60)["id"] == "1"
+
+    menu = JobManager(db_path=db_path)
+    leases = JobLeases(menu, owner="menu", heartbeat_interval=0.005)
+    claimed = leases.claim(menu.get_pending_from_last_150())
+    assert [job["id"] for job in claimed] == ["2", "3"]
+    with leases:
+        time.sleep(0.02)
+        assert menu.store.lease_owner("3") == "menu"
+    assert menu.store.lease_owner("3") is None
+    assert menu.store.lease_owner("1") == "worker"
+
+def test_cancel_and_fail_skip_leased_jobs(db_path):
+    """Test that bulk cancel/fail leave a job another worker is running untouched."""
+    seed(db_path, [{"id": "1", "status": "queue"}, {"id": "2", "status": "CHUNKED"}])
+    worker = JobManager(db_path=db_path)
+    worker.claim_job("worker", 60)
+    worker.update_job_status("1", "DOWNLOADED")
+
+    menu = JobManager(db_path=db_path)
+    menu.fail_pending()
+    menu.cancel_pending()
+
+    final = JobManager(db_path=db_path)
+    assert final.get_job("1")["status"] == "DOWNLOADED"
+    assert final.get_job("2")["status"] == "cancelled"
+    assert final.get_job("2")["last_granular_state"] == "CHUNKED"
+    assert menu.get_job("2")["status"] == "cancelled"
+
+def test_lost_lease_fences_job(db_path):
+    """Test that a worker whose lease lapsed stops the job and no longer writes its row."""
+    seed(db_path, [{"id": "1", "name": "Job 1", "status": "queue"}])
+    slow = JobManager(db_path=db_path)
+    job = slow.claim_job("slow", 0.05)
+    time.sleep(0.1)
+    fast = JobManager(db_path=db_path)
+    assert fast.claim_job("fast", 60)["id"] == "1"
+    fast.update_job_status("1", "CHUNKED")
+
+    pipeline = MagicMock()
+    pipeline.manager = slow
+    worker = LeasedJobWorker(pipeline, worker_id="slow", lease_seconds=0.05, heartbeat_interval=0.005)
+    stop = threading.Event()
+    worker._heartbeat(job, stop)
+
+    assert slow.update_job_status("1", "completed") is False
+    slow.save_history()
+    assert JobManager(db_path=db_path).get_job("1")["status"] == "CHUNKED"
+    assert ProcessingPipeline._lease_lost(job) is True
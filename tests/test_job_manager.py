@@ -2,20 +2,25 @@ import os
 import sys
 import json
 import pytest
+from unittest.mock import patch
 
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from src.job_manager import JobManager, HISTORY_FILE
+from src.job_manager import JobManager, HISTORY_FILE, JOBS_DB
+
+def remove_job_files():
+    for path in [HISTORY_FILE, JOBS_DB, JOBS_DB + "-wal", JOBS_DB + "-shm"]:
+        if os.path.exists(path):
+            os.remove(path)
 
 @pytest.fixture
 def job_manager():
-    if os.path.exists(HISTORY_FILE):
-        os.remove(HISTORY_FILE)
+    remove_job_files()
     manager = JobManager()
     yield manager
-    if os.path.exists(HISTORY_FILE):
-        os.remove(HISTORY_FILE)
+    manager.store.close()
+    remove_job_files()
 
 def test_get_pending_excludes_no_link_found(job_manager):
     """Test that no_link_found jobs are excluded from pending list."""
@@ -46,6 +51,63 @@ def test_fail_pending(job_manager):
     assert job_manager.history[3]["status"] == "failed"
     
     # Check persistence
-    with open(HISTORY_FILE, 'r') as f:
-        data = json.load(f)
-        assert data[0]["status"] == "failed"
+    reloaded = JobManager()
+    assert [j["status"] for j in reloaded.history] == ["failed", "failed", "completed", "failed"]
+    reloaded.store.close()
+
+def test_status_update_writes_single_row(job_manager):
+    """Test that a status change is persisted without rewriting other jobs."""
+    job_manager.history = [{"id": str(i), "name": f"Job {i}", "status": "queue"} for i in range(50)]
+    job_manager.save_history()
+
+    with patch.object(job_manager.store, "write", wraps=job_manager.store.write) as mock_write:
+        assert job_manager.update_job_status("7", "TRANSCRIBING_CHUNK_3") is True
+    rows = mock_write.call_args.args[0]
+    assert rows == [("7", "TRANSCRIBING_CHUNK_3", json.dumps(job_manager.get_job("7")))]
+
+    assert job_manager.store.get("7")["status"] == "TRANSCRIBING_CHUNK_3"
+    assert job_manager.update_job_status("missing", "failed") is False
+
+def test_update_job_records_scratch_dir(job_manager):
+    """Test that extra fields such as the scratch directory are saved with the job."""
+    job_manager.history = [{"id": "1", "name": "Job 1", "status": "queue"}]
+    assert job_manager.update_job("1", scratch_dir=os.path.join("temp", "1")) is True
+    assert job_manager.store.get("1")["scratch_dir"] == os.path.join("temp", "1")
+    assert job_manager.update_job("missing", scratch_dir="x") is False
+
+def test_pending_query_uses_status_index(job_manager):
+    """Test that pending jobs come back in insertion order from the indexed status column."""
+    job_manager.history = [
+        {"id": "a", "status": "completed"},
+        {"id": "b", "status": "TRANSCRIBING_CHUNK_12"},
+        {"id": "c", "status": "queue"},
+        {"id": "d", "status": "TRANSCRIBING_CHUNKY"},
+    ]
+    pending = job_manager.get_pending_from_last_150()
+    assert [j["id"] for j in pending] == ["b", "c"]
+    # The returned jobs are the live records
+    assert pending[0] is job_manager.get_job("b")
+
+    plan = job_manager.store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT id FROM jobs WHERE status IN ('queue')").fetchall()
+    assert any("idx_jobs_status" in row[-1] for row in plan)
+
+def test_migrates_history_json_once():
+    """Test that history.json is imported into the job store only the first time."""
+    remove_job_files()
+    with open(HISTORY_FILE, 'w') as f:
+        json.dump([{"id": "old1", "status": "completed"}, {"id": "old2", "status": "queue"}], f)
+    try:
+        manager = JobManager()
+        assert [j["id"] for j in manager.history] == ["old1", "old2"]
+        manager.update_job_status("old2", "failed")
+        manager.store.close()
+
+        # A later history.json is not re-imported over the store
+        with open(HISTORY_FILE, 'w') as f:
+            json.dump([{"id": "old2", "status": "queue"}], f)
+        manager = JobManager()
+        assert manager.get_job("old2")["status"] == "failed"
+        manager.store.close()
+    finally:
+        remove_job_files()
@@ -27,28 +27,18 @@ def local_job():
 @patch('src.pipeline.AudioProcessor')
 @patch('src.pipeline.GeminiAPIWrapper')
 @patch('src.pipeline.NoteGenerationService.generate')
-@patch('src.pipeline.os')
-@patch('src.pipeline.shutil')
 @patch('src.pipeline.JobManager')
-def test_execute_local_job_success(mock_job_manager_class, mock_shutil, mock_os, mock_notes, mock_api_class, mock_audio_class, mock_down, mock_config, local_job):
+def test_execute_local_job_success(mock_job_manager_class, mock_notes, mock_api_class, mock_audio_class, mock_down, mock_config, local_job, workdir, write_files):
     """Test successful execution of the pipeline with a local file."""
     # Setup mocks
     mock_manager = mock_job_manager_class.get_instance.return_value if hasattr(mock_job_manager_class, 'get_instance') else mock_job_manager_class.return_value
     
-    # OS mocks
-    def exists_side_effect(path):
-        if path == "uploads/test.mp3": return True # Local file exists
-        if "chunk" in path: return True # Chunks exist
-        return False
-    mock_os.path.exists.side_effect = exists_side_effect
-    
-    mock_os.path.join = os.path.join
-    mock_os.path.basename = os.path.basename
-    mock_os.path.splitext = os.path.splitext
+    # Local file exists
+    write_files("uploads/test.mp3")
     
     # AudioProcessor mocks
     mock_audio_class.optimize_audio.return_value = True
-    mock_os.listdir.return_value = ["job_local_123_chunk_001.mp3"]
+    mock_audio_class.process_for_transcription.side_effect = lambda *args, **kwargs: write_files("temp/job_local_123_chunk_001.mp3")
     
     # API mocks
     mock_api = mock_api_class.return_value
@@ -58,16 +48,52 @@ def test_execute_local_job_success(mock_job_manager_class, mock_shutil, mock_os,
     
     pipeline = ProcessingPipeline(mock_config, job_manager=mock_manager)
     
-    with patch('builtins.open', MagicMock()):
-        success = pipeline.execute_job(local_job)
-        
-        assert success is True
-        # Verify download was NEVER called for local job
-        mock_down.assert_not_called()
-        
-        # Verify status update for local job
-        mock_manager.update_job_status.assert_any_call('local_123', 'DOWNLOADED')
-        mock_manager.update_job_status.assert_any_call('local_123', 'completed')
+    success = pipeline.execute_job(local_job)
+    
+    assert success is True
+    # Verify download was NEVER called for local job
+    mock_down.assert_not_called()
+    
+    # Verify status update for local job
+    mock_manager.update_job_status.assert_any_call('local_123', 'DOWNLOADED')
+    mock_manager.update_job_status.assert_any_call('local_123', 'completed')
+
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_local_video_audio_is_extracted(mock_job_manager_class, mock_audio_class, mock_config, local_job, workdir, write_files):
+    """A local video is prepared from its audio track, demuxed into the scratch dir."""
+    video_path, = write_files("uploads/recording.mkv")
+    local_job["file_path"] = video_path
+    mock_audio_class.extract_audio.return_value = os.path.join("temp", "local_123", "recording.m4a")
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_job_manager_class.return_value)
+    ctx = pipeline.create_context(local_job)
+
+    assert pipeline.run_stage("download", ctx) is True
+    mock_audio_class.extract_audio.assert_called_once_with(video_path, ctx["temp_dir"])
+    assert ctx["audio_path"] == os.path.join("temp", "local_123", "recording.m4a")
+
+@patch('src.pipeline.download_audio')
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.GeminiAPIWrapper')
+@patch('src.pipeline.NoteGenerationService.generate')
+@patch('src.pipeline.JobManager')
+def test_local_video_job_cleans_up_upload(mock_job_manager_class, mock_notes, mock_api_class, mock_audio_class, mock_down, mock_config, local_job, workdir, write_files):
+    """A completed local video job removes both the upload and the audio extracted from it."""
+    video_path, = write_files("uploads/recording.mp4")
+    local_job["file_path"] = video_path
+    extracted_path = os.path.join("temp", "local_123", "recording.m4a")
+    mock_audio_class.extract_audio.side_effect = lambda *args: write_files(extracted_path)[0]
+    mock_audio_class.optimize_audio.return_value = True
+    mock_audio_class.process_for_transcription.side_effect = lambda *args, **kwargs: write_files("temp/local_123/job_local_123_chunk_001.mp3")
+    mock_api_class.return_value.generate_content_with_file.return_value = "Transcript text"
+    mock_notes.return_value = True
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_job_manager_class.return_value)
+
+    assert pipeline.execute_job(local_job) is True
+    assert not os.path.exists(video_path)
+    assert not os.path.exists(extracted_path)
 
 if __name__ == '__main__':
     pytest.main([__file__])
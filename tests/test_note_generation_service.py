@@ -2,7 +2,7 @@ import os
 import sys
 import json
 import pytest
-from unittest.mock import patch
+from unittest.mock import AsyncMock, patch
 
 # Add project root to sys.path
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -172,3 +172,16 @@ def test_generate_custom_prompt(mock_gen, transcript_file, output_md):
 
 
     assert "This is the transcript." in kwargs['prompt']
+
+
+@pytest.mark.anyio
+async def test_generate_async_closes_owned_wrapper(transcript_file, output_md):
+    with patch('src.note_generation_service.GeminiAPIWrapper') as mock_cls:
+        api = mock_cls.return_value
+        api.generate_content_async = AsyncMock(return_value="# Notes")
+        api.aclose = AsyncMock()
+
+        success = await NoteGenerationService.generate_async(transcript_file, output_md)
+
+    assert success is True
+    api.aclose.assert_awaited_once()
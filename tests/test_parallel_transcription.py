@@ -0,0 +1,121 @@
+import os
+import sys
+import time
+import asyncio
+import threading
+import pytest
+from unittest.mock import patch, MagicMock, AsyncMock
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.pipeline import ProcessingPipeline
+from src.chunk_manifest import ChunkManifest
+
+def make_pipeline(max_inflight=3):
+    config = MagicMock()
+    config.get.side_effect = lambda key, default=None: {"max_inflight_chunks": max_inflight}.get(key, default)
+    with patch('src.pipeline.NotionConfigManager'), \
+         patch('src.pipeline.RcloneConfigManager'), \
+         patch('src.pipeline.RcloneService'):
+        return ProcessingPipeline(config, api_wrapper=MagicMock(), job_manager=MagicMock())
+
+def make_context(pipeline, tmp_path, count):
+    ctx = pipeline.create_context({"id": "p1", "name": "Parallel Job"})
+    ctx["chunks"] = [str(tmp_path / f"job_p1_chunk_{i:03d}.mp3") for i in range(1, count + 1)]
+    for chunk in ctx["chunks"]:
+        with open(chunk, "wb") as f:
+            f.write(b"audio")
+    ctx["temp_dir"] = str(tmp_path)
+    return ctx
+
+def read(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def test_chunks_run_in_parallel_and_are_written_in_order(tmp_path):
+    """Test that chunks finishing out of order still land in the transcript in chunk order."""
+    pipeline = make_pipeline(max_inflight=3)
+    ctx = make_context(pipeline, tmp_path, 5)
+    lock = threading.Lock()
+    state = {"active": 0, "peak": 0}
+
+    def transcribe(file_path, **kwargs):
+        index = int(file_path[-7:-4])
+        with lock:
+            state["active"] += 1
+            state["peak"] = max(state["peak"], state["active"])
+        # Earlier chunks take longer, so completion order is reversed
+        time.sleep(0.02 * (6 - index))
+        with lock:
+            state["active"] -= 1
+        return f"text {index}"
+
+    pipeline.api.generate_content_with_file.side_effect = transcribe
+
+    assert pipeline._stage_transcribe(ctx) is True
+    assert ctx["transcript_path"] == str(tmp_path / "Parallel_Job_transcript.txt")
+    assert state["peak"] == 3
+    assert read(ctx["transcript_path"]) == "".join(f"text {i}\n\n" for i in range(1, 6))
+
+def test_failure_keeps_finished_chunks_for_resume(tmp_path):
+    """Test that a failed chunk stops dispatching and every chunk finished so far is kept."""
+    pipeline = make_pipeline(max_inflight=2)
+    ctx = make_context(pipeline, tmp_path, 5)
+
+    def transcribe(file_path, **kwargs):
+        index = int(file_path[-7:-4])
+        if index == 2:
+            raise Exception("quota")
+        # Chunk 1 is still in flight when chunk 2 fails, and is kept
+        time.sleep(0.05)
+        return f"text {index}"
+
+    pipeline.api.generate_content_with_file.side_effect = transcribe
+
+    assert pipeline._stage_transcribe(ctx) is False
+    pipeline.manager.update_job_status.assert_called_with("p1", "failed")
+    # The transcript is only assembled once every chunk is done
+    assert not os.path.exists(ctx["transcript_path"])
+    assert [c["state"] for c in ctx["manifest"].chunks][:2] == ["done", "pending"]
+    assert read(ctx["manifest"].entry(1)["part"]) == "text 1"
+    dispatched = [c.kwargs["file_path"] for c in pipeline.api.generate_content_with_file.call_args_list]
+    assert ctx["chunks"][4] not in dispatched
+
+    # Resuming (from a fresh context) transcribes exactly the pending chunks
+    pipeline.api.generate_content_with_file.side_effect = lambda file_path, **kwargs: f"text {int(file_path[-7:-4])}"
+    pipeline.api.generate_content_with_file.reset_mock()
+    resumed = make_context(pipeline, tmp_path, 5)
+    resumed["manifest"] = ChunkManifest.load(ctx["manifest"].path)
+    assert pipeline._stage_transcribe(resumed) is True
+    assert pipeline.api.generate_content_with_file.call_count == 4
+    ctx = resumed
+    assert read(ctx["transcript_path"]) == "".join(f"text {i}\n\n" for i in range(1, 6))
+
+@pytest.mark.anyio
+async def test_async_chunks_written_in_order(tmp_path):
+    """Test that the async transcription stage bounds in-flight chunks and keeps order."""
+    pipeline = make_pipeline(max_inflight=2)
+    ctx = make_context(pipeline, tmp_path, 4)
+    pipeline.api.backoff_manager.async_sleep = AsyncMock()
+    state = {"active": 0, "peak": 0}
+
+    async def transcribe(file_path, **kwargs):
+        index = int(file_path[-7:-4])
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        await asyncio.sleep(0.01 * (5 - index))
+        state["active"] -= 1
+        return f"text {index}"
+
+    pipeline.api.generate_content_with_file_async = transcribe
+
+    assert await pipeline._stage_transcribe_async(ctx) is True
+    assert state["peak"] == 2
+    assert read(ctx["transcript_path"]) == "".join(f"text {i}\n\n" for i in range(1, 5))
+
+def test_auto_concurrency_uses_account_count():
+    """Test that max_inflight_chunks = 0 follows the number of usable accounts."""
+    pipeline = make_pipeline(max_inflight=0)
+    pipeline.api.available_account_count.return_value = 4
+    assert pipeline._chunk_concurrency() == 4
@@ -30,10 +30,8 @@ def job():
 @patch('src.pipeline.AudioProcessor')
 @patch('src.pipeline.GeminiAPIWrapper')
 @patch('src.pipeline.NoteGenerationService.generate')
-@patch('src.pipeline.os')
-@patch('src.pipeline.shutil')
 @patch('src.pipeline.JobManager')
-def test_execute_job_success(mock_job_manager_class, mock_shutil, mock_os, mock_notes, mock_api_class, mock_audio_class, mock_down, mock_config, job):
+def test_execute_job_success(mock_job_manager_class, mock_notes, mock_api_class, mock_audio_class, mock_down, mock_config, job, workdir, write_files):
     """Test successful execution of the full pipeline."""
     # Setup mocks
     mock_down.return_value = "downloads/Test_Job.mp3"
@@ -44,25 +42,11 @@ def test_execute_job_success(mock_job_manager_class, mock_shutil, mock_os, mock_
     # AudioProcessor mocks
     mock_audio_class.remove_silence.return_value = True
     mock_audio_class.reencode_to_optimal.return_value = True
-    mock_audio_class.process_for_transcription.return_value = ["temp/job_123_chunk_001.mp3"]
-    
-    # OS mocks
-    mock_os.path.exists.return_value = False # Default to false
-    # But specific paths need to be true/false logic
-    def exists_side_effect(path):
-        if path == "downloads/Test_Job.mp3": return True # Downloaded file
-        if "prepared" in path: return False # Not processed yet
-        if "chunk" in path: return True # Chunks exist
-        if "transcript.txt" in path: return False
-        return False
-    mock_os.path.exists.side_effect = exists_side_effect
+    mock_audio_class.process_for_transcription.side_effect = lambda *args, **kwargs: write_files("temp/job_123_chunk_001.mp3")
+    mock_audio_class.get_duration.return_value = 100
     
-    mock_os.listdir.return_value = [] # No existing chunks initially
-    
-    mock_os.path.join = os.path.join
-    mock_os.path.basename = os.path.basename
-    mock_os.path.dirname = os.path.dirname
-    mock_os.path.splitext = os.path.splitext
+    # Downloaded file already exists; nothing processed yet
+    write_files("downloads/Test_Job.mp3")
     
     # API mocks
     mock_api = mock_api_class.return_value
@@ -72,28 +56,26 @@ def test_execute_job_success(mock_job_manager_class, mock_shutil, mock_os, mock_
     
     pipeline = ProcessingPipeline(mock_config, job_manager=mock_manager)
     
-    # We need to handle the file opening in pipeline
-    with patch('builtins.open', MagicMock()):
-        success = pipeline.execute_job(job)
-        
-        assert success is True
-        # Verify JobManager was updated to completed
-        mock_manager.update_job_status.assert_called_with('123', 'completed')
-        
-        # Verify download skipped (since file exists)
-        mock_down.assert_not_called()
-        
-        # Verify processing
-        mock_audio_class.optimize_audio.assert_called()
-        
-        # Verify API call with system_instruction
-        mock_api.generate_content_with_file.assert_called()
-        args, kwargs = mock_api.generate_content_with_file.call_args
-        assert kwargs['system_instruction'] == TRANSCRIPTION_PROMPT
-        assert kwargs['prompt'] == "Please transcribe this audio chunk."
-        
-        # Verify notes generation
-        mock_notes.assert_called_once()
+    success = pipeline.execute_job(job)
+    
+    assert success is True
+    # Verify JobManager was updated to completed
+    mock_manager.update_job_status.assert_called_with('123', 'completed')
+    
+    # Verify download skipped (since file exists)
+    mock_down.assert_not_called()
+    
+    # Verify processing
+    mock_audio_class.optimize_audio.assert_called()
+    
+    # Verify API call with system_instruction
+    mock_api.generate_content_with_file.assert_called()
+    args, kwargs = mock_api.generate_content_with_file.call_args
+    assert kwargs['system_instruction'] == TRANSCRIPTION_PROMPT
+    assert kwargs['prompt'] == "Please transcribe this audio chunk."
+    
+    # Verify notes generation
+    mock_notes.assert_called_once()
 
 @patch('src.pipeline.download_audio')
 @patch('src.pipeline.AudioProcessor')
@@ -110,4 +92,203 @@ def test_execute_job_download_failure(mock_job_manager_class, mock_os, mock_api,
     success = pipeline.execute_job(job)
     
     assert success is False
-    mock_manager.update_job_status.assert_called_with('123', 'failed')
\ No newline at end of file
+    mock_manager.update_job_status.assert_called_with('123', 'failed')
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_fused_prep_chunks_without_prepared_file(mock_job_manager_class, mock_audio_class, mock_config, job, workdir, write_files):
+    """In fused mode the downloaded audio is optimized and chunked by a single call."""
+    mock_config.get.side_effect = lambda key, default=None: "fused" if key == "audio_prep_mode" else default
+    mock_audio_class.optimize_and_segment.side_effect = lambda *args, **kwargs: write_files(
+        "temp/123/job_123_chunk_000.mp3", "temp/123/job_123_chunk_001.mp3")
+    mock_audio_class.get_duration.return_value = 60
+    audio_path, = write_files("downloads/Test_Job.mp3")
+    job["status"] = "DOWNLOADED"
+    mock_manager = mock_job_manager_class.return_value
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_manager)
+    ctx = pipeline.create_context(job)
+    ctx["audio_path"] = audio_path
+    os.makedirs(ctx["temp_dir"])
+
+    assert pipeline.run_stage("audio", ctx) is True
+    args, kwargs = mock_audio_class.optimize_and_segment.call_args
+    assert args == (audio_path,)
+    assert kwargs["output_pattern"] == os.path.join("temp", "123", "job_123_chunk_%03d.mp3")
+    mock_audio_class.optimize_audio.assert_not_called()
+    mock_audio_class.process_for_transcription.assert_not_called()
+    assert job["status"] == "CHUNKED"
+    assert ctx["chunks"] == ["temp/123/job_123_chunk_000.mp3", "temp/123/job_123_chunk_001.mp3"]
+    assert not os.path.exists(os.path.join("temp", "123", "Test_Job_prepared.mp3"))
+
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_parallel_prep_uses_core_budget(mock_job_manager_class, mock_audio_class, mock_config, job, workdir, write_files):
+    """Parallel prep shards the recording across the configured number of ffmpeg workers."""
+    mock_config.get.side_effect = lambda key, default=None: "parallel" if key == "audio_prep_mode" else default
+    mock_config.get_prep_workers.return_value = 4
+    mock_audio_class.optimize_parallel.side_effect = lambda *args, **kwargs: write_files("temp/123/job_123_chunk_000.mp3")
+    mock_audio_class.get_duration.return_value = 60
+    audio_path, = write_files("downloads/Test_Job.mp3")
+    job["status"] = "DOWNLOADED"
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_job_manager_class.return_value)
+    ctx = pipeline.create_context(job)
+    ctx["audio_path"] = audio_path
+    os.makedirs(ctx["temp_dir"])
+
+    assert pipeline.run_stage("audio", ctx) is True
+    assert mock_audio_class.optimize_parallel.call_args.kwargs["workers"] == 4
+    mock_audio_class.optimize_and_segment.assert_not_called()
+    assert job["status"] == "CHUNKED"
+
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_audio_profile_sets_chunk_container(mock_job_manager_class, mock_audio_class, mock_config, job, workdir, write_files):
+    """The configured encoding profile decides the prepared and chunk file extensions."""
+    mock_config.get.side_effect = lambda key, default=None: "opus-24k" if key == "audio_profile" else default
+    mock_audio_class.optimize_audio.return_value = True
+    mock_audio_class.process_for_transcription.side_effect = lambda *args, **kwargs: write_files("temp/123/job_123_chunk_000.ogg")
+    mock_audio_class.get_duration.return_value = 60
+    audio_path, = write_files("downloads/Test_Job.mp3")
+    job["status"] = "DOWNLOADED"
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_job_manager_class.return_value)
+    ctx = pipeline.create_context(job)
+    ctx["audio_path"] = audio_path
+    os.makedirs(ctx["temp_dir"])
+
+    assert pipeline.run_stage("audio", ctx) is True
+    args, kwargs = mock_audio_class.optimize_audio.call_args
+    assert args == (audio_path, os.path.join("temp", "123", "Test_Job_prepared.ogg"))
+    assert kwargs["profile"] == "opus-24k"
+    assert mock_audio_class.process_for_transcription.call_args.kwargs["output_pattern"].endswith("job_123_chunk_%03d.ogg")
+
+@patch('src.pipeline.VoiceActivityDetector')
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_vad_prep_reuses_speech_map(mock_job_manager_class, mock_audio_class, mock_vad_class, mock_config, job, workdir, write_files):
+    """VAD prep detects speech once, saves the map, and encodes chunks from it."""
+    from src.voice_activity import SpeechMap
+    mock_config.get.side_effect = lambda key, default=None: "vad" if key == "audio_prep_mode" else default
+    mock_config.get_prep_workers.return_value = 2
+    detector = mock_vad_class.from_config.return_value
+    def detect(audio_path, map_path):
+        speech_map = SpeechMap(map_path, 60, [(1, 20), (25, 50)])
+        speech_map.save()
+        return speech_map
+    detector.detect.side_effect = detect
+    mock_audio_class.optimize_speech.side_effect = lambda *args, **kwargs: write_files("temp/123/job_123_chunk_000.mp3")
+    mock_audio_class.get_duration.return_value = 44
+    audio_path, = write_files("downloads/Test_Job.mp3")
+    job["status"] = "DOWNLOADED"
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_job_manager_class.return_value)
+    ctx = pipeline.create_context(job)
+    ctx["audio_path"] = audio_path
+    os.makedirs(ctx["temp_dir"])
+
+    assert pipeline.run_stage("audio", ctx) is True
+    speech_map = mock_audio_class.optimize_speech.call_args.kwargs["speech_map"]
+    assert speech_map.segments == [(1, 20), (25, 50)]
+    assert os.path.exists(os.path.join("temp", "123", "job_123_speech.json"))
+
+    # A retried prep reuses the saved map instead of decoding the audio again
+    os.remove(pipeline._manifest_path(ctx))
+    job["status"] = "DOWNLOADED"
+    assert pipeline.run_stage("audio", ctx) is True
+    detector.detect.assert_called_once()
+
+@patch('src.pipeline.NonSpeechClassifier')
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_non_speech_is_excised_before_chunking(mock_job_manager_class, mock_audio_class, mock_classifier_class, mock_config, job, workdir, write_files):
+    """Music found in the prepared audio is cut out before chunking and the seconds saved are recorded."""
+    mock_config.get.side_effect = lambda key, default=None: True if key == "non_speech_filter_enabled" else default
+    mock_classifier_class.from_config.return_value.classify.return_value = (600.0, [(0.0, 120.0), (300.0, 330.0)])
+    mock_audio_class.get_duration.return_value = 600.0
+    mock_audio_class.excise.side_effect = lambda src, dst, keep, **kwargs: bool(write_files(dst))
+    mock_audio_class.process_for_transcription.side_effect = lambda *args, **kwargs: write_files("temp/123/job_123_chunk_000.mp3")
+    mock_manager = mock_job_manager_class.return_value
+    write_files("downloads/Test_Job.mp3", "temp/123/Test_Job_prepared.mp3")
+    job.update(status="BITRATE_MODIFIED", scratch_dir=os.path.join("temp", "123"))
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_manager)
+    ctx = pipeline.create_context(job)
+    ctx["audio_path"] = os.path.join("downloads", "Test_Job.mp3")
+
+    assert pipeline.run_stage("audio", ctx) is True
+    prepared = os.path.join("temp", "123", "Test_Job_prepared.mp3")
+    mock_audio_class.excise.assert_called_once_with(prepared, os.path.join("temp", "123", "Test_Job_prepared_excised.mp3"),
+                                                    [(120.0, 300.0), (330.0, 600.0)])
+    assert os.path.exists(prepared)
+    mock_manager.update_job.assert_any_call('123', non_speech_removed=150.0)
+    assert job["non_speech_removed"] == 150.0
+
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_resplit_removes_stale_chunks(mock_job_manager_class, mock_audio_class, mock_config, job, workdir, write_files):
+    """Chunks left by an interrupted split (no manifest) are removed before splitting again."""
+    mock_audio_class.get_duration.return_value = 60
+    mock_audio_class.process_for_transcription.side_effect = lambda *args, **kwargs: write_files("temp/123/job_123_chunk_000.mp3")
+    mock_manager = mock_job_manager_class.return_value
+    write_files("downloads/Test_Job.mp3", "temp/123/Test_Job_prepared.mp3", *[f"temp/123/job_123_chunk_{i:03d}.mp3" for i in range(3)])
+    job.update(status="BITRATE_MODIFIED", scratch_dir=os.path.join("temp", "123"))
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_manager)
+    ctx = pipeline.create_context(job)
+    ctx["audio_path"] = os.path.join("downloads", "Test_Job.mp3")
+
+    assert pipeline.run_stage("audio", ctx) is True
+    assert ctx["chunks"] == [os.path.join("temp", "123", "job_123_chunk_000.mp3")]
+    assert not os.path.exists(os.path.join("temp", "123", "job_123_chunk_001.mp3"))
+
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_audio_tempo_is_recorded_and_kept(mock_job_manager_class, mock_audio_class, mock_config, job, workdir, write_files):
+    """The configured tempo is applied at prep and recorded, and a resumed job keeps its recorded tempo."""
+    mock_config.get.side_effect = lambda key, default=None: 1.5 if key == "audio_tempo" else default
+    mock_audio_class.optimize_audio.return_value = True
+    mock_audio_class.process_for_transcription.side_effect = lambda *args, **kwargs: write_files("temp/123/job_123_chunk_000.mp3")
+    mock_audio_class.get_duration.return_value = 60
+    audio_path, = write_files("downloads/Test_Job.mp3")
+    job["status"] = "DOWNLOADED"
+    mock_manager = mock_job_manager_class.return_value
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_manager)
+    ctx = pipeline.create_context(job)
+    ctx["audio_path"] = audio_path
+    os.makedirs(ctx["temp_dir"])
+
+    assert pipeline.run_stage("audio", ctx) is True
+    assert mock_audio_class.optimize_audio.call_args.kwargs["tempo"] == 1.5
+    mock_manager.update_job.assert_any_call('123', audio_tempo=1.5)
+    assert job["audio_tempo"] == 1.5
+
+    mock_config.get.side_effect = lambda key, default=None: 1.25 if key == "audio_tempo" else default
+    assert pipeline._tempo(pipeline.create_context(job)) == 1.5
+
+def test_audio_tempo_out_of_range(mock_config, job):
+    mock_config.get.side_effect = lambda key, default=None: 3 if key == "audio_tempo" else default
+    pipeline = ProcessingPipeline(mock_config, job_manager=MagicMock())
+    with pytest.raises(ValueError):
+        pipeline._tempo(pipeline.create_context(job))
+
+@patch('src.pipeline.AudioProcessor')
+@patch('src.pipeline.JobManager')
+def test_passthrough_skips_reencode(mock_job_manager_class, mock_audio_class, mock_config, job, workdir, write_files):
+    """When re-encoding would not pay off, the download is linked in as the prepared audio."""
+    mock_audio_class.should_reencode.return_value = False
+    mock_audio_class.process_for_transcription.side_effect = lambda *args, **kwargs: write_files("temp/123/job_123_chunk_000.mp3")
+    mock_audio_class.get_duration.return_value = 60
+    audio_path, = write_files("downloads/Test_Job.mp3")
+    job["status"] = "DOWNLOADED"
+
+    pipeline = ProcessingPipeline(mock_config, job_manager=mock_job_manager_class.return_value)
+    ctx = pipeline.create_context(job)
+    ctx["audio_path"] = audio_path
+    os.makedirs(ctx["temp_dir"])
+
+    assert pipeline.run_stage("audio", ctx) is True
+    mock_audio_class.optimize_audio.assert_not_called()
+    mock_audio_class.link_or_copy.assert_called_once_with(audio_path, ctx["prepared_path"])
+    assert job["status"] == "CHUNKED"
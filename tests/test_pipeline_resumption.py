@@ -8,6 +8,7 @@ sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
 from src.pipeline import ProcessingPipeline
 from src.config_manager import ConfigManager
+from src.chunk_manifest import ChunkManifest
 
 @pytest.fixture
 def pipeline_setup():
@@ -15,6 +16,7 @@ def pipeline_setup():
     api = MagicMock()
     # Mock KeyManager to avoid reset_quotas_if_needed errors
     api.key_manager = MagicMock()
+    api.model_name.return_value = "gemini-2.5-flash"
     job_manager = MagicMock()
     pipeline = ProcessingPipeline(config, api, job_manager)
     return pipeline
@@ -34,7 +36,7 @@ def test_resume_from_downloaded(pipeline_setup):
          patch("src.downloader.download_audio") as mock_download, \
          patch("src.audio_processor.AudioProcessor.optimize_audio") as mock_optimize, \
          patch("src.pipeline.os.listdir") as mock_listdir, \
-         patch("src.pipeline.shutil.copy2") as mock_copy, \
+         patch("src.audio_processor.AudioProcessor.link_or_copy") as mock_copy, \
          patch("src.audio_processor.AudioProcessor.get_duration") as mock_duration:
 
         mock_path.return_value = "downloads/Test_Job.mp3"
@@ -56,7 +58,7 @@ def test_resume_from_downloaded(pipeline_setup):
         # Should call optimization since status is DOWNLOADED
         assert mock_optimize.called or mock_copy.called
 
-def test_resume_from_chunked(pipeline_setup, tmp_path):
+def test_resume_from_chunked(pipeline_setup, workdir, write_files):
     """Test that if status is CHUNKED, download and processing are skipped."""
     pipeline = pipeline_setup
     job = {
@@ -66,52 +68,32 @@ def test_resume_from_chunked(pipeline_setup, tmp_path):
         "status": "CHUNKED"
     }
 
-    # Use a real directory structure within tmp_path
-    base_dir = tmp_path
-    temp_dir = base_dir / "temp"
-    temp_dir.mkdir()
-    downloads_dir = base_dir / "downloads"
-    downloads_dir.mkdir()
-    
-    (downloads_dir / "Test_Job.mp3").touch()
-    (temp_dir / "job_job1_chunk_001.mp3").touch()
-    (temp_dir / "job_job1_chunk_002.mp3").touch()
-
-    # Need to patch 'temp' and 'downloads' usage in pipeline
-    import os
-    orig_exists = os.path.exists
-    orig_makedirs = os.makedirs
-    orig_listdir = os.listdir
-    orig_open = open
-
-    def mock_exists(path):
-        if any(x in path for x in ["temp", "downloads", "job1", "Test_Job"]):
-            return True
-        return orig_exists(path)
-
-    with patch("src.pipeline.os.path.exists", side_effect=mock_exists), \
-         patch("src.pipeline.os.makedirs") as mock_makedirs, \
-         patch("src.pipeline.os.listdir", return_value=["job_job1_chunk_001.mp3", "job_job1_chunk_002.mp3"]), \
-         patch("src.pipeline.open", MagicMock()), \
-         patch("src.downloader.get_expected_audio_path", return_value="downloads/Test_Job.mp3"), \
-         patch("src.downloader.download_audio") as mock_download, \
-         patch("src.audio_processor.AudioProcessor.optimize_audio") as mock_optimize:
+    # Chunks from before manifests existed: they are recorded once and transcribed
+    write_files("downloads/Test_Job.mp3", "temp/job_job1_chunk_001.mp3", "temp/job_job1_chunk_002.mp3")
 
-        pipeline.api.generate_content_with_file.side_effect = Exception("Stop here")
+    with patch("src.downloader.download_audio") as mock_download, \
+         patch("src.audio_processor.AudioProcessor.optimize_audio") as mock_optimize, \
+         patch("src.audio_processor.AudioProcessor.get_duration", return_value=60.0):
 
-        try:
-            pipeline.execute_job(job)
-        except Exception as e:
-            if str(e) != "Stop here": raise
+        pipeline.api.generate_content_with_file.side_effect = Exception("Stop here")
+        assert pipeline.execute_job(job) is False
 
         mock_download.assert_not_called()
         mock_optimize.assert_not_called()
         assert pipeline.api.generate_content_with_file.called
 
-        
+    manifest = ChunkManifest.load(ChunkManifest.path_for("temp", "job1"))
+    assert manifest.paths == [os.path.join("temp", "job_job1_chunk_001.mp3"), os.path.join("temp", "job_job1_chunk_002.mp3")]
+    assert [c["duration"] for c in manifest.chunks] == [60.0, 60.0]
+
+def make_manifest(write_files, done):
+    chunks = write_files("temp/job_job1_chunk_001.mp3", "temp/job_job1_chunk_002.mp3")
+    manifest = ChunkManifest.create(ChunkManifest.path_for("temp", "job1"), chunks)
+    for index, text in done.items():
+        manifest.mark_done(index, text)
+    return manifest
 
-    
-def test_resume_transcription_skip_chunks(pipeline_setup):
+def test_resume_transcription_skip_chunks(pipeline_setup, workdir, write_files):
     """Test that already transcribed chunks are skipped."""
     pipeline = pipeline_setup
     job = {
@@ -119,29 +101,33 @@ def test_resume_transcription_skip_chunks(pipeline_setup):
         "name": "Test Job",
         "url": "http://example.com",
         "status": "TRANSCRIBING_CHUNK_1",
-        "transcriptions": {"1": "Already done"}
     }
+    write_files("downloads/Test_Job.mp3")
+    # A paragraph break inside a transcript must not count as an extra chunk
+    make_manifest(write_files, {1: "Chunk 1 content\n\nmore of chunk 1"})
 
-    with patch("src.downloader.get_expected_audio_path") as mock_path, \
-         patch("src.pipeline.os.path.exists") as mock_exists, \
-         patch("src.pipeline.os.listdir") as mock_listdir, \
-         patch("src.pipeline.open", MagicMock()) as mock_open:
-    
-        mock_path.return_value = "downloads/Test_Job.mp3"
-        mock_exists.side_effect = lambda p: True if any(x in p for x in ["temp", "downloads", "job1", "Test_Job"]) else False
-        mock_listdir.return_value = ["job_job1_chunk_001.mp3", "job_job1_chunk_002.mp3"]
-        
-        # Mock file reading to return 1 chunk already done
-        mock_open.return_value.__enter__.return_value.read.return_value = "Chunk 1 content\n\n"
-        # If it tries to transcribe chunk 1, this will fail. If it skips, it will try chunk 2 and fail there.
-        pipeline.api.generate_content_with_file.side_effect = [Exception("Stop at chunk 2")]
+    # If it tries to transcribe chunk 1, this will fail. If it skips, it will try chunk 2 and fail there.
+    pipeline.api.generate_content_with_file.side_effect = [Exception("Stop at chunk 2")]
+    assert pipeline.execute_job(job) is False
 
-        try:
-            pipeline.execute_job(job)
-        except Exception as e:
-            if str(e) != "Stop at chunk 2" and "No such file or directory" not in str(e): raise
+    # Verify it skipped chunk 1 (the first call to generate_content_with_file was for "Stop at chunk 2")
+    assert pipeline.api.generate_content_with_file.call_count == 1
+    args, kwargs = pipeline.api.generate_content_with_file.call_args
+    assert "chunk_002" in kwargs['file_path']
 
-        # Verify it skipped chunk 1 (the first call to generate_content_with_file was for "Stop at chunk 2")
-        assert pipeline.api.generate_content_with_file.call_count == 1
-        args, kwargs = pipeline.api.generate_content_with_file.call_args
-        assert "chunk_002" in kwargs['file_path']
+def test_resume_after_out_of_order_completion(pipeline_setup, workdir, write_files):
+    """Test that a later chunk finished before an earlier one is kept, and only the gap is redone."""
+    pipeline = pipeline_setup
+    job = {"id": "job1", "name": "Test Job", "url": "http://example.com", "status": "TRANSCRIBING_CHUNK_2"}
+    write_files("downloads/Test_Job.mp3")
+    make_manifest(write_files, {2: "second"})
+    pipeline.api.generate_content_with_file.return_value = "first"
+
+    ctx = pipeline.create_context(job)
+    for stage in ["download", "audio", "transcribe"]:
+        assert pipeline.run_stage(stage, ctx) is True
+
+    assert pipeline.api.generate_content_with_file.call_count == 1
+    assert "chunk_001" in pipeline.api.generate_content_with_file.call_args.kwargs["file_path"]
+    with open(ctx["transcript_path"], encoding="utf-8") as f:
+        assert f.read() == "first\n\nsecond\n\n"
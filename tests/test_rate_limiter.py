@@ -0,0 +1,83 @@
+import pytest
+import time
+from unittest.mock import AsyncMock, MagicMock, patch
+from src.rate_limiter import AdaptiveRateLimiter
+from src.gemini_api_wrapper import GeminiAPIWrapper
+
+KEY = ("a@example.com", "gemini-2.5-flash")
+
+def test_burst_passes_without_waiting():
+    limiter = AdaptiveRateLimiter(initial_rpm=60, burst=2)
+    assert limiter.reserve(KEY) == 0
+    assert limiter.reserve(KEY) == 0
+    # Bucket is empty: third request waits about one token interval (1s at 60 rpm)
+    assert limiter.reserve(KEY) == pytest.approx(1.0, abs=0.05)
+
+def test_keys_are_independent():
+    limiter = AdaptiveRateLimiter(initial_rpm=60, burst=1)
+    assert limiter.reserve(KEY) == 0
+    assert limiter.reserve(("b@example.com", "gemini-2.5-flash")) == 0
+    assert limiter.reserve(("a@example.com", "gemini-3-flash-preview")) == 0
+
+def test_throttle_is_multiplicative_and_success_additive():
+    limiter = AdaptiveRateLimiter(initial_rpm=40, min_rpm=5, max_rpm=42, increase_rpm=1, cooldown=0)
+    limiter.on_throttle(KEY)
+    assert limiter.current_rpm(KEY) == pytest.approx(20)
+    limiter.on_throttle(KEY)
+    limiter.on_throttle(KEY)
+    assert limiter.current_rpm(KEY) == pytest.approx(5) # Clamped at min_rpm
+
+    for _ in range(3):
+        limiter.on_success(KEY)
+    assert limiter.current_rpm(KEY) == pytest.approx(8)
+    for _ in range(100):
+        limiter.on_success(KEY)
+    assert limiter.current_rpm(KEY) == pytest.approx(42) # Clamped at max_rpm
+
+def test_throttle_blocks_key_for_cooldown():
+    limiter = AdaptiveRateLimiter(initial_rpm=60, burst=5, cooldown=30)
+    limiter.on_throttle(KEY)
+    assert limiter.reserve(KEY) == pytest.approx(30, abs=0.1)
+    limiter.on_throttle(("b@example.com", "m"), retry_after=3)
+    assert limiter.reserve(("b@example.com", "m")) == pytest.approx(3, abs=0.1)
+
+def test_acquire_sleeps_only_when_needed(monkeypatch):
+    sleeps = []
+    monkeypatch.setattr(time, "sleep", lambda s: sleeps.append(s))
+    limiter = AdaptiveRateLimiter(initial_rpm=60, burst=1)
+    limiter.acquire(KEY)
+    assert sleeps == []
+    limiter.acquire(KEY)
+    assert len(sleeps) == 1 and sleeps[0] > 0
+
+@pytest.mark.anyio
+async def test_wrapper_429_throttles_account_without_global_sleep(sse_response):
+    mock_config = MagicMock()
+    mock_config.get.side_effect = lambda k, default=None: {"api_max_retries": 1}.get(k, default)
+    accounts = [
+        {"email": "a@example.com", "status": "valid", "projectId": "p1", "access": "t1"},
+        {"email": "b@example.com", "status": "valid", "projectId": "p2", "access": "t2"},
+    ]
+    mock_auth = MagicMock()
+    mock_auth.accounts = accounts
+    mock_auth.get_next_account.side_effect = accounts * 2
+    async def mock_get_valid(acc): return acc
+    mock_auth.get_valid_account = mock_get_valid
+
+    wrapper = GeminiAPIWrapper(config=mock_config, auth_service=mock_auth, usage_tracker=MagicMock())
+    wrapper._log_error = MagicMock()
+
+    ok = 'data: {"response": {"candidates": [{"content": {"parts": [{"text": "done"}]}}]}}'
+    mock_client = MagicMock()
+    mock_client.stream.side_effect = [sse_response(status_code=429, text="quota"), sse_response(lines=[ok])]
+
+    with patch("httpx.AsyncClient", return_value=mock_client), \
+         patch("src.gemini_api_wrapper.asyncio.sleep", new_callable=AsyncMock) as mock_sleep:
+        text = await wrapper.generate_content_async("prompt", model_type="transcription")
+
+    assert text == "done"
+    # The second account was used right away; no fixed 30s wait
+    mock_sleep.assert_not_called()
+    model = mock_config.get("transcription_model") or "gemini-2.0-flash"
+    assert wrapper.rate_limiter.current_rpm(("a@example.com", model)) == pytest.approx(30)
+    assert wrapper.rate_limiter.current_rpm(("b@example.com", model)) == pytest.approx(61)
@@ -0,0 +1,87 @@
+import json
+import base64
+import pytest
+import httpx
+from unittest.mock import MagicMock, patch
+from src.request_body import AudioPayload, StreamingJSONBody
+from src.gemini_api_wrapper import GeminiAPIWrapper
+
+def make_request(payload):
+    return {
+        "project": "p1",
+        "request": {"contents": [{"role": "user", "parts": [
+            {"inline_data": {"mime_type": payload.mime_type, "data": StreamingJSONBody.PLACEHOLDER}},
+            {"text": "Transcribe \"this\""},
+        ]}]},
+    }
+
+async def collect(body):
+    blocks = [block async for block in body]
+    return blocks, b"".join(blocks)
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("size", [0, 1, 2, 3, AudioPayload.BLOCK_SIZE + 1, 3 * AudioPayload.BLOCK_SIZE])
+async def test_streamed_body_matches_inline_json(tmp_path, size):
+    audio = tmp_path / "chunk.mp3"
+    data = bytes(i % 251 for i in range(size))
+    audio.write_bytes(data)
+    payload = AudioPayload(str(audio))
+
+    body = StreamingJSONBody(make_request(payload), payload)
+    blocks, raw = await collect(body)
+
+    assert len(raw) == body.content_length
+    parsed = json.loads(raw)
+    inline = parsed["request"]["contents"][0]["parts"][0]["inline_data"]
+    assert base64.b64decode(inline["data"]) == data
+    assert parsed["request"]["contents"][0]["parts"][1]["text"] == 'Transcribe "this"'
+    # No block is larger than one encoded read
+    assert max(len(b) for b in blocks) <= max(len(body.prefix), len(body.suffix), AudioPayload.BLOCK_SIZE // 3 * 4)
+
+@pytest.mark.parametrize("name, mime_type", [
+    ("chunk.mp3", "audio/mp3"), ("chunk.ogg", "audio/ogg"), ("chunk.FLAC", "audio/flac"), ("chunk.bin", "audio/mp3"),
+])
+def test_mime_type_follows_container(tmp_path, name, mime_type):
+    audio = tmp_path / name
+    audio.write_bytes(b"abc")
+    assert AudioPayload(str(audio)).mime_type == mime_type
+    assert AudioPayload(str(audio), mime_type="audio/wav").mime_type == "audio/wav"
+
+def test_missing_placeholder_is_rejected(tmp_path):
+    audio = tmp_path / "chunk.mp3"
+    audio.write_bytes(b"abc")
+    with pytest.raises(ValueError):
+        StreamingJSONBody({"request": {}}, AudioPayload(str(audio)))
+
+@pytest.mark.anyio
+async def test_file_upload_streams_same_payload_on_retry(tmp_path, sse_response):
+    audio = tmp_path / "chunk.mp3"
+    audio.write_bytes(b"\x00\x01audio" * 100)
+
+    mock_auth = MagicMock()
+    mock_auth.accounts = [{"email": "a@example.com", "status": "valid", "projectId": "p1", "access": "t1"}]
+    mock_auth.get_next_account.return_value = mock_auth.accounts[0]
+    async def mock_get_valid(acc): return acc
+    mock_auth.get_valid_account = mock_get_valid
+    wrapper = GeminiAPIWrapper(config=MagicMock(get=lambda k, default=None: default), auth_service=mock_auth, usage_tracker=MagicMock())
+    wrapper.backoff_manager.initial_delay = 0
+    wrapper._log_error = MagicMock()
+
+    sent = []
+    ok = 'data: {"response": {"candidates": [{"content": {"parts": [{"text": "done"}]}}]}}'
+    responses = [sse_response(status_code=503, text="busy"), sse_response(lines=[ok])]
+
+    def fake_stream(method, url, headers=None, content=None, **kwargs):
+        assert "json" not in kwargs
+        sent.append((headers["Content-Length"], content))
+        return responses[len(sent) - 1]
+
+    with patch.object(httpx.AsyncClient, "stream", side_effect=fake_stream):
+        assert await wrapper.generate_content_with_file_async(str(audio), "prompt") == "done"
+
+    assert len(sent) == 2
+    assert sent[0][1].payload is sent[1][1].payload
+    _, raw = await collect(sent[1][1])
+    assert int(sent[1][0]) == len(raw)
+    inline = json.loads(raw)["request"]["contents"][0]["parts"][0]["inline_data"]
+    assert base64.b64decode(inline["data"]) == audio.read_bytes()
@@ -0,0 +1,90 @@
+import os
+import sys
+import pytest
+from unittest.mock import MagicMock, patch
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.transcript_cache import TranscriptCache
+from src.pipeline import ProcessingPipeline
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache.db"), max_bytes=10)
+    yield cache
+    cache.close()
+
+def test_key_depends_on_audio_model_and_prompt():
+    key = TranscriptCache.make_key("abc", "gemini-2.5-flash", "prompt")
+    assert key == TranscriptCache.make_key("abc", "gemini-2.5-flash", "prompt")
+    assert key != TranscriptCache.make_key("abd", "gemini-2.5-flash", "prompt")
+    assert key != TranscriptCache.make_key("abc", "gemini-3-flash-preview", "prompt")
+    assert key != TranscriptCache.make_key("abc", "gemini-2.5-flash", "prompt v2")
+
+def test_lru_eviction_keeps_recently_used(cache):
+    cache.put("a", "aaaa", "m")
+    cache.put("b", "bbbb", "m")
+    assert cache.get("a") == "aaaa" # "a" is now the most recently used
+    cache.put("c", "cccc", "m") # 12 bytes > 10: evict the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get("a") == "aaaa"
+    assert cache.get("c") == "cccc"
+    stats = cache.stats()
+    assert stats["entries"] == 2 and stats["bytes"] == 8
+    assert stats["models"] == {"m": 2}
+
+    assert cache.prune(0) == 2
+    assert cache.stats()["entries"] == 0
+
+def test_put_prunes_only_when_over_the_limit(tmp_path):
+    cache = TranscriptCache(str(tmp_path / "cache.db"), max_bytes=100)
+    with patch.object(cache, "prune", wraps=cache.prune) as prune:
+        cache.put("a", "x" * 40)
+        cache.put("a", "y" * 40)
+        cache.put("b", "x" * 40)
+        assert prune.call_count == 0
+        cache.put("c", "x" * 40)
+        assert prune.call_count == 1
+    assert cache.stats()["bytes"] <= 100
+    cache.close()
+
+def test_processes_sharing_a_cache_stay_bounded(tmp_path):
+    path = str(tmp_path / "cache.db")
+    first = TranscriptCache(path, max_bytes=100)
+    second = TranscriptCache(path, max_bytes=100)
+    for i in range(10):
+        (first if i % 2 else second).put(f"k{i}", "x" * 30)
+        assert first.stats()["bytes"] <= 100
+    assert first.stats()["entries"] == 3
+    first.close()
+    second.close()
+
+
+def test_pipeline_reuses_cached_transcripts(tmp_path):
+    """Test that identical chunk audio is transcribed once, even across jobs."""
+    config = MagicMock()
+    config.get.side_effect = lambda key, default=None: {"max_inflight_chunks": 1, "transcript_cache_enabled": True}.get(key, default)
+    cache = TranscriptCache(str(tmp_path / "cache.db"))
+    with patch('src.pipeline.NotionConfigManager'), \
+         patch('src.pipeline.RcloneConfigManager'), \
+         patch('src.pipeline.RcloneService'):
+        pipeline = ProcessingPipeline(config, api_wrapper=MagicMock(), job_manager=MagicMock(), transcript_cache=cache)
+    pipeline.api.model_name.return_value = "gemini-2.5-flash"
+    pipeline.api.generate_content_with_file.return_value = "hello"
+
+    for job_id in ["j1", "j2"]:
+        scratch = tmp_path / job_id
+        scratch.mkdir()
+        chunk = scratch / f"job_{job_id}_chunk_001.mp3"
+        chunk.write_bytes(b"same lecture audio")
+        ctx = pipeline.create_context({"id": job_id, "name": f"Job {job_id}"})
+        ctx["temp_dir"] = str(scratch)
+        ctx["chunks"] = [str(chunk)]
+        assert pipeline._stage_transcribe(ctx) is True
+        with open(ctx["transcript_path"], encoding="utf-8") as f:
+            assert f.read() == "hello\n\n"
+
+    assert pipeline.api.generate_content_with_file.call_count == 1
+    pipeline.close()
@@ -1,5 +1,6 @@
 import pytest
 import json
+import httpx
 import asyncio
 from unittest.mock import MagicMock, patch, AsyncMock
 import sys
@@ -31,16 +32,14 @@ def wrapper(mock_auth_service, mock_usage_tracker):
     return GeminiAPIWrapper(auth_service=mock_auth_service, usage_tracker=mock_usage_tracker)
 
 @pytest.mark.anyio
-async def test_generate_content_async_success(wrapper, mock_auth_service, mock_usage_tracker):
-    # Mock httpx response
-    mock_resp = MagicMock()
-    mock_resp.status_code = 200
-    mock_resp.iter_lines.return_value = [
+async def test_generate_content_async_success(wrapper, mock_auth_service, mock_usage_tracker, sse_response):
+    # Mock streamed httpx response
+    mock_resp = sse_response(lines=[
         b'data: {"response": {"candidates": [{"content": {"parts": [{"text": "Hello"}]}}]}}',
         b'data: {"response": {"candidates": [{"content": {"parts": [{"text": " World"}]}}]}}'
-    ]
+    ])
     
-    with patch('httpx.AsyncClient.post', return_value=mock_resp):
+    with patch('httpx.AsyncClient.stream', return_value=mock_resp):
         result = await wrapper.generate_content_async("Test prompt")
         
         assert result == "Hello World"
@@ -57,3 +56,30 @@ def test_sync_wrappers(wrapper):
         res = wrapper.generate_content("Prompt", system_instruction="System")
         assert res == "Mocked Response"
         mock_async.assert_called_once()
+
+@pytest.mark.anyio
+async def test_stream_idle_gap_aborts(wrapper, sse_response):
+    """A stream that goes quiet after its first event is cut by the idle timeout."""
+    wrapper.stream_idle_timeout = 0.05
+    line = 'data: {"response": {"candidates": [{"content": {"parts": [{"text": "Hi"}]}}]}}'
+
+    # The wait for the first event is not bounded by the idle timeout
+    resp = sse_response(lines=[line], delay=0.1)
+    assert await wrapper._read_sse_text(resp) == "Hi"
+
+    stalled = sse_response(lines=[line, line], delay=0.1)
+    with pytest.raises(httpx.ReadTimeout):
+        await wrapper._read_sse_text(stalled)
+
+@pytest.mark.anyio
+async def test_stalled_stream_is_retried(wrapper, mock_usage_tracker, sse_response):
+    """An idle-timeout on one attempt is retried like any other timeout."""
+    wrapper.stream_idle_timeout = 0.05
+    wrapper.backoff_manager.initial_delay = 0
+    line = 'data: {"response": {"candidates": [{"content": {"parts": [{"text": "Hi"}]}}]}}'
+    responses = [sse_response(lines=[line, line], delay=0.1), sse_response(lines=[line])]
+
+    with patch('httpx.AsyncClient.stream', side_effect=responses):
+        assert await wrapper.generate_content_async("Test prompt") == "Hi"
+    mock_usage_tracker.record_usage.assert_called_once()
+
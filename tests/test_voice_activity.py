@@ -0,0 +1,98 @@
+import os
+import sys
+import subprocess
+import pytest
+from unittest.mock import patch
+
+# Add project root to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.audio_processor import AudioProcessor
+from src.voice_activity import SpeechMap, VoiceActivityDetector, NonSpeechClassifier, subtract_regions
+
+@pytest.fixture
+def noisy_lecture(tmp_path):
+    """2s tone, 3s of room noise (about -38 dBFS, above silenceremove's -50 dB), 2s tone."""
+    path = tmp_path / "lecture.wav"
+    subprocess.run([
+        "ffmpeg", "-y", "-f", "lavfi", "-i", "sine=frequency=220:duration=2",
+        "-f", "lavfi", "-i", "anoisesrc=amplitude=0.02:duration=3:sample_rate=44100",
+        "-f", "lavfi", "-i", "sine=frequency=330:duration=2",
+        "-filter_complex", "[0]aresample=44100[a];[2]aresample=44100[c];[a][1][c]concat=n=3:v=0:a=1", str(path)
+    ], check=True, capture_output=True)
+    return str(path)
+
+def test_detects_speech_over_noise_floor(tmp_path, noisy_lecture):
+    pytest.importorskip("numpy")
+    map_path = SpeechMap.path_for(str(tmp_path), "v1")
+    # Small blocks, so frames are assembled across several reads
+    speech_map = VoiceActivityDetector(block_seconds=1).detect(noisy_lecture, map_path)
+
+    assert speech_map.duration == pytest.approx(7.0)
+    assert len(speech_map.segments) == 2
+    (first_start, first_end), (second_start, second_end) = speech_map.segments
+    assert first_start == 0.0 and 2.0 <= first_end <= 2.5
+    assert 4.5 <= second_start <= 5.0 and second_end == pytest.approx(7.0)
+    assert SpeechMap.load(map_path).segments == speech_map.segments
+
+def test_plan_chunks_cuts_between_segments():
+    speech_map = SpeechMap("unused.json", 100, [(0, 4), (5, 9), (10, 12), (20, 35), (40, 41)])
+    assert speech_map.speech_seconds == 26
+    assert speech_map.plan_chunks(10) == [
+        [(0, 4), (5, 9), (10, 12)],
+        # Only a segment longer than a chunk is cut inside
+        [(20, 30)],
+        [(30, 35), (40, 41)],
+    ]
+
+def test_load_missing_speech_map(tmp_path):
+    assert SpeechMap.load(str(tmp_path / "job_v1_speech.json")) is None
+
+def test_optimize_speech_encodes_only_speech(tmp_path, noisy_lecture):
+    speech_map = SpeechMap("unused.json", 7.0, [(0.0, 2.2), (4.8, 7.0)])
+    chunks = AudioProcessor.optimize_speech(noisy_lecture, str(tmp_path / "job_v1_chunk_%03d.mp3"), speech_map, segment_time=3)
+
+    assert [os.path.basename(c) for c in chunks] == ["job_v1_chunk_000.mp3", "job_v1_chunk_001.mp3"]
+    assert sorted(os.listdir(tmp_path)) == ["job_v1_chunk_000.mp3", "job_v1_chunk_001.mp3", "lecture.wav"]
+    for chunk in chunks:
+        info = AudioProcessor.probe(chunk)
+        assert info.duration == pytest.approx(2.2, abs=0.15)
+        assert (info.channels, info.sample_rate) == (1, 16000)
+
+@pytest.fixture
+def music_then_speech(tmp_path):
+    """20s of a steady chord (music bed), then 15s of syllable-rate gated, swelling voice-like tone."""
+    path = tmp_path / "intro.wav"
+    subprocess.run([
+        "ffmpeg", "-y",
+        "-f", "lavfi", "-i", "aevalsrc=0.2*sin(2*PI*220*t)+0.15*sin(2*PI*277*t)+0.1*sin(2*PI*330*t):s=16000:d=20",
+        "-f", "lavfi", "-i", "aevalsrc=0.3*sin(2*PI*150*t)*gt(sin(2*PI*4*t)\\,0)*(0.5+0.5*sin(2*PI*0.7*t)):s=16000:d=15",
+        "-filter_complex", "[0][1]concat=n=2:v=0:a=1", str(path)
+    ], check=True, capture_output=True)
+    return str(path)
+
+def test_classifier_marks_music_bed(music_then_speech):
+    pytest.importorskip("numpy")
+    duration, regions = NonSpeechClassifier().classify(music_then_speech)
+    assert duration == pytest.approx(35.0)
+    assert len(regions) == 1
+    start, end = regions[0]
+    assert start == 0.0 and 18.0 <= end <= 20.5
+
+def test_subtract_regions():
+    segments = [(0, 10), (12, 30), (40, 50)]
+    assert subtract_regions(segments, [(5, 15), (20, 22), (45, 60)]) == [(0, 5), (15, 20), (22, 30), (40, 45)]
+    assert subtract_regions(segments, []) == segments
+
+@pytest.mark.parametrize("extension", [".wav", ".mp3", ".flac"])
+def test_excise_keeps_only_given_ranges(tmp_path, music_then_speech, extension):
+    prepared = str(tmp_path / f"prepared{extension}")
+    subprocess.run(["ffmpeg", "-y", "-i", music_then_speech, "-ac", "1", prepared], check=True, capture_output=True)
+    output = str(tmp_path / f"excised{extension}")
+    with patch("src.audio_processor.subprocess.run", wraps=subprocess.run) as run:
+        assert AudioProcessor.excise(prepared, output, [(20.0, 35.0)]) is True
+    # The prepared audio is stream-copied, not encoded a second time
+    assert "copy" in run.call_args[0][0]
+    assert AudioProcessor.probe(output).duration == pytest.approx(15.0, abs=0.15)
+    assert AudioProcessor.probe(output).codec == AudioProcessor.probe(prepared).codec
+    assert not os.path.exists(f"{output}.ffconcat")
@@ -2,6 +2,7 @@
 import os
 import sys
 import shutil
+import time
 import logging
 import json
 from src.job_manager import JobManager
@@ -20,7 +21,9 @@ from src.rclone_config_manager import RcloneConfigManager
 from src.rclone_service import RcloneService
 from src.config_manager import ConfigManager
 from src.pipeline import ProcessingPipeline
+from src.job_executor import JobExecutor, StagedJobExecutor, AsyncJobExecutor, LeasedJobWorker, JobLeases
 from src.cleanup_service import FileCleanupService
+from src.transcript_cache import TranscriptCache
 from src.gemini_auth_service import GeminiAuthService
 from src.gemini_creds_helper import main as run_creds_helper
 
@@ -92,12 +95,12 @@ def manage_gemini_accounts():
             print("🔄 Refreshing all accounts...")
             loop = asyncio.new_event_loop()
             asyncio.set_event_loop(loop)
-            for acc in auth_service.accounts:
-                try:
-                    loop.run_until_complete(auth_service.refresh_token(acc))
-                    print(f"✅ Refreshed {acc['email']}")
-                except Exception as e:
-                    print(f"❌ Failed to refresh {acc['email']}: {e}")
+            results = loop.run_until_complete(auth_service.refresh_accounts(force=True))
+            for email, error in results.items():
+                if error is None:
+                    print(f"✅ Refreshed {email}")
+                else:
+                    print(f"❌ Failed to refresh {email}: {error}")
         elif choice == '4':
             break
         else:
@@ -262,29 +265,180 @@ def run_processing_pipeline(manager, jobs_to_run=None):
     pipeline = ProcessingPipeline(config, job_manager=manager)
     
     pending_jobs = jobs_to_run if jobs_to_run is not None else manager.get_pending_from_last_150()
+    # Lease the jobs, so a --worker process running alongside never picks up the same ones
+    leases = JobLeases(
+        manager,
+        lease_seconds=config.get("job_lease_seconds", 600),
+        heartbeat_interval=config.get("job_heartbeat_interval", 60)
+    )
+    claimed = leases.claim(pending_jobs) if pending_jobs else []
+    if len(claimed) < len(pending_jobs):
+        print(f"⏩ Skipping {len(pending_jobs) - len(claimed)} job(s) another worker is processing.")
+    pending_jobs = claimed
     if not pending_jobs:
         print("No pending jobs to process.")
         return
 
-    print(f"\n🚀 Starting pipeline for {len(pending_jobs)} jobs...")
+    pipeline_mode = config.get("pipeline_mode")
+    if pipeline_mode == "staged":
+        stage_workers = config.get_stage_workers()
+        print(f"\n🚀 Starting staged pipeline for {len(pending_jobs)} jobs "
+              f"({', '.join(f'{k}={v}' for k, v in stage_workers.items())})...")
+        executor = StagedJobExecutor(pipeline, stage_workers=stage_workers, queue_size=config.get("stage_queue_size", 2))
+    elif pipeline_mode == "async":
+        max_workers = min(config.get_max_concurrent_jobs(), len(pending_jobs))
+        print(f"\n🚀 Starting async pipeline for {len(pending_jobs)} jobs ({max_workers} at a time)...")
+        executor = AsyncJobExecutor(pipeline, max_concurrency=max_workers)
+    else:
+        max_workers = min(config.get_max_concurrent_jobs(), len(pending_jobs))
+        print(f"\n🚀 Starting pipeline for {len(pending_jobs)} jobs ({max_workers} at a time)...")
+        executor = JobExecutor(pipeline, max_workers=max_workers)
+    try:
+        # Renew tokens up front and in the background so requests never wait on a refresh
+        for email, error in pipeline.api.validate_accounts().items():
+            if error is not None:
+                print(f"⚠️ Gemini account {email} could not be refreshed: {error}")
+        pipeline.api.start_token_refresher()
+        with leases:
+            results = executor.run(pending_jobs)
+    finally:
+        pipeline.close()
     
-    for job in pending_jobs:
-        print(f"\n--- Processing Job: {job['name']} ---")
-        success = pipeline.execute_job(job)
-        
-        # Save progress after each job
-        manager.save_history()
-        
-        if not success:
-            print(f"⚠️ Job '{job['name']}' failed. Failing all remaining jobs in batch...")
-            # Only fail the remaining jobs in THIS specific batch
-            remaining = pending_jobs[pending_jobs.index(job)+1:]
-            for r_job in remaining:
-                manager.update_job_status(r_job['id'], 'failed')
-            break
+    failed = [job for job in pending_jobs if not results.get(job['id'])]
+    if failed:
+        print(f"\n⚠️ {len(failed)}/{len(pending_jobs)} job(s) failed: {', '.join(job['name'] for job in failed)}")
     
     print("\n🏁 Pipeline execution finished.")
 
+def run_worker(worker_id=None):
+    """Processes queued jobs from the shared job store until none are left to claim."""
+    config = ConfigManager()
+    manager = JobManager()
+    pipeline = ProcessingPipeline(config, job_manager=manager)
+    worker = LeasedJobWorker(
+        pipeline,
+        worker_id=worker_id,
+        lease_seconds=config.get("job_lease_seconds", 600),
+        heartbeat_interval=config.get("job_heartbeat_interval", 60),
+        max_workers=config.get_max_concurrent_jobs()
+    )
+    print(f"\n👷 Worker {worker.worker_id} started ({worker.max_workers} at a time).")
+    try:
+        for email, error in pipeline.api.validate_accounts().items():
+            if error is not None:
+                print(f"⚠️ Gemini account {email} could not be refreshed: {error}")
+        pipeline.api.start_token_refresher()
+        results = worker.run()
+    finally:
+        pipeline.close()
+
+    failed = [job_id for job_id, success in results.items() if not success]
+    print(f"\n🏁 Worker {worker.worker_id} finished: {len(results) - len(failed)} succeeded, {len(failed)} failed.")
+
+def manage_transcript_cache(show_info=False, prune_mb=None):
+    """
+    Prints transcript cache statistics and/or evicts least recently used transcripts.
+    prune_mb < 0 prunes down to the configured transcript_cache_max_mb.
+    """
+    from datetime import datetime
+    cache = TranscriptCache.from_config(ConfigManager())
+    try:
+        if prune_mb is not None:
+            limit = None if prune_mb < 0 else int(prune_mb * 1024 * 1024)
+            removed = cache.prune(limit)
+            print(f"🧹 Evicted {removed} cached transcript(s).")
+        if show_info or prune_mb is None:
+            stats = cache.stats()
+            print(f"\n🗃️ Transcript cache: {cache.db_path}")
+            print(f"   Entries: {stats['entries']}")
+            print(f"   Size: {stats['bytes'] / (1024 * 1024):.2f} MB of {stats['max_bytes'] / (1024 * 1024):.0f} MB")
+            for model, count in stats["models"].items():
+                print(f"   - {model}: {count}")
+            if stats["oldest_use"]:
+                print(f"   Least recently used: {datetime.fromtimestamp(stats['oldest_use']):%Y-%m-%d %H:%M}")
+                print(f"   Most recently used: {datetime.fromtimestamp(stats['newest_use']):%Y-%m-%d %H:%M}")
+    finally:
+        cache.close()
+
+def benchmark_audio_profiles(input_path, round_trip=False, profiles=None):
+    """
+    Encodes input_path with each audio profile and prints bytes, encode time and, with round_trip,
+    the latency of a transcription request per profile. Encoded files go to temp/benchmark/.
+    """
+    from src.audio_processor import AudioProcessor
+    if not os.path.exists(input_path):
+        print(f"❌ File not found: {input_path}")
+        return
+    output_dir = os.path.join("temp", "benchmark")
+    results = AudioProcessor.benchmark_profiles(input_path, output_dir, profiles)
+    api = None
+    if round_trip:
+        from src.gemini_api_wrapper import GeminiAPIWrapper
+        from src.prompts import TRANSCRIPTION_PROMPT
+        api = GeminiAPIWrapper()
+    try:
+        print(f"\n📊 Audio profiles for {input_path}:")
+        print(f"   {'Profile':<10} {'Bytes':>12} {'kbit/s':>8} {'Encode':>9} {'Round trip':>11}")
+        for result in results:
+            if not result["path"]:
+                print(f"   {result['profile']:<10} {'encode failed':>12}")
+                continue
+            latency = "-"
+            if api is not None:
+                started = time.perf_counter()
+                try:
+                    api.generate_content_with_file(result["path"], "Please transcribe this audio chunk.", system_instruction=TRANSCRIPTION_PROMPT)
+                    latency = f"{time.perf_counter() - started:.2f}s"
+                except Exception as e:
+                    latency = "failed"
+                    logger.warning(f"Round trip for {result['profile']} failed: {e}")
+            kbps = result["bytes"] * 8 / result["duration"] / 1000 if result["duration"] else 0
+            print(f"   {result['profile']:<10} {result['bytes']:>12,} {kbps:>8.1f} {result['encode_seconds']:>8.2f}s {latency:>11}")
+    finally:
+        if api is not None:
+            api.close()
+
+def benchmark_audio_tempos(input_path, tempos, round_trip=False):
+    """
+    Prepares input_path at each tempo and prints the duration saved, bytes and base64 payload size
+    per tempo. With round_trip each output is transcribed, timing the request and keeping the
+    transcript next to the audio so the tempos can be compared. Files go to temp/benchmark/.
+    """
+    from src.audio_processor import AudioProcessor
+    if not os.path.exists(input_path):
+        print(f"❌ File not found: {input_path}")
+        return
+    api = None
+    transcribe = None
+    if round_trip:
+        from src.gemini_api_wrapper import GeminiAPIWrapper
+        from src.prompts import TRANSCRIPTION_PROMPT
+        api = GeminiAPIWrapper()
+
+        def transcribe(path):
+            text = api.generate_content_with_file(path, "Please transcribe this audio chunk.", system_instruction=TRANSCRIPTION_PROMPT)
+            with open(f"{os.path.splitext(path)[0]}.txt", "w", encoding="utf-8") as f:
+                f.write(text or "")
+            return text
+    try:
+        profile = ConfigManager().get("audio_profile")
+        results = AudioProcessor.benchmark_tempos(input_path, os.path.join("temp", "benchmark"), tempos, profile, transcribe)
+        print(f"\n📊 Audio tempos for {input_path}:")
+        print(f"   {'Tempo':<6} {'Duration':>9} {'Saved':>8} {'Bytes':>12} {'Payload':>12} {'Encode':>9} {'Transcribe':>11}")
+        for result in results:
+            if not result["path"]:
+                print(f"   {result['tempo']:<6g} {'encode failed':>9}")
+                continue
+            saved = f"{result['seconds_saved']:.0f}s" if result["seconds_saved"] is not None else "-"
+            latency = f"{result['transcribe_seconds']:.2f}s" if "transcribe_seconds" in result else "-"
+            print(f"   {result['tempo']:<6g} {result['duration']:>8.0f}s {saved:>8} {result['bytes']:>12,} "
+                  f"{result['payload_bytes']:>12,} {result['encode_seconds']:>8.2f}s {latency:>11}")
+    except Exception as e:
+        print(f"❌ Tempo benchmark failed: {e}")
+    finally:
+        if api is not None:
+            api.close()
+
 def process_old_notes():
     config = ConfigManager()
     if not config.get("notion_integration_enabled", False):
@@ -530,12 +684,33 @@ from src.local_media_manager import LocalMediaManager
 def main():
     parser = argparse.ArgumentParser(description="Zaknotes: Automated Class Note Generation")
     parser.add_argument("--local", nargs="*", help="Process local media files in uploads/ folder. Can take optional class names.")
+    parser.add_argument("--worker", action="store_true", help="Run as a queue worker: claim and process queued jobs, then exit. Start several to scale out.")
+    parser.add_argument("--worker-id", help="Name for this worker's job leases (default: host-pid).")
+    parser.add_argument("--cache-info", action="store_true", help="Show transcript cache statistics.")
+    parser.add_argument("--cache-prune", nargs="?", type=float, const=-1, metavar="MB",
+                        help="Evict least recently used cached transcripts down to MB (default: transcript_cache_max_mb; 0 empties the cache).")
+    parser.add_argument("--benchmark-profiles", metavar="FILE",
+                        help="Encode FILE with every audio profile and report size and encode time.")
+    parser.add_argument("--benchmark-tempo", metavar="FILE",
+                        help="Prepare FILE at several tempos and report duration saved and payload size.")
+    parser.add_argument("--tempos", default="1,1.25,1.5",
+                        help="Comma-separated tempos for --benchmark-tempo (default: 1,1.25,1.5).")
+    parser.add_argument("--round-trip", action="store_true",
+                        help="With --benchmark-profiles or --benchmark-tempo, also time a transcription request per output.")
     # Future flag for cleanup (Phase 4)
     # parser.add_argument("--cleanup-uploads", action="store_true", help="Purge the uploads/ folder.")
     
     args, unknown = parser.parse_known_args()
     
-    if args.local is not None:
+    if args.benchmark_profiles:
+        benchmark_audio_profiles(args.benchmark_profiles, args.round_trip)
+    elif args.benchmark_tempo:
+        benchmark_audio_tempos(args.benchmark_tempo, [float(t) for t in args.tempos.split(",") if t.strip()], args.round_trip)
+    elif args.cache_info or args.cache_prune is not None:
+        manage_transcript_cache(args.cache_info, args.cache_prune)
+    elif args.worker:
+        run_worker(args.worker_id)
+    elif args.local is not None:
         names_input = "|".join(args.local) if args.local else None
         process_local_media(names_input)
     else: